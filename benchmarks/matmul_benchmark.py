@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+THALOS Prime - Matmul Microbenchmark
+Compares the blocked, transposed-B matmul kernel against the original
+naive i-j-k loop for Linear-sized products.
+
+Usage: python benchmarks/matmul_benchmark.py [--rows N] [--repeat N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from thalos_prime.math.backend import PythonBackend
+
+
+def naive_matmul(a: array, b: array, m: int, k: int, n: int) -> array:
+    """The original i-j-k loop, striding through B column-wise."""
+    result = array('d')
+    for i in range(m):
+        for j in range(n):
+            total = 0.0
+            for p in range(k):
+                total += a[i * k + p] * b[p * n + j]
+            result.append(total)
+    return result
+
+
+def best_time(fn, repeat: int) -> float:
+    """Best wall-clock time over `repeat` runs."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rows', type=int, default=16, help='rows of the input (sequence length)')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per measurement')
+    args = parser.parse_args()
+    
+    backend = PythonBackend()
+    random.seed(0)
+    
+    print("=" * 70)
+    print("THALOS Prime Matmul Microbenchmark")
+    print("=" * 70)
+    print(f"{'d_model':>8} {'naive (s)':>12} {'kernel (s)':>12} {'cached W^T (s)':>15} {'speedup':>9}")
+    
+    for d_model in (128, 512):
+        m, k, n = args.rows, d_model, d_model
+        a = array('d', (random.gauss(0, 1) for _ in range(m * k)))
+        b = array('d', (random.gauss(0, 1) for _ in range(k * n)))
+        bt = backend.transpose(b, k, n)
+        
+        expected = naive_matmul(a, b, m, k, n)
+        actual = backend.matmul(a, b, m, k, n)
+        assert max(abs(x - y) for x, y in zip(expected, actual)) < 1e-9
+        
+        naive = best_time(lambda: naive_matmul(a, b, m, k, n), args.repeat)
+        kernel = best_time(lambda: backend.matmul(a, b, m, k, n), args.repeat)
+        cached = best_time(lambda: backend.matmul_bt(a, bt, m, k, n), args.repeat)
+        print(f"{d_model:>8} {naive:>12.4f} {kernel:>12.4f} {cached:>15.4f} {naive / cached:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
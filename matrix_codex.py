@@ -7,6 +7,8 @@ Advanced matrix operations and codex management.
 from typing import List, Dict, Any, Optional
 import math
 
+from thalos_prime.math.backend import matmul_rows
+
 
 class MatrixCodex:
     """Matrix operations and codex management."""
@@ -32,12 +34,9 @@ class MatrixCodex:
             raise ValueError("Incompatible dimensions")
         
         result = MatrixCodex(self.rows, other.cols)
-        for i in range(self.rows):
-            for j in range(other.cols):
-                total = 0.0
-                for k in range(self.cols):
-                    total += self.data[i][k] * other.data[k][j]
-                result.data[i][j] = total
+        other_t = [list(col) for col in zip(*other.data)]
+        if other_t:
+            result.data = matmul_rows(self.data, other_t)
         return result
     
     def transpose(self) -> 'MatrixCodex':
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Test that the NumPy backend matches the pure-Python reference backend.
+"""
+
+import sys
+import os
+import random
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip('numpy')
+
+from thalos_prime.math import (
+    Tensor, randn, bmm, use_backend, LinearAlgebra, Activations, LayerNorm, RMSNorm, BatchNorm,
+    SparseTensor, einsum, AttentionMechanisms, LinearAttention
+)
+from thalos_prime.nn import Linear, LayerNormLayer, TransformerBlock
+
+TOL = 1e-9
+
+
+def _both(fn):
+    """Run fn under each backend and return (python_result, numpy_result)."""
+    with use_backend('python'):
+        expected = fn()
+    with use_backend('numpy'):
+        actual = fn()
+    return expected, actual
+
+
+def _assert_close(expected: Tensor, actual: Tensor, tol: float = TOL):
+    assert expected.shape == actual.shape
+    for e, a in zip(expected.data, actual.data):
+        assert e == a or abs(e - a) <= tol * max(1.0, abs(e)), (e, a)
+
+
+def test_elementwise_parity():
+    """Test broadcasting arithmetic and unary ops."""
+    random.seed(0)
+    a = randn(4, 6)
+    b = randn(6)
+    c = randn(4, 1)
+    for fn in (lambda: a + b, lambda: a - c, lambda: c * a, lambda: a / b,
+               lambda: 2 - a, lambda: 1 / a, lambda: a ** 2, lambda: -a,
+               lambda: Tensor([0.0, -0.0, 2.0, 4.0]) ** -1, lambda: Tensor([0.0, 2.0]) ** -2,
+               lambda: (Tensor([0.0, 2.0, 4.0]).lazy() ** -1).materialize(),
+               lambda: a.exp(), lambda: a.abs().sqrt(), lambda: a.abs().log(),
+               lambda: a.sum(dim=0), lambda: a.mean(dim=1, keepdim=True)):
+        _assert_close(*_both(fn))
+
+
+def test_in_place_parity():
+    """Test in-place and out= arithmetic on both backends."""
+    random.seed(2)
+    a = randn(3, 4)
+    b = randn(4)
+    
+    def run():
+        t = a.clone()
+        t += b
+        t.mul_(a).div_(b)
+        return a.sub(t, out=t)
+    
+    _assert_close(*_both(run))
+
+
+def test_lazy_and_batch_norm_parity():
+    """Test fused lazy expressions and BatchNorm on both backends."""
+    random.seed(4)
+    x = randn(6, 5)
+    g = randn(5)
+    _assert_close(*_both(lambda: ((x.lazy() - g) * x / g + 1).tanh().materialize()))
+    _assert_close(*_both(lambda: BatchNorm(5)(x)))
+    
+    # Fused BatchNorm matches the direct formula
+    expected = (x - x.mean(dim=0)) / (x.std(dim=0) ** 2 + 1e-5) ** 0.5
+    _assert_close(expected, BatchNorm(5)(x))
+
+
+def test_division_by_zero_parity():
+    """Test x / 0 -> 0.0 on both backends."""
+    x = Tensor([1.0, 2.0, 3.0])
+    y = Tensor([0.0, 2.0, 0.0])
+    _assert_close(*_both(lambda: x / y))
+
+
+def test_matmul_and_activation_parity():
+    """Test matmul, softmax, activations and normalizations."""
+    random.seed(1)
+    a = randn(5, 7)
+    b = randn(7, 3)
+    x = randn(3, 8)
+    q = randn(2, 5, 7)
+    k = randn(2, 4, 7)
+    ln = LayerNorm(8)
+    rms = RMSNorm(8)
+    for fn in (lambda: LinearAlgebra.matmul(a, b), lambda: q @ b,
+               lambda: q @ k.transpose(1, 2), lambda: bmm(k, q.transpose(1, 2)),
+               lambda: Activations.softmax(x),
+               lambda: Activations.softmax(x, dim=0), lambda: Activations.gelu(x),
+               lambda: Activations.sigmoid(x), lambda: Activations.relu(x),
+               lambda: Activations.tanh(x), lambda: Activations.swish(x),
+               lambda: Activations.swish(x, 1.5), lambda: ln(x), lambda: rms(x)):
+        _assert_close(*_both(fn))
+
+
+def test_nn_layer_parity():
+    """Test Linear, LayerNormLayer and a full transformer block."""
+    random.seed(2)
+    linear = Linear(8, 4)
+    norm = LayerNormLayer(8)
+    block = TransformerBlock(8, 2, 16, dropout=0.0).eval()
+    x = randn(3, 8)
+    for fn in (lambda: linear(x), lambda: norm(x), lambda: block(x)):
+        _assert_close(*_both(fn))
+
+
+def test_sparse_and_dtype_parity():
+    """Test sparse-dense matmul, comparisons and masked_fill."""
+    random.seed(7)
+    sp = SparseTensor.from_coo([0, 0, 2, 3], [1, 4, 0, 4], [0.5, -1.0, 2.0, 3.0], (4, 5))
+    dense = randn(5, 3)
+    ids = Tensor([3, 1, 4, 1], dtype='int64')
+    for fn in (lambda: sp @ dense, lambda: sp @ dense.T[0],
+               lambda: dense.masked_fill(dense.gt(0), 0.0),
+               lambda: (ids + 2) * ids, lambda: ids.lt(3).sum()):
+        _assert_close(*_both(fn))
+
+
+def test_einsum_parity():
+    """Test planned contractions on both backends."""
+    random.seed(8)
+    a, b, c = randn(3, 4), randn(2, 4, 5), randn(5, 6)
+    for fn in (lambda: einsum('ij,hjk,kl->hil', a, b, c), lambda: einsum('hjk->kj', b)):
+        _assert_close(*_both(fn))
+
+
+def test_flash_attention_parity():
+    """Test the tiled attention kernel (masked and causal) on both backends."""
+    random.seed(9)
+    q, k, v = randn(2, 6, 4), randn(2, 9, 4), randn(2, 9, 5)
+    mask = Tensor([[float((i + j) % 3 != 0) for j in range(9)] for i in range(6)])
+    for fn in (lambda: AttentionMechanisms.flash_attention(q, k, v, mask, block_size=4),
+               lambda: AttentionMechanisms.flash_attention(q, k, v, causal=True, block_size=2)):
+        _assert_close(*_both(fn))
+
+
+def test_linear_attention_parity():
+    """Test chunked causal linear attention against the Python recurrence."""
+    random.seed(10)
+    attn = LinearAttention(4)
+    q, k, v = randn(2, 70, 4), randn(2, 70, 4), randn(2, 70, 3)
+    _, state = attn.prefill(q.narrow(1, 0, 5), k.narrow(1, 0, 5), v.narrow(1, 0, 5))
+    for fn in (lambda: attn(q, k, v, causal=True), lambda: attn.prefill(q, k, v, state)[1][0]):
+        _assert_close(*_both(fn))
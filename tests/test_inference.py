@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Test token sampling strategies.
+"""
+
+import sys
+import os
+import random
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from thalos_prime.inference import TextGenerator
+
+
+def test_top_k_and_top_p_filtering():
+    """Test that sampling never leaves the top-k / nucleus candidates."""
+    random.seed(0)
+    gen = TextGenerator(vocab_size=6)
+    logits = [0.1, 3.0, 0.2, 2.9, -1.0, 0.0]
+    
+    assert gen.greedy_decode(logits) == 1
+    assert gen.sample_token(list(logits), top_k=1) == 1
+    for _ in range(20):
+        assert gen.sample_token(list(logits), top_k=2) in (1, 3)
+        assert gen.sample_token(list(logits), top_p=0.4) == 1
+
+
+def test_beam_search_picks_best_path():
+    """Test beam search with a fixed next-token distribution."""
+    gen = TextGenerator(vocab_size=4)
+    seq = gen.beam_search(lambda s: [0.0, 0.0, 5.0, 1.0], [0], beam_width=2, max_length=3)
+    assert seq == [0, 2, 2, 2]
@@ -0,0 +1,632 @@
+#!/usr/bin/env python3
+"""
+Test tensor storage and operations.
+"""
+
+import sys
+import os
+import math
+import random
+from array import array
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from thalos_prime.math import Tensor, Shape, zeros, empty, ones, randn, matmul, bmm, cat, stack, split, chunk, BufferPool, get_pool, LazyTensor, SparseTensor, einsum, tensordot, contraction_path, LinearAlgebra, LUFactorization
+
+
+def test_packed_storage():
+    """Test that tensor data lives in a packed array buffer."""
+    t = Tensor([[1, 2], [3, 4]])
+    assert isinstance(t.data, array)
+    assert t.dtype == 'float64'
+    assert t.shape.dims == (2, 2)
+    assert t.nbytes == 4 * 8
+    assert t.tolist() == [[1.0, 2.0], [3.0, 4.0]]
+    assert t[1][0] == 3.0
+
+
+def test_float32_storage():
+    """Test float32 tensors use half the memory."""
+    t = zeros(4, 4, dtype='float32')
+    assert t.dtype == 'float32'
+    assert t.nbytes == 16 * 4
+    assert t.astype('float64').nbytes == 16 * 8
+
+
+def test_integer_and_bool_dtypes():
+    """Test packed int/bool storage and dtype promotion."""
+    ids = Tensor([3, 1, 4], dtype='int64')
+    assert ids.data.typecode == 'q'
+    assert ids.tolist() == [3, 1, 4] and isinstance(ids[0], int)
+    assert Tensor([1, 2], dtype='int32').nbytes == 2 * 4
+    assert Tensor(array('q', [1, 2])).dtype == 'int64'
+    
+    assert (ids + 1).dtype == 'int64'
+    assert (ids * 0.5).dtype == 'float64'
+    assert (ids / 2).tolist() == [1.5, 0.5, 2.0]
+    assert (ids + Tensor([1, 1, 1], dtype='int32')).dtype == 'int64'
+    assert (ids ** -1).dtype == 'float64'
+    assert ids.sum().item() == 8 and ids.mean().item() == 8 / 3
+    assert ids.sqrt().dtype == 'float64'
+    assert Tensor([1.9, -2.7]).astype('int32').tolist() == [1, -2]
+    
+    mask = ids.gt(2)
+    assert mask.dtype == 'bool' and mask.nbytes == 3
+    assert mask.tolist() == [True, False, True]
+    assert (ids < 2).tolist() == [False, True, False]
+    assert mask.sum().item() == 2
+    assert ids.masked_fill(mask, 0).tolist() == [0, 1, 0]
+    
+    scores = ones(2, 2)
+    assert scores.masked_fill(Tensor([0, 1], dtype='bool'), -1.0).tolist() == \
+        [[1.0, -1.0], [1.0, -1.0]]
+    assert (Tensor([[1, 0], [2, 3]], dtype='int64') @ Tensor([1.0, 1.0])).tolist() == [1.0, 5.0]
+    assert cat([ids, Tensor([9], dtype='int32')]).tolist() == [3, 1, 4, 9]
+    
+    try:
+        ids.div_(2)
+        assert False, "expected TypeError"
+    except TypeError:
+        pass
+
+
+def test_activations_promote_integer_inputs():
+    """Test that float-valued activations accept int tensors and return floats."""
+    from thalos_prime.math import Activations
+    
+    ids = Tensor([[-1, 0], [2, 3]], dtype='int64')
+    floats = ids.astype('float64')
+    for fn in (Activations.sigmoid, Activations.tanh, Activations.gelu, Activations.swish,
+               Activations.softmax, lambda t: Activations.softmax(t, dim=0),
+               lambda t: Activations.swish(t, 2.0)):
+        out = fn(ids)
+        assert out.dtype == 'float64' and out.tolist() == fn(floats).tolist()
+    assert Activations.relu(ids).tolist() == [[0, 0], [2, 3]]
+    assert Activations.relu(ids).dtype == 'int64'
+    assert Activations.gelu(ones(2, dtype='float32')).dtype == 'float32'
+
+
+def test_array_adoption():
+    """Test that a matching array buffer is adopted without copying."""
+    buf = array('d', [1.0, 2.0, 3.0])
+    t = Tensor(buf, Shape((3,)))
+    assert t.data is buf
+    assert t.clone().data is not buf
+
+
+def test_item_and_setitem():
+    """Test scalar access and row assignment."""
+    t = zeros(2, 3)
+    t[1] = Tensor([1.0, 2.0, 3.0])
+    assert t.tolist() == [[0.0, 0.0, 0.0], [1.0, 2.0, 3.0]]
+    assert Tensor(5).item() == 5.0
+    assert randn(2, 2).shape.dims == (2, 2)
+
+
+def test_reshape_and_transpose_are_views():
+    """Test that reshape/transpose share storage instead of copying."""
+    t = Tensor([[1, 2, 3], [4, 5, 6]])
+    r = t.reshape(3, 2)
+    tt = t.T
+    assert r.shares_storage(t)
+    assert tt.shares_storage(t)
+    assert not tt.is_contiguous()
+    assert tt.tolist() == [[1.0, 4.0], [2.0, 5.0], [3.0, 6.0]]
+    assert t.reshape(-1, 6).shape.dims == (1, 6)
+    
+    r[0] = Tensor([9.0, 9.0])
+    assert t.tolist()[0][:2] == [9.0, 9.0]
+
+
+def test_row_and_slice_views():
+    """Test integer and slice indexing on leading dimension."""
+    t = Tensor([[1, 2], [3, 4], [5, 6]])
+    row = t[1]
+    assert row.shares_storage(t)
+    assert row.tolist() == [3.0, 4.0]
+    assert t[-1][0] == 5.0
+    assert t[::2].tolist() == [[1.0, 2.0], [5.0, 6.0]]
+    assert [r.tolist() for r in t][2] == [5.0, 6.0]
+
+
+def test_narrow_and_contiguous():
+    """Test column views and explicit materialization."""
+    t = Tensor([[1, 2, 3, 4], [5, 6, 7, 8]])
+    cols = t.narrow(1, 1, 2)
+    assert cols.tolist() == [[2.0, 3.0], [6.0, 7.0]]
+    dense = cols.contiguous()
+    assert dense.is_contiguous()
+    assert not dense.shares_storage(t)
+    assert list(dense.data) == [2.0, 3.0, 6.0, 7.0]
+    
+    cols.copy_(Tensor([[0, 0], [0, 0]]))
+    assert t.tolist() == [[1.0, 0.0, 0.0, 4.0], [5.0, 0.0, 0.0, 8.0]]
+
+
+def test_views_stay_attached_after_reads():
+    """Test that reducing or reading a view never cuts it off from its base."""
+    base = zeros(2, 3)
+    row = base[0]
+    row.sum(0)
+    row.mean(0)
+    row.std()
+    list(row.data)
+    row[1] = 5
+    assert base.tolist()[0] == [0.0, 5.0, 0.0]
+    assert row.shares_storage(base)
+    
+    t = base.T
+    t.sum(0)
+    t.add_(ones(3, 2))
+    assert base.tolist() == [[1.0, 6.0, 1.0], [1.0, 1.0, 1.0]]
+
+
+def test_view_writes_are_bounds_checked():
+    """Test that out-of-range writes through a view raise instead of hitting neighbours."""
+    m = Tensor([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
+    for target, idx in ((m[0], 3), (m.T[0], -3), (m[1], -4)):
+        try:
+            target[idx] = 99.0
+            assert False, "expected IndexError"
+        except IndexError:
+            pass
+    m.T[0][-1] = 7.0
+    assert m.tolist() == [[1.0, 2.0, 3.0], [7.0, 5.0, 6.0]]
+
+
+def test_broadcast_fast_paths():
+    """Test same-shape, scalar, row and general broadcasting."""
+    a = Tensor([[1, 2, 3], [4, 5, 6]])
+    assert (a + a).tolist() == [[2.0, 4.0, 6.0], [8.0, 10.0, 12.0]]
+    assert (a * 2).tolist() == [[2.0, 4.0, 6.0], [8.0, 10.0, 12.0]]
+    assert (10 - a).tolist() == [[9.0, 8.0, 7.0], [6.0, 5.0, 4.0]]
+    assert (a + Tensor([10, 20, 30])).tolist() == [[11.0, 22.0, 33.0], [14.0, 25.0, 36.0]]
+    assert (Tensor([[1], [2]]) * a).tolist() == [[1.0, 2.0, 3.0], [8.0, 10.0, 12.0]]
+    assert (Tensor([1, 2]).reshape(2, 1) + Tensor([10, 20, 30])).tolist() == \
+        [[11.0, 21.0, 31.0], [12.0, 22.0, 32.0]]
+
+
+def test_division_by_zero():
+    """Test that division by zero yields zero."""
+    assert (Tensor([1.0, 2.0]) / Tensor([0.0, 2.0])).tolist() == [0.0, 1.0]
+    assert (1 / Tensor([0.0, 4.0])).tolist() == [0.0, 0.25]
+
+
+def test_batched_matmul():
+    """Test @ with batch dimensions, broadcasting and vectors."""
+    a = Tensor([[[1, 2], [3, 4]], [[0, 1], [1, 0]]])
+    b = Tensor([[[1, 0], [0, 1]], [[2, 3], [4, 5]]])
+    assert (a @ b).tolist() == [[[1.0, 2.0], [3.0, 4.0]], [[4.0, 5.0], [2.0, 3.0]]]
+    assert bmm(a, b).tolist() == (a @ b).tolist()
+    
+    w = Tensor([[1, 1], [0, 1]])
+    assert (a @ w).tolist() == [[[1.0, 3.0], [3.0, 7.0]], [[0.0, 1.0], [1.0, 1.0]]]
+    assert (w @ a).tolist() == [[[4.0, 6.0], [3.0, 4.0]], [[1.0, 1.0], [1.0, 0.0]]]
+    assert (a @ b.transpose(1, 2)).tolist() == (a @ b.transpose(1, 2).contiguous()).tolist()
+    
+    v = Tensor([1, 1])
+    assert (w @ v).tolist() == [2.0, 1.0]
+    assert matmul(v, w).tolist() == [1.0, 2.0]
+    assert matmul(ones(3, 1, 2, 4), ones(2, 4, 5)).shape.dims == (3, 2, 2, 5)
+    
+    try:
+        a @ ones(3, 2)
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+
+def test_dimension_reductions():
+    """Test min/max/argmax/argmin along dimensions."""
+    t = Tensor([[3, 1, 2], [0, 5, 4]])
+    assert t.max(dim=1).tolist() == [3.0, 5.0]
+    assert t.min(dim=0).tolist() == [0.0, 1.0, 2.0]
+    assert t.argmax(dim=1).tolist() == [0.0, 1.0]
+    assert t.argmin(dim=0, keepdim=True).tolist() == [[1.0, 0.0, 0.0]]
+    assert t.T.max(dim=0).tolist() == [3.0, 5.0]
+    assert t.argmax().item() == 4.0
+
+
+def test_topk():
+    """Test heap-based topk values, indices and ordering."""
+    t = Tensor([[1, 9, 3, 9], [4, 2, 8, 6]])
+    values, indices = t.topk(2)
+    assert values.tolist() == [[9.0, 9.0], [8.0, 6.0]]
+    assert indices.tolist() == [[1.0, 3.0], [2.0, 3.0]]
+    
+    values, indices = t.topk(1, dim=0, largest=False)
+    assert values.tolist() == [[1.0, 2.0, 3.0, 6.0]]
+    assert indices.tolist() == [[0.0, 1.0, 0.0, 1.0]]
+    assert t.topk(10)[0].shape.dims == (2, 4)
+
+
+def test_in_place_ops():
+    """Test in-place operators write into existing storage."""
+    t = Tensor([[1, 2], [3, 4]])
+    storage = t.data
+    alias = t
+    t += Tensor([10, 20])
+    t *= 2
+    t.sub_(1).div_(Tensor([[1], [2]]))
+    assert t is alias
+    assert t.data is storage
+    assert t.tolist() == [[21.0, 43.0], [12.5, 23.5]]
+    
+    # In-place ops on a view write through to the base tensor
+    base = zeros(2, 3)
+    base.narrow(1, 1, 2).add_(1)
+    base[0] += 5
+    assert base.tolist() == [[5.0, 6.0, 6.0], [0.0, 1.0, 1.0]]
+    
+    try:
+        Tensor([1, 2]).add_(Tensor([[1, 2], [3, 4]]))
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+
+def test_out_parameter():
+    """Test writing results into preallocated output tensors."""
+    a = Tensor([[1, 2], [3, 4]])
+    out = zeros(2, 2)
+    version = out.version
+    assert a.add(1, out=out) is out
+    assert out.tolist() == [[2.0, 3.0], [4.0, 5.0]]
+    assert out.version > version
+    
+    assert matmul(a, a, out=out) is out
+    assert out.tolist() == [[7.0, 10.0], [15.0, 22.0]]
+    matmul(a, a, out=a)
+    assert a.tolist() == [[7.0, 10.0], [15.0, 22.0]]
+    
+    cols = zeros(2, 4)
+    Tensor([[1, 1], [1, 1]]).mul(3, out=cols.narrow(1, 2, 2))
+    assert cols.tolist() == [[0.0, 0.0, 3.0, 3.0], [0.0, 0.0, 3.0, 3.0]]
+
+
+def test_buffer_pool_reuse_and_cap():
+    """Test bucketed reuse, zeroing, statistics and the idle-bytes cap."""
+    pool = BufferPool(max_bytes=64 * 8, min_elements=4)
+    buf = pool.acquire('d', 32)
+    buf[0] = 7.0
+    assert pool.release(buf)
+    again = pool.acquire('d', 32)
+    assert again is buf
+    assert again[0] == 0.0
+    
+    stats = pool.get_stats()
+    assert stats['allocations'] == 1
+    assert stats['hits'] == 1
+    assert stats['peak_bytes'] == 32 * 8
+    
+    assert pool.release(pool.acquire('d', 64))
+    assert pool.get_stats()['pooled_bytes'] == 64 * 8
+    assert not pool.release(array('d', [0.0] * 8))
+    assert pool.get_stats()['dropped'] == 1
+    assert not pool.release(array('d', [0.0] * 2))
+
+
+def test_tensor_storage_returns_to_pool():
+    """Test that dead tensors recycle storage unless a view still uses it."""
+    pool = get_pool()
+    t = zeros(8, 8)
+    view = t.reshape(64)
+    releases = pool.get_stats()['releases']
+    del t
+    assert pool.get_stats()['releases'] == releases
+    
+    hits = pool.get_stats()['hits']
+    del view
+    assert pool.get_stats()['releases'] == releases + 1
+    reused = empty(8, 8)
+    assert pool.get_stats()['hits'] == hits + 1
+    assert reused.shape.dims == (8, 8)
+
+
+def test_lazy_fusion_matches_eager():
+    """Test fused lazy expressions against eager evaluation."""
+    x = Tensor([[1, -2, 3], [4, 0, -6]])
+    mean = Tensor([[1], [2]])
+    gamma = Tensor([1, 2, 3])
+    
+    expr = (x.lazy() - mean) / gamma * x + 0.5
+    assert isinstance(expr, LazyTensor)
+    assert expr.shape.dims == (2, 3)
+    assert expr.materialize().tolist() == ((x - mean) / gamma * x + 0.5).tolist()
+    
+    shared = x.lazy().abs()
+    assert (shared * shared - 1 / x).materialize().tolist() == (x.abs() * x.abs() - 1 / x).tolist()
+    assert (x.lazy() / 0).exp().sqrt().materialize().tolist() == [[1.0] * 3, [1.0] * 3]
+    
+    from thalos_prime.math import Activations
+    for beta in (1.0, 1.7):
+        expected = [v / (1 + math.exp(-beta * v)) for v in x.data]
+        got = Activations.swish(x, beta).data
+        assert all(abs(a - b) < 1e-12 for a, b in zip(got, expected))
+    assert x.lazy().swish().materialize().tolist() == Activations.swish(x).tolist()
+
+
+def test_cat_and_stack_any_dim():
+    """Test cat/stack along inner dimensions and with views."""
+    a = Tensor([[1, 2], [3, 4]])
+    b = Tensor([[5], [6]])
+    assert cat([a, b], dim=1).tolist() == [[1.0, 2.0, 5.0], [3.0, 4.0, 6.0]]
+    assert cat([a, a.T], dim=0).tolist() == [[1.0, 2.0], [3.0, 4.0], [1.0, 3.0], [2.0, 4.0]]
+    assert cat([a, b], dim=-1).shape.dims == (2, 3)
+    
+    assert stack([a, a], dim=0).shape.dims == (2, 2, 2)
+    assert stack([a, a * 10], dim=1).tolist() == \
+        [[[1.0, 2.0], [10.0, 20.0]], [[3.0, 4.0], [30.0, 40.0]]]
+    assert stack([a, a * 10], dim=2).tolist() == \
+        [[[1.0, 10.0], [2.0, 20.0]], [[3.0, 30.0], [4.0, 40.0]]]
+    
+    try:
+        cat([a, b], dim=0)
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+
+def test_split_and_chunk():
+    """Test split/chunk return views that cat reassembles."""
+    t = Tensor([[1, 2, 3, 4, 5], [6, 7, 8, 9, 10]])
+    parts = split(t, 2, dim=1)
+    assert [p.shape.dims for p in parts] == [(2, 2), (2, 2), (2, 1)]
+    assert all(p.shares_storage(t) for p in parts)
+    assert cat(parts, dim=1).tolist() == t.tolist()
+    assert [p.shape.dims[1] for p in split(t, [1, 4], dim=1)] == [1, 4]
+    assert [p.tolist() for p in chunk(t, 2)] == [[[1.0, 2.0, 3.0, 4.0, 5.0]],
+                                                 [[6.0, 7.0, 8.0, 9.0, 10.0]]]
+    assert len(chunk(t, 3, dim=1)) == 3
+
+
+def test_sparse_csr():
+    """Test CSR construction, products and masks."""
+    sp = SparseTensor.from_coo([2, 0, 0, 2], [1, 2, 0, 1], [1.0, 2.0, 3.0, 4.0], (3, 3))
+    assert sp.nnz == 3
+    assert list(sp.indptr) == [0, 2, 2, 3]
+    assert sp.to_dense().tolist() == [[3.0, 0.0, 2.0], [0.0, 0.0, 0.0], [0.0, 5.0, 0.0]]
+    assert SparseTensor.from_dense(sp.to_dense()).to_coo()[1].tolist() == [0, 2, 1]
+    assert sp.T.to_dense().tolist() == sp.to_dense().T.tolist()
+    
+    dense = Tensor([[1, 2], [3, 4], [5, 6]])
+    assert (sp @ dense).tolist() == (sp.to_dense() @ dense).tolist()
+    assert (sp @ Tensor([1, 1, 1])).tolist() == [5.0, 0.0, 5.0]
+    
+    window = SparseTensor.from_rows([[0], [0, 1], [1, 2]], 3)
+    assert window.dtype == 'bool'
+    scores = ones(2, 3, 3)
+    assert window.apply_mask(scores, -1.0).tolist()[1] == \
+        [[1.0, -1.0, -1.0], [1.0, 1.0, -1.0], [-1.0, 1.0, 1.0]]
+
+
+def test_einsum_and_tensordot():
+    """Test einsum contractions, path planning and tensordot."""
+    a = Tensor([[1, 2], [3, 4], [5, 6]])
+    b = Tensor([[1, 0, 2], [0, 1, 3]])
+    assert einsum('ij,jk->ik', a, b).tolist() == (a @ b).tolist()
+    assert einsum('ij,jk', a, b).tolist() == (a @ b).tolist()
+    assert einsum('ij->ji', a).tolist() == a.T.tolist()
+    assert einsum('ij->', a).tolist() == [21.0]
+    assert einsum('ii->i', Tensor([[1, 2], [3, 4]])).tolist() == [1.0, 4.0]
+    assert einsum('i,j->ij', Tensor([1, 2]), Tensor([3, 4])).tolist() == [[3.0, 4.0], [6.0, 8.0]]
+    
+    q = Tensor([[[1, 2], [3, 4]], [[5, 6], [7, 8]]])
+    assert einsum('hqd,hkd->hqk', q, q).tolist() == (q @ q.transpose(-1, -2)).tolist()
+    
+    # (3x2)(2x3)(3x1): contracting the right pair first is cheaper
+    c = Tensor([[1], [1], [1]])
+    path, cost = contraction_path('ij,jk,kl->il', a, b, c)
+    assert path == [(1, 2), (0, 1)] and cost == 12
+    assert einsum('ij,jk,kl->il', a, b, c).tolist() == (a @ b @ c).tolist()
+    
+    assert tensordot(a, b, dims=1).tolist() == (a @ b).tolist()
+    assert tensordot(a, b.T, dims=([0, 1], [0, 1])).tolist() == [(a * b.T).sum().item()]
+    try:
+        einsum('ij,jk->ik', a, a)
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+
+def test_lu_factorization_reuse():
+    """Test one LU factorization serving solve, det, slogdet and inv."""
+    a = Tensor([[0, 2, 1, 0], [1, 1, 0, 2], [4, 0, 1, 1], [2, 3, 0, 1]])
+    lu = LinearAlgebra.lu(a)
+    assert isinstance(lu, LUFactorization)
+    assert (lu.P @ a).tolist() == (lu.L @ lu.U).tolist()
+    
+    for b in (Tensor([1, 2, 3, 4]), Tensor([0, 1, 0, 0])):
+        residual = (a @ lu.solve(b)) - b
+        assert max(abs(v) for v in residual.tolist()) < 1e-12
+    rhs = Tensor([[1, 0], [2, 1], [3, 0], [4, 1]])
+    assert max(abs(v) for row in ((a @ LinearAlgebra.solve(a, rhs)) - rhs).tolist()
+               for v in row) < 1e-12
+    
+    assert abs(LinearAlgebra.det(a) - lu.det()) < 1e-12
+    sign, logabs = lu.slogdet()
+    assert abs(sign * 2.718281828459045 ** logabs - lu.det()) < 1e-9
+    identity = a @ LinearAlgebra.inv(a)
+    assert all(abs(v - (i == j)) < 1e-12 for i, row in enumerate(identity.tolist())
+               for j, v in enumerate(row))
+    
+    singular = LinearAlgebra.lu(Tensor([[1, 2], [2, 4]]))
+    assert singular.det() == 0.0
+    try:
+        singular.solve(Tensor([1, 1]))
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+
+def test_decompositions():
+    """Test Householder QR, Jacobi eigh and (truncated) SVD."""
+    from thalos_prime.math import Initializers, eye
+    
+    def close(x, y, tol=1e-9):
+        return all(abs(u - v) < tol for u, v in zip(x.data, y.data))
+    
+    a = randn(6, 4)
+    q, r = LinearAlgebra.qr(a)
+    assert q.shape.dims == (6, 4) and r.shape.dims == (4, 4)
+    assert close(q @ r, a) and close(q.T @ q, eye(4))
+    
+    sym = a.T @ a
+    values, vectors = LinearAlgebra.eigh(sym)
+    assert values == sorted(values)
+    assert close(sym @ vectors, vectors * Tensor(values))
+    assert abs(LinearAlgebra.eig(sym)[0][0] - values[-1]) < 1e-9
+    
+    u, s, vt = LinearAlgebra.svd(a)
+    assert list(s.data) == sorted(s.data, reverse=True)
+    assert close((u * s) @ vt, a)
+    
+    # Rank 2: trailing singular values vanish and U, V stay orthonormal
+    for deficient in (randn(6, 2) @ randn(2, 4), randn(3, 2) @ randn(2, 5)):
+        u, s, vt = LinearAlgebra.svd(deficient)
+        k = s.shape.dims[0]
+        assert all(x == 0.0 for x in s.data[2:]) and s.data[1] > 1e-3
+        assert close(u.T @ u, eye(k), 1e-12) and close(vt @ vt.T, eye(k), 1e-12)
+        assert close((u * s) @ vt, deficient)
+    
+    low_rank = randn(12, 2) @ randn(2, 9)
+    _, s_k, _ = LinearAlgebra.truncated_svd(low_rank, 2)
+    assert close(s_k, LinearAlgebra.svd(low_rank)[1].narrow(0, 0, 2), 1e-6)
+    
+    # A seeded generator makes the random basis completion and probe reproducible
+    deficient = randn(6, 2) @ randn(2, 4)
+    runs = [(LinearAlgebra.svd(deficient, generator=random.Random(7))[0].tolist(),
+             [t.tolist() for t in LinearAlgebra.truncated_svd(low_rank, 2, generator=random.Random(7))])
+            for _ in range(2)]
+    assert runs[0] == runs[1]
+    
+    for rows, cols in ((5, 3), (3, 5)):
+        w = Initializers.orthogonal(rows, cols)
+        gram = w.T @ w if rows >= cols else w @ w.T
+        n = min(rows, cols)
+        assert all(abs(v - (i // n == i % n)) < 1e-9 for i, v in enumerate(gram.data))
+
+
+def test_bulk_random_generation():
+    """Test bulk normal/uniform draws and seeded reproducibility."""
+    import random
+    from thalos_prime.math import Distributions, Initializers
+    
+    a = randn(1001, generator=random.Random(7))
+    b = randn(1001, generator=random.Random(7))
+    assert a.shape.dims == (1001,) and a.tolist() == b.tolist()
+    
+    samples = Distributions.normal(3.0, 2.0, (4000,), generator=random.Random(1)).tolist()
+    mean = sum(samples) / len(samples)
+    std = (sum((x - mean) ** 2 for x in samples) / len(samples)) ** 0.5
+    assert abs(mean - 3.0) < 0.15 and abs(std - 2.0) < 0.15
+    
+    clipped = Distributions.truncated_normal(size=(500,), generator=random.Random(2)).tolist()
+    assert len(clipped) == 500 and all(-2.0 <= x <= 2.0 for x in clipped)
+    limit = (6.0 / 20) ** 0.5
+    weights = Initializers.xavier_uniform(10, 10, (10, 10), generator=random.Random(3)).tolist()
+    assert all(-limit <= x <= limit for row in weights for x in row)
+
+
+def test_flash_attention_matches_reference():
+    """Test tiled attention against the materialized softmax path."""
+    from thalos_prime.math import AttentionMechanisms
+    
+    def close(x, y, tol=1e-9):
+        return x.shape.dims == y.shape.dims and \
+            all(abs(u - v) < tol for u, v in zip(x.data, y.data))
+    
+    q, k, v = randn(2, 7, 4), randn(2, 11, 4), randn(2, 11, 3)
+    expected, _ = AttentionMechanisms.scaled_dot_product_attention(q, k, v)
+    for block in (1, 3, 64):
+        assert close(AttentionMechanisms.flash_attention(q, k, v, block_size=block), expected)
+    
+    # Causal with a longer key sequence: query i sees keys up to i + 4
+    causal = Tensor(array('B', [int(j <= i + 4) for i in range(7) for j in range(11)]),
+                    Shape((7, 11)), 'bool')
+    expected, _ = AttentionMechanisms.scaled_dot_product_attention(q, k, v, causal)
+    for block in (2, 5):
+        assert close(AttentionMechanisms.flash_attention(q, k, v, causal=True, block_size=block),
+                     expected)
+        assert close(AttentionMechanisms.flash_attention(q, k, v, causal, block_size=block),
+                     expected)
+    
+    # A query with no visible key yields zeros instead of a uniform average
+    mask = ones(3, 5)
+    mask.data[5:10] = array('d', [0.0] * 5)
+    out = AttentionMechanisms.flash_attention(randn(3, 2), randn(5, 2), randn(5, 2), mask,
+                                              block_size=2)
+    assert out.tolist()[1] == [0.0, 0.0]
+    
+    # Masks broadcast to (seq_q, seq_k) as in masked_fill
+    q, k, v = randn(2, 3, 4), randn(2, 5, 4), randn(2, 5, 3)
+    padding = AttentionMechanisms.padding_mask(Tensor([2]), 5)
+    expected = AttentionMechanisms.flash_attention(q, k, v, padding.expand(3, 5).contiguous())
+    for mask in (padding, padding.reshape(5), padding.reshape(1, 1, 5)):
+        assert close(AttentionMechanisms.flash_attention(q, k, v, mask, block_size=2), expected)
+    batched = AttentionMechanisms.padding_mask(Tensor([2, 3]), 5)
+    try:
+        AttentionMechanisms.flash_attention(q, k, v, batched)
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+
+def test_attention_patterns_skip_blocks():
+    """Test sliding-window, dilated and global-token patterns against dense masks."""
+    from thalos_prime.math import AttentionMechanisms, AttentionPattern
+    
+    patterns = (AttentionPattern.sliding_window(3), AttentionPattern.dilated(2, 3),
+                AttentionPattern.block_sparse(2, 2))
+    q, k, v = randn(2, 9, 4), randn(2, 13, 4), randn(2, 13, 3)
+    for pattern in patterns:
+        for causal in (False, True):
+            dense = Tensor(array('B', [pattern.allows(i + 4, j, causal)
+                                       for i in range(9) for j in range(13)]),
+                           Shape((9, 13)), 'bool')
+            assert pattern.to_mask(9, 13, causal).to_dense().tolist() == dense.tolist()
+            expected = AttentionMechanisms.flash_attention(q, k, v, dense)
+            for block in (2, 4):
+                out = AttentionMechanisms.flash_attention(q, k, v, causal=causal,
+                                                          block_size=block, pattern=pattern)
+                assert all(abs(a - b) < 1e-9 for a, b in zip(out.data, expected.data))
+    
+    # Far-away key blocks are never listed
+    window = AttentionPattern.sliding_window(4)
+    layout = window.layout(256, 256, 16, causal=True)
+    assert max(len(blocks) for blocks in layout) == 2
+    assert [j0 for j0, _, _ in AttentionPattern.block_sparse(4, 3).layout(64, 64, 16)[2]] == \
+        [0, 16, 32, 48]
+    assert window.layout(256, 256, 16, causal=True) is layout
+
+
+def test_causal_linear_attention_streaming():
+    """Test causal linear attention against prefix sums and token-by-token steps."""
+    from thalos_prime.math import LinearAttention
+    
+    attn = LinearAttention(4)
+    q, k, v = randn(6, 4), randn(6, 4), randn(6, 3)
+    out = attn(q, k, v, causal=True)
+    fq, fk = attn.feature_map(q).tolist(), attn.feature_map(k).tolist()
+    rows = v.tolist()
+    for i in range(6):
+        weights = [sum(a * b for a, b in zip(fq[i], fk[j])) for j in range(i + 1)]
+        expected = [sum(w * rows[j][c] for j, w in enumerate(weights)) / sum(weights)
+                    for c in range(3)]
+        assert all(abs(a - b) < 1e-9 for a, b in zip(out.tolist()[i], expected))
+    # The last position sees every key, like the non-causal pass does
+    assert all(abs(a - b) < 1e-9 for a, b in zip(out.tolist()[-1], attn(q, k, v).tolist()[-1]))
+    
+    # Prefill a prefix, then stream the rest one token (per head) at a time
+    heads = [randn(2, 6, 4), randn(2, 6, 4), randn(2, 6, 3)]
+    full = attn(*heads, causal=True)
+    prefix, state = attn.prefill(*(t.narrow(1, 0, 2) for t in heads))
+    assert state[0].shape.dims == (2, 4, 3) and state[1].shape.dims == (2, 4)
+    streamed = prefix.tolist()
+    for i in range(2, 6):
+        token, state = attn.step(*(t.narrow(1, i, 1).reshape(2, -1) for t in heads), state)
+        for h in range(2):
+            streamed[h].append(token.tolist()[h])
+    assert all(abs(a - b) < 1e-9 for a, b in
+               zip(Tensor(streamed).data, full.data))
@@ -34,6 +34,11 @@ class Settings:
             'max_epochs': 100,
             'gradient_clip': 1.0,
         },
+        'compute': {
+            'backend': 'python',  # 'python', 'numpy' or 'auto'
+            'pool_enabled': True,
+            'pool_max_bytes': 64 * 1024 * 1024,  # cap on idle pooled buffers
+        },
         'inference': {
             'temperature': 0.7,
             'top_k': 50,
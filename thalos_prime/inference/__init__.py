@@ -4,8 +4,10 @@ Text generation pipeline and inference utilities.
 """
 
 from typing import Optional, List, Dict, Any, Callable
+import heapq
 import math
 import random
+from ..math.tensor import Tensor
 
 
 class TextGenerator:
@@ -21,55 +23,47 @@ class TextGenerator:
         if temperature != 1.0:
             logits = [l / temperature for l in logits]
         
-        # Top-K filtering
-        if top_k > 0:
-            sorted_indices = sorted(range(len(logits)), 
-                                    key=lambda i: logits[i], reverse=True)
-            for i in sorted_indices[top_k:]:
-                logits[i] = -float('inf')
+        scores = Tensor(logits)
+        candidates = list(range(len(logits)))
         
-        # Top-P (nucleus) filtering
-        if top_p < 1.0:
-            sorted_pairs = sorted(enumerate(logits), key=lambda x: x[1], reverse=True)
+        # Top-K filtering: a bounded heap picks the candidates, best first
+        if top_k > 0 or top_p < 1.0:
+            values, indices = scores.topk(top_k if top_k > 0 else len(logits))
+            candidates = [int(i) for i in indices.data]
             
-            # Compute softmax probabilities
-            max_logit = max(l for l in logits if l != -float('inf'))
-            exp_vals = [math.exp(l - max_logit) if l != -float('inf') else 0 
-                        for l in logits]
-            sum_exp = sum(exp_vals)
-            probs = [e / sum_exp for e in exp_vals]
+            # Top-P (nucleus) filtering: keep the smallest prefix whose
+            # probability mass exceeds top_p
+            if top_p < 1.0:
+                max_logit = values.data[0]
+                exp_vals = [math.exp(v - max_logit) for v in values.data]
+                sum_exp = sum(exp_vals)
+                cumsum = 0.0
+                for i, e in enumerate(exp_vals):
+                    cumsum += e / sum_exp
+                    if cumsum > top_p:
+                        candidates = candidates[:i + 1]
+                        break
             
-            cumsum = 0.0
-            for idx, _ in sorted_pairs:
-                cumsum += probs[idx]
-                if cumsum > top_p:
-                    # Mask remaining tokens
-                    break
-            
-            for i, (idx, _) in enumerate(sorted_pairs):
-                if cumsum > top_p and i > 0:
-                    logits[idx] = -float('inf')
+            candidates.sort()
         
         # Convert to probabilities
-        max_logit = max(l for l in logits if l != -float('inf'))
-        exp_vals = [math.exp(l - max_logit) if l != -float('inf') else 0 
-                    for l in logits]
+        max_logit = max(logits[i] for i in candidates)
+        exp_vals = [math.exp(logits[i] - max_logit) for i in candidates]
         sum_exp = sum(exp_vals)
-        probs = [e / sum_exp for e in exp_vals]
         
         # Sample from distribution
         r = random.random()
         cumsum = 0.0
-        for i, p in enumerate(probs):
-            cumsum += p
+        for i, e in zip(candidates, exp_vals):
+            cumsum += e / sum_exp
             if r <= cumsum:
                 return i
         
-        return len(probs) - 1
+        return candidates[-1]
     
     def greedy_decode(self, logits: List[float]) -> int:
         """Greedy decoding - select most likely token."""
-        return max(range(len(logits)), key=lambda i: logits[i])
+        return int(Tensor(logits).argmax().item())
     
     def beam_search(self, logits_fn: Callable[[List[int]], List[float]],
                     input_ids: List[int], beam_width: int = 5,
@@ -85,22 +79,20 @@ class TextGenerator:
                 logits = logits_fn(seq)
                 
                 # Get top-k tokens
-                top_indices = sorted(range(len(logits)), 
-                                     key=lambda i: logits[i], reverse=True)[:beam_width]
+                _, top_indices = Tensor(logits).topk(beam_width)
+                max_l = max(logits)
+                log_sum_exp = max_l + math.log(sum(math.exp(l - max_l) for l in logits))
                 
-                for idx in top_indices:
+                for idx in (int(i) for i in top_indices.data):
                     new_seq = seq + [idx]
                     # Compute log probability
-                    max_l = max(logits)
-                    log_sum_exp = max_l + math.log(sum(math.exp(l - max_l) for l in logits))
                     token_log_prob = logits[idx] - log_sum_exp
                     new_log_prob = log_prob + token_log_prob
                     
                     new_beams.append((new_seq, new_log_prob))
             
             # Keep top beams
-            new_beams.sort(key=lambda x: x[1], reverse=True)
-            beams = new_beams[:beam_width]
+            beams = heapq.nlargest(beam_width, new_beams, key=lambda x: x[1])
             
             # Check for end token
             if all(seq[-1] == 3 for seq, _ in beams):  # 3 = <EOS>
@@ -133,13 +125,20 @@ class InferencePipeline:
         # Generate tokens
         generated_ids = input_ids.copy()
         
+        # Models with a KV cache take the prompt once, then one token per step
+        cache = self.model.new_cache(len(input_ids) + max_length) \
+            if hasattr(self.model, 'new_cache') else None
+        pending = generated_ids
+        
         for _ in range(max_length):
             # Get model output
-            from ..math.tensor import Tensor
-            logits = self.model.forward(Tensor([float(x) for x in generated_ids]))
+            if cache is not None:
+                logits = self.model.forward_incremental(Tensor(pending, dtype='int64'), cache)
+            else:
+                logits = self.model.forward(Tensor(pending, dtype='int64'))
             
             # Get logits for last position
-            last_pos = len(generated_ids) - 1
+            last_pos = len(pending) - 1
             vocab_size = self.model.vocab_size
             last_logits = logits.data[last_pos * vocab_size:(last_pos + 1) * vocab_size]
             
@@ -149,6 +148,7 @@ class InferencePipeline:
             )
             
             generated_ids.append(next_token)
+            pending = generated_ids if cache is None else [next_token]
             
             if next_token == 3:  # <EOS>
                 break
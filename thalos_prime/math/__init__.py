@@ -7,16 +7,40 @@ from .tensor import (
     Shape,
     Tensor,
     randn,
+    rand,
+    meta,
     zeros,
+    empty,
     ones,
     eye,
     arange,
     linspace,
     cat,
-    stack
+    stack,
+    split,
+    chunk,
+    matmul,
+    bmm
 )
 
-from .linear_algebra import LinearAlgebra
+from .backend import (
+    PythonBackend,
+    NumPyBackend,
+    get_backend,
+    set_backend,
+    use_backend,
+    available_backends
+)
+
+from .memory import BufferPool, get_pool
+
+from .lazy import LazyTensor
+
+from .sparse import SparseTensor
+
+from .einsum import einsum, tensordot, contraction_path
+
+from .linear_algebra import LinearAlgebra, LUFactorization
 
 from .activations import (
     Activations,
@@ -34,6 +58,7 @@ from .distributions import (
 
 from .attention import (
     AttentionMechanisms,
+    AttentionPattern,
     MultiHeadAttention,
     CrossAttention,
     LinearAttention,
@@ -45,15 +70,38 @@ __all__ = [
     'Shape',
     'Tensor',
     'randn',
+    'rand',
+    'meta',
     'zeros',
+    'empty',
     'ones',
     'eye',
     'arange',
     'linspace',
     'cat',
     'stack',
+    'split',
+    'chunk',
+    'matmul',
+    'bmm',
+    'LazyTensor',
+    'SparseTensor',
+    'einsum',
+    'tensordot',
+    'contraction_path',
+    # Compute backends
+    'PythonBackend',
+    'NumPyBackend',
+    'get_backend',
+    'set_backend',
+    'use_backend',
+    'available_backends',
+    # Memory pool
+    'BufferPool',
+    'get_pool',
     # Linear algebra
     'LinearAlgebra',
+    'LUFactorization',
     # Activations and normalizations
     'Activations',
     'LayerNorm',
@@ -66,6 +114,7 @@ __all__ = [
     'ProbabilityFunctions',
     # Attention
     'AttentionMechanisms',
+    'AttentionPattern',
     'MultiHeadAttention',
     'CrossAttention',
     'LinearAttention',
@@ -5,7 +5,8 @@ Neural network activation functions and normalizations.
 
 from typing import Optional
 import math
-from .tensor import Tensor, Shape
+from .tensor import Tensor, Shape, _FLOAT_DTYPES
+from .backend import get_backend
 
 
 class Activations:
@@ -14,7 +15,7 @@ class Activations:
     @staticmethod
     def relu(x: Tensor) -> Tensor:
         """Rectified Linear Unit."""
-        return Tensor([max(0, val) for val in x.data], x.shape)
+        return x._unary_op('relu')
     
     @staticmethod
     def relu_derivative(x: Tensor) -> Tensor:
@@ -34,13 +35,7 @@ class Activations:
     @staticmethod
     def sigmoid(x: Tensor) -> Tensor:
         """Sigmoid activation."""
-        def safe_sigmoid(val):
-            if val >= 0:
-                return 1.0 / (1.0 + math.exp(-val))
-            else:
-                exp_val = math.exp(val)
-                return exp_val / (1.0 + exp_val)
-        return Tensor([safe_sigmoid(val) for val in x.data], x.shape)
+        return x._unary_op('sigmoid')
     
     @staticmethod
     def sigmoid_derivative(x: Tensor) -> Tensor:
@@ -51,7 +46,7 @@ class Activations:
     @staticmethod
     def tanh(x: Tensor) -> Tensor:
         """Hyperbolic tangent."""
-        return Tensor([math.tanh(val) for val in x.data], x.shape)
+        return x._unary_op('tanh')
     
     @staticmethod
     def tanh_derivative(x: Tensor) -> Tensor:
@@ -62,20 +57,14 @@ class Activations:
     @staticmethod
     def gelu(x: Tensor) -> Tensor:
         """Gaussian Error Linear Unit."""
-        def gelu_val(val):
-            return 0.5 * val * (1 + math.tanh(math.sqrt(2 / math.pi) * (val + 0.044715 * val ** 3)))
-        return Tensor([gelu_val(val) for val in x.data], x.shape)
+        return x._unary_op('gelu')
     
     @staticmethod
     def swish(x: Tensor, beta: float = 1.0) -> Tensor:
-        """Swish activation: x * sigmoid(beta * x)."""
-        def safe_sigmoid(val):
-            if val >= 0:
-                return 1.0 / (1.0 + math.exp(-val))
-            else:
-                exp_val = math.exp(val)
-                return exp_val / (1.0 + exp_val)
-        return Tensor([val * safe_sigmoid(beta * val) for val in x.data], x.shape)
+        """Swish activation: x * sigmoid(beta * x), in one pass."""
+        if beta == 1.0:
+            return x._unary_op('swish')
+        return (x.lazy() * (x.lazy() * beta).sigmoid()).materialize()
     
     @staticmethod
     def elu(x: Tensor, alpha: float = 1.0) -> Tensor:
@@ -107,38 +96,20 @@ class Activations:
     @staticmethod
     def softmax(x: Tensor, dim: int = -1) -> Tensor:
         """Softmax activation along dimension."""
-        if x.shape.ndim == 1:
-            max_val = max(x.data)
-            exp_vals = [math.exp(val - max_val) for val in x.data]
-            sum_exp = sum(exp_vals)
-            return Tensor([val / sum_exp for val in exp_vals], x.shape)
+        ndim = x.shape.ndim
+        if dim < 0:
+            dim += ndim
+        if x.dtype not in _FLOAT_DTYPES:
+            x = x.astype('float64')
         
-        elif x.shape.ndim == 2:
-            if dim == -1 or dim == 1:
-                # Softmax along last dimension (rows)
-                rows, cols = x.shape.dims
-                result = []
-                for i in range(rows):
-                    row = [x.data[i * cols + j] for j in range(cols)]
-                    max_val = max(row)
-                    exp_vals = [math.exp(val - max_val) for val in row]
-                    sum_exp = sum(exp_vals)
-                    result.extend([val / sum_exp for val in exp_vals])
-                return Tensor(result, x.shape)
-            else:
-                # Softmax along first dimension (columns)
-                rows, cols = x.shape.dims
-                result = [0.0] * (rows * cols)
-                for j in range(cols):
-                    col = [x.data[i * cols + j] for i in range(rows)]
-                    max_val = max(col)
-                    exp_vals = [math.exp(val - max_val) for val in col]
-                    sum_exp = sum(exp_vals)
-                    for i in range(rows):
-                        result[i * cols + j] = exp_vals[i] / sum_exp
-                return Tensor(result, x.shape)
+        if dim == ndim - 1:
+            # Softmax along last dimension (rows)
+            return Tensor(get_backend().softmax(x.data, x.shape.dims[-1]), x.shape)
+        elif ndim == 2:
+            # Softmax along first dimension (columns) via a transposed view
+            return Activations.softmax(x.T, dim=-1).T.contiguous()
         else:
-            raise ValueError("Softmax currently supports 1D and 2D tensors")
+            raise ValueError("Softmax supports the last dimension, or either dimension of 2D tensors")
     
     @staticmethod
     def log_softmax(x: Tensor, dim: int = -1) -> Tensor:
@@ -149,9 +120,10 @@ class Activations:
             return Tensor([val - log_sum_exp for val in x.data], x.shape)
         elif x.shape.ndim == 2:
             rows, cols = x.shape.dims
+            data = x._buffer()
             result = []
             for i in range(rows):
-                row = [x.data[i * cols + j] for j in range(cols)]
+                row = data[i * cols:(i + 1) * cols].tolist()
                 max_val = max(row)
                 log_sum_exp = max_val + math.log(sum(math.exp(val - max_val) for val in row))
                 result.extend([val - log_sum_exp for val in row])
@@ -171,26 +143,11 @@ class LayerNorm:
     
     def forward(self, x: Tensor) -> Tensor:
         """Apply layer normalization."""
-        if x.shape.ndim == 1:
-            mean = sum(x.data) / len(x.data)
-            var = sum((val - mean) ** 2 for val in x.data) / len(x.data)
-            std = math.sqrt(var + self.eps)
-            normalized = [(val - mean) / std for val in x.data]
-            return Tensor([n * g + b for n, g, b in zip(normalized, self.gamma.data, self.beta.data)],
-                         x.shape)
-        elif x.shape.ndim == 2:
-            rows, cols = x.shape.dims
-            result = []
-            for i in range(rows):
-                row = [x.data[i * cols + j] for j in range(cols)]
-                mean = sum(row) / len(row)
-                var = sum((val - mean) ** 2 for val in row) / len(row)
-                std = math.sqrt(var + self.eps)
-                normalized = [(val - mean) / std for val in row]
-                result.extend([n * g + b for n, g, b in zip(normalized, self.gamma.data, self.beta.data)])
-            return Tensor(result, x.shape)
-        else:
+        if x.shape.ndim not in (1, 2):
             raise ValueError("LayerNorm currently supports 1D and 2D tensors")
+        data = get_backend().layer_norm(x.data, x.shape.dims[-1], self.gamma.data,
+                                        self.beta.data, self.eps)
+        return Tensor(data, x.shape)
     
     def __call__(self, x: Tensor) -> Tensor:
         return self.forward(x)
@@ -214,36 +171,21 @@ class BatchNorm:
         if x.shape.ndim != 2:
             raise ValueError("BatchNorm expects 2D input (batch, features)")
         
-        batch_size, features = x.shape.dims
-        
         if self.training:
             # Compute batch statistics
-            means = []
-            vars_ = []
-            for j in range(features):
-                col = [x.data[i * features + j] for i in range(batch_size)]
-                mean = sum(col) / len(col)
-                var = sum((val - mean) ** 2 for val in col) / len(col)
-                means.append(mean)
-                vars_.append(var)
+            mean = x.mean(dim=0)
+            var = ((x.lazy() - mean) ** 2).materialize().mean(dim=0)
             
             # Update running statistics
-            for j in range(features):
-                self.running_mean.data[j] = (1 - self.momentum) * self.running_mean.data[j] + self.momentum * means[j]
-                self.running_var.data[j] = (1 - self.momentum) * self.running_var.data[j] + self.momentum * vars_[j]
+            self.running_mean.mul_(1 - self.momentum).add_(mean * self.momentum)
+            self.running_var.mul_(1 - self.momentum).add_(var * self.momentum)
         else:
-            means = self.running_mean.data
-            vars_ = self.running_var.data
-        
-        # Normalize
-        result = []
-        for i in range(batch_size):
-            for j in range(features):
-                val = x.data[i * features + j]
-                normalized = (val - means[j]) / math.sqrt(vars_[j] + self.eps)
-                result.append(normalized * self.gamma.data[j] + self.beta.data[j])
+            mean = self.running_mean
+            var = self.running_var
         
-        return Tensor(result, x.shape)
+        # Normalize and scale in one fused pass
+        std = (var.lazy() + self.eps).sqrt().materialize()
+        return ((x.lazy() - mean) / std * self.gamma + self.beta).materialize()
     
     def __call__(self, x: Tensor) -> Tensor:
         return self.forward(x)
@@ -267,19 +209,10 @@ class RMSNorm:
     
     def forward(self, x: Tensor) -> Tensor:
         """Apply RMS normalization."""
-        if x.shape.ndim == 1:
-            rms = math.sqrt(sum(val ** 2 for val in x.data) / len(x.data) + self.eps)
-            return Tensor([val / rms * w for val, w in zip(x.data, self.weight.data)], x.shape)
-        elif x.shape.ndim == 2:
-            rows, cols = x.shape.dims
-            result = []
-            for i in range(rows):
-                row = [x.data[i * cols + j] for j in range(cols)]
-                rms = math.sqrt(sum(val ** 2 for val in row) / len(row) + self.eps)
-                result.extend([val / rms * w for val, w in zip(row, self.weight.data)])
-            return Tensor(result, x.shape)
-        else:
+        if x.shape.ndim not in (1, 2):
             raise ValueError("RMSNorm currently supports 1D and 2D tensors")
+        data = get_backend().rms_norm(x.data, x.shape.dims[-1], self.weight.data, self.eps)
+        return Tensor(data, x.shape)
     
     def __call__(self, x: Tensor) -> Tensor:
         return self.forward(x)
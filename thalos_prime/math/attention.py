@@ -3,11 +3,138 @@ THALOS Prime - Attention Mechanisms Module
 Scaled dot-product attention and multi-head attention.
 """
 
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
+from array import array
 import math
-from .tensor import Tensor, Shape, zeros
+import random
+from .tensor import Tensor, Shape, zeros, matmul, normal_buffer
+from .sparse import SparseTensor
+from .einsum import einsum
 from .linear_algebra import LinearAlgebra
 from .activations import Activations
+from .backend import get_backend, ATTENTION_BLOCK, BlockLayout
+
+
+# Block layouts kept per AttentionPattern, oldest evicted first
+LAYOUT_CACHE_SIZE = 64
+
+
+class AttentionPattern:
+    """
+    Structured sparsity for long-context attention.
+    
+    Query position p (the last query sits at position seq_k - 1) sees key
+    j when j is a local neighbour, p - j = t * dilation for some
+    0 <= t <= window (|p - j| without causality), or when either
+    position is one of the first `num_global` global tokens. window=None
+    puts no limit on the distance. ``layout`` turns the pattern into the
+    key blocks each query tile must visit, so the attention kernels
+    never score blocks the pattern excludes.
+    """
+    
+    def __init__(self, window: Optional[int] = None, dilation: int = 1, num_global: int = 0):
+        if window is not None and window < 0:
+            raise ValueError(f"window must be non-negative, got {window}")
+        if dilation < 1 or num_global < 0:
+            raise ValueError("dilation must be positive and num_global non-negative")
+        self.window = window
+        self.dilation = dilation
+        self.num_global = num_global
+        self._layouts: Dict[Tuple[int, int, int, bool], BlockLayout] = {}
+    
+    @classmethod
+    def sliding_window(cls, window: int) -> 'AttentionPattern':
+        """Each query sees the `window` keys before it (and after it, unless causal)."""
+        return cls(window)
+    
+    @classmethod
+    def dilated(cls, window: int, dilation: int) -> 'AttentionPattern':
+        """Like sliding_window, but only every `dilation`-th key, spanning window * dilation."""
+        return cls(window, dilation)
+    
+    @classmethod
+    def block_sparse(cls, window: int, num_global: int) -> 'AttentionPattern':
+        """Sliding window plus `num_global` leading tokens that see and are seen by all."""
+        return cls(window, num_global=num_global)
+    
+    def __repr__(self) -> str:
+        return (f"AttentionPattern(window={self.window}, dilation={self.dilation}, "
+                f"num_global={self.num_global})")
+    
+    def allows(self, pos: int, j: int, causal: bool = False) -> bool:
+        """Whether the query at position `pos` may attend to key `j`."""
+        if causal and j > pos:
+            return False
+        if pos < self.num_global or j < self.num_global:
+            return True
+        distance = abs(pos - j)
+        if distance % self.dilation:
+            return False
+        return self.window is None or distance <= self.window * self.dilation
+    
+    def _key_range(self, p0: int, p1: int, n: int, causal: bool) -> Tuple[int, int]:
+        """Keys [lo, hi) that local attention from positions p0..p1 can reach."""
+        hi = p1 + 1 if causal else n
+        if self.window is None:
+            return 0, min(hi, n)
+        span = self.window * self.dilation
+        if not causal:
+            hi = p1 + span + 1
+        return max(p0 - span, 0), min(hi, n)
+    
+    def layout(self, m: int, n: int, block: int = ATTENTION_BLOCK,
+               causal: bool = False) -> BlockLayout:
+        """
+        Key blocks each query tile of `block` rows visits (seq_q m, seq_k n).
+        
+        A block fully inside the pattern carries no tile mask; a partly
+        visible one carries a bool mask of its visible entries. The latest
+        LAYOUT_CACHE_SIZE layouts are cached per (m, n, block, causal), so
+        every layer and head reuses them.
+        """
+        cache_key = (m, n, block, causal)
+        cached = self._layouts.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        shift = n - m
+        layout: BlockLayout = []
+        for i0 in range(0, m, block):
+            i1 = min(i0 + block, m)
+            p0, p1 = i0 + shift, i1 - 1 + shift
+            lo, hi = self._key_range(p0, p1, n, causal)
+            if p0 < self.num_global:
+                # Global queries reach every key up to the causal limit
+                lo, hi = 0, min(p1 + 1, n) if causal else n
+            starts = set(range(lo - lo % block, hi, block))
+            starts.update(range(0, min(self.num_global, hi if causal else n), block))
+            
+            blocks = []
+            for j0 in sorted(starts):
+                j1 = min(j0 + block, n)
+                tile_mask = array('B', [self.allows(p, j, causal)
+                                        for p in range(p0, p1 + 1) for j in range(j0, j1)])
+                if all(tile_mask):
+                    blocks.append((j0, j1, None))
+                elif any(tile_mask):
+                    blocks.append((j0, j1, tile_mask))
+            layout.append(blocks)
+        
+        if len(self._layouts) >= LAYOUT_CACHE_SIZE:
+            # Incremental decoding asks for a new (1, n) shape every step
+            del self._layouts[next(iter(self._layouts))]
+        self._layouts[cache_key] = layout
+        return layout
+    
+    def to_mask(self, m: int, n: int, causal: bool = False) -> SparseTensor:
+        """The pattern as a sparse (m, n) mask, for paths that materialize the scores."""
+        shift = n - m
+        rows: List[List[int]] = []
+        for i0, tile in zip(range(0, m, ATTENTION_BLOCK), self.layout(m, n, causal=causal)):
+            for i in range(i0, min(i0 + ATTENTION_BLOCK, m)):
+                rows.append([j for j0, j1, _ in tile for j in range(j0, j1)
+                             if self.allows(i + shift, j, causal)])
+        return SparseTensor.from_rows(rows, n)
 
 
 class AttentionMechanisms:
@@ -18,7 +145,7 @@ class AttentionMechanisms:
         query: Tensor,
         key: Tensor,
         value: Tensor,
-        mask: Optional[Tensor] = None,
+        mask: Optional[Union[Tensor, SparseTensor]] = None,
         dropout_p: float = 0.0
     ) -> Tuple[Tensor, Tensor]:
         """
@@ -28,85 +155,141 @@ class AttentionMechanisms:
             query: [batch, seq_q, d_k] or [seq_q, d_k]
             key: [batch, seq_k, d_k] or [seq_k, d_k]
             value: [batch, seq_k, d_v] or [seq_k, d_v]
-            mask: Optional attention mask
+            mask: Optional attention mask, dense or sparse (zero/unstored = masked)
             dropout_p: Dropout probability
         
         Returns:
             output: Attention output
             attention_weights: Attention weights
         """
-        # Get dimensions
-        if query.shape.ndim == 2:
-            seq_q, d_k = query.shape.dims
-            seq_k = key.shape.dims[0]
-            d_v = value.shape.dims[1]
-        else:
-            seq_q, d_k = query.shape.dims[-2], query.shape.dims[-1]
-            seq_k = key.shape.dims[-2]
-            d_v = value.shape.dims[-1]
-        
+        d_k = query.shape.dims[-1]
         scale = 1.0 / math.sqrt(d_k)
         
-        # Compute Q @ K^T
-        key_t = key.T
-        scores_data = []
-        for i in range(seq_q):
-            for j in range(seq_k):
-                score = 0.0
-                for k in range(d_k):
-                    score += query.data[i * d_k + k] * key.data[j * d_k + k]
-                scores_data.append(score * scale)
-        
-        scores = Tensor(scores_data, Shape((seq_q, seq_k)))
+        # Compute Q @ K^T; leading batch/head dimensions broadcast
+        scores = matmul(query, key.transpose(-1, -2)) * scale
         
         # Apply mask
-        if mask is not None:
-            for i in range(len(scores.data)):
-                if mask.data[i % len(mask.data)] == 0:
-                    scores.data[i] = -1e9
+        if isinstance(mask, SparseTensor):
+            scores = mask.apply_mask(scores, -1e9)
+        elif mask is not None:
+            scores = scores.masked_fill(mask.eq(0), -1e9)
         
         # Softmax
         attention_weights = Activations.softmax(scores, dim=-1)
         
         # Apply dropout (simplified - skip in inference)
         if dropout_p > 0:
-            import random
             for i in range(len(attention_weights.data)):
                 if random.random() < dropout_p:
                     attention_weights.data[i] = 0.0
         
         # Compute attention @ value
-        output_data = []
-        for i in range(seq_q):
-            for k in range(d_v):
-                val = 0.0
-                for j in range(seq_k):
-                    val += attention_weights.data[i * seq_k + j] * value.data[j * d_v + k]
-                output_data.append(val)
-        
-        output = Tensor(output_data, Shape((seq_q, d_v)))
+        output = matmul(attention_weights, value)
         
         return output, attention_weights
     
+    @staticmethod
+    def flash_attention(
+        query: Tensor,
+        key: Tensor,
+        value: Tensor,
+        mask: Optional[Union[Tensor, SparseTensor]] = None,
+        causal: bool = False,
+        block_size: int = ATTENTION_BLOCK,
+        pattern: Optional[AttentionPattern] = None
+    ) -> Tensor:
+        """
+        Tiled scaled dot-product attention with an online softmax.
+        
+        Computes the same output as scaled_dot_product_attention (without
+        returning weights), but streams keys in blocks of `block_size`
+        while keeping a running max and sum per query. The seq_q x seq_k
+        score matrix is never built, so extra memory is O(block_size) per
+        query rather than O(seq_k). Key blocks that are fully masked, or
+        past the diagonal when `causal`, are skipped, as are blocks an
+        AttentionPattern `pattern` excludes. Queries that can see no key
+        produce zeros.
+        
+        Args:
+            query: [..., seq_q, d_k]
+            key: [..., seq_k, d_k]
+            value: [..., seq_k, d_v]
+            mask: Optional mask broadcastable to [seq_q, seq_k], shared by the leading dimensions
+            causal: Query i sees keys up to i + seq_k - seq_q
+            block_size: Query tile and key block length
+            pattern: Optional sliding-window/dilated/global-token sparsity
+        
+        Returns:
+            output: [..., seq_q, d_v]
+        """
+        lead = query.shape.dims[:-2]
+        m, d = query.shape.dims[-2:]
+        n, dv = value.shape.dims[-2:]
+        if key.shape.dims[-2:] != (n, d):
+            raise ValueError(f"Key shape {key.shape} does not match query {query.shape} "
+                             f"and value {value.shape}")
+        dtype = query.dtype
+        key = key.expand(lead + (n, d))
+        value = value.expand(lead + (n, dv))
+        if key.dtype != dtype:
+            key = key.astype(dtype)
+        if value.dtype != dtype:
+            value = value.astype(dtype)
+        
+        mask_data = None
+        if mask is not None:
+            if isinstance(mask, SparseTensor):
+                mask = mask.to_dense()
+            # Broadcast like masked_fill; the kernel takes one mask shared by `lead`
+            if any(x != 1 for x in mask.shape.dims[:-2]):
+                raise ValueError(f"Mask of shape {mask.shape} does not broadcast to ({m}, {n})")
+            if mask.shape.ndim > 2:
+                mask = mask.reshape(mask.shape.dims[-2:])
+            try:
+                mask = mask.expand((m, n))
+            except ValueError:
+                raise ValueError(f"Mask of shape {mask.shape} does not broadcast to ({m}, {n})")
+            mask_data = (mask if mask.dtype == 'bool' else mask.ne(0))._buffer()
+        layout = None if pattern is None else pattern.layout(m, n, block_size, causal)
+        
+        data = get_backend().attention(query._buffer(), key._buffer(), value._buffer(),
+                                       Shape(lead).numel, m, n, d, dv, 1.0 / math.sqrt(d),
+                                       mask_data, causal, block_size, layout)
+        return Tensor(data, Shape(lead + (m, dv)), dtype)
+    
     @staticmethod
     def causal_mask(size: int) -> Tensor:
-        """Create causal (lower triangular) mask."""
-        data = []
+        """Create causal (lower triangular) bool mask."""
+        data = array('B')
         for i in range(size):
-            for j in range(size):
-                data.append(1.0 if j <= i else 0.0)
-        return Tensor(data, Shape((size, size)))
+            data += array('B', (1,)) * (i + 1) + array('B', (0,)) * (size - i - 1)
+        return Tensor(data, Shape((size, size)), 'bool')
     
     @staticmethod
-    def padding_mask(lengths: Tensor, max_len: int) -> Tensor:
-        """Create padding mask from sequence lengths."""
+    def padding_mask(lengths: Tensor, max_len: int,
+                     sparse: bool = False) -> Union[Tensor, SparseTensor]:
+        """Create padding mask from sequence lengths (CSR with O(sum of lengths) entries if sparse)."""
         batch_size = len(lengths.data)
-        data = []
-        for b in range(batch_size):
-            seq_len = int(lengths.data[b])
-            for i in range(max_len):
-                data.append(1.0 if i < seq_len else 0.0)
-        return Tensor(data, Shape((batch_size, max_len)))
+        seq_lens = [min(max(int(length), 0), max_len) for length in lengths._buffer()]
+        if sparse:
+            return SparseTensor.from_rows([range(n) for n in seq_lens], max_len)
+        data = array('B')
+        for seq_len in seq_lens:
+            data += array('B', (1,)) * seq_len + array('B', (0,)) * (max_len - seq_len)
+        return Tensor(data, Shape((batch_size, max_len)), 'bool')
+    
+    @staticmethod
+    def sliding_window_mask(size: int, window: int, causal: bool = True) -> SparseTensor:
+        """
+        Sparse mask letting each query see keys within `window` positions.
+        
+        Stores O(size * window) entries instead of the size**2 of a dense mask.
+        """
+        rows = []
+        for i in range(size):
+            end = i + 1 if causal else min(size, i + window + 1)
+            rows.append(range(max(0, i - window), end))
+        return SparseTensor.from_rows(rows, size)
     
     @staticmethod
     def relative_position_bias(seq_len: int, num_heads: int = 8, 
@@ -126,17 +309,18 @@ class AttentionMechanisms:
 class MultiHeadAttention:
     """Multi-head attention mechanism."""
     
-    def __init__(self, d_model: int, num_heads: int, dropout: float = 0.0):
+    def __init__(self, d_model: int, num_heads: int, dropout: float = 0.0,
+                 generator: Optional[random.Random] = None):
         self.d_model = d_model
         self.num_heads = num_heads
         self.d_k = d_model // num_heads
         self.dropout = dropout
         
         # Initialize projection weights
-        self.w_q = self._init_weights(d_model, d_model)
-        self.w_k = self._init_weights(d_model, d_model)
-        self.w_v = self._init_weights(d_model, d_model)
-        self.w_o = self._init_weights(d_model, d_model)
+        self.w_q = self._init_weights(d_model, d_model, generator)
+        self.w_k = self._init_weights(d_model, d_model, generator)
+        self.w_v = self._init_weights(d_model, d_model, generator)
+        self.w_o = self._init_weights(d_model, d_model, generator)
         
         # Biases
         self.b_q = zeros(d_model)
@@ -144,16 +328,12 @@ class MultiHeadAttention:
         self.b_v = zeros(d_model)
         self.b_o = zeros(d_model)
     
-    def _init_weights(self, in_features: int, out_features: int) -> Tensor:
+    def _init_weights(self, in_features: int, out_features: int,
+                      generator: Optional[random.Random] = None) -> Tensor:
         """Initialize weights with Xavier initialization."""
         std = math.sqrt(2.0 / (in_features + out_features))
-        data = []
-        for _ in range(in_features * out_features):
-            u1 = max(1e-10, __import__('random').random())
-            u2 = __import__('random').random()
-            z = math.sqrt(-2 * math.log(u1)) * math.cos(2 * math.pi * u2)
-            data.append(std * z)
-        return Tensor(data, Shape((in_features, out_features)))
+        return Tensor(normal_buffer(in_features * out_features, 0.0, std, generator),
+                      Shape((in_features, out_features)))
     
     def forward(self, query: Tensor, key: Tensor, value: Tensor,
                 mask: Optional[Tensor] = None) -> Tensor:
@@ -169,33 +349,25 @@ class MultiHeadAttention:
         Returns:
             output: [seq_q, d_model]
         """
-        seq_q = query.shape.dims[0]
-        seq_k = key.shape.dims[0]
-        
         # Project to Q, K, V
         q = self._linear(query, self.w_q, self.b_q)
         k = self._linear(key, self.w_k, self.b_k)
         v = self._linear(value, self.w_v, self.b_v)
         
-        # Split into heads and compute attention
-        head_outputs = []
-        for h in range(self.num_heads):
-            start = h * self.d_k
-            end = start + self.d_k
-            
-            # Extract head slice
-            q_h = self._slice_head(q, start, end)
-            k_h = self._slice_head(k, start, end)
-            v_h = self._slice_head(v, start, end)
-            
-            # Compute attention for this head
+        # Compute attention for all heads in one batched call; without dropout
+        # the tiled kernel avoids building the attention weights
+        if self.dropout > 0:
             attn_out, _ = AttentionMechanisms.scaled_dot_product_attention(
-                q_h, k_h, v_h, mask, self.dropout
+                self._split_heads(q), self._split_heads(k), self._split_heads(v),
+                mask, self.dropout
+            )
+        else:
+            attn_out = AttentionMechanisms.flash_attention(
+                self._split_heads(q), self._split_heads(k), self._split_heads(v), mask
             )
-            head_outputs.append(attn_out)
         
         # Concatenate heads
-        concat = self._concat_heads(head_outputs)
+        concat = self._merge_heads(attn_out)
         
         # Final projection
         output = self._linear(concat, self.w_o, self.b_o)
@@ -204,45 +376,17 @@ class MultiHeadAttention:
     
     def _linear(self, x: Tensor, w: Tensor, b: Tensor) -> Tensor:
         """Linear transformation: x @ w + b."""
-        seq_len = x.shape.dims[0]
-        in_features = x.shape.dims[1]
-        out_features = w.shape.dims[1]
-        
-        result = []
-        for i in range(seq_len):
-            for j in range(out_features):
-                val = b.data[j]
-                for k in range(in_features):
-                    val += x.data[i * in_features + k] * w.data[k * out_features + j]
-                result.append(val)
-        
-        return Tensor(result, Shape((seq_len, out_features)))
+        return matmul(x, w) + b
     
-    def _slice_head(self, x: Tensor, start: int, end: int) -> Tensor:
-        """Extract a slice for one attention head."""
+    def _split_heads(self, x: Tensor) -> Tensor:
+        """View [seq, d_model] as [num_heads, seq, d_k]."""
         seq_len = x.shape.dims[0]
-        d_k = end - start
-        
-        result = []
-        for i in range(seq_len):
-            for j in range(start, end):
-                result.append(x.data[i * x.shape.dims[1] + j])
-        
-        return Tensor(result, Shape((seq_len, d_k)))
+        return x.reshape(seq_len, self.num_heads, self.d_k).transpose(0, 1)
     
-    def _concat_heads(self, heads: list) -> Tensor:
-        """Concatenate attention head outputs."""
-        seq_len = heads[0].shape.dims[0]
-        d_k = heads[0].shape.dims[1]
-        d_model = d_k * len(heads)
-        
-        result = []
-        for i in range(seq_len):
-            for h, head in enumerate(heads):
-                for j in range(d_k):
-                    result.append(head.data[i * d_k + j])
-        
-        return Tensor(result, Shape((seq_len, d_model)))
+    def _merge_heads(self, x: Tensor) -> Tensor:
+        """Concatenate [num_heads, seq, d_k] head outputs into [seq, d_model]."""
+        seq_len = x.shape.dims[1]
+        return x.transpose(0, 1).reshape(seq_len, self.num_heads * self.d_k)
     
     def __call__(self, query: Tensor, key: Tensor, value: Tensor,
                  mask: Optional[Tensor] = None) -> Tensor:
@@ -259,7 +403,15 @@ class CrossAttention(MultiHeadAttention):
 
 
 class LinearAttention:
-    """Linear attention approximation for efficiency."""
+    """
+    Linear attention approximation for efficiency.
+    
+    softmax(q . k) is replaced by phi(q) . phi(k), so attention factors
+    through sum_s phi(k_s) v_s^T and sum_s phi(k_s). In causal mode these
+    are prefix sums, carried as a recurrent state (kv, z) with kv of shape
+    (..., d_k, d_v) and z of shape (..., d_k). ``step`` feeds one token
+    at a time in O(d_k * d_v), independent of the context length.
+    """
     
     def __init__(self, d_model: int, eps: float = 1e-6):
         self.d_model = d_model
@@ -271,42 +423,73 @@ class LinearAttention:
         data = [max(0, v) + 1.0 for v in x.data]
         return Tensor(data, x.shape)
     
-    def forward(self, query: Tensor, key: Tensor, value: Tensor) -> Tensor:
-        """Linear attention forward pass."""
+    def forward(self, query: Tensor, key: Tensor, value: Tensor,
+                causal: bool = False) -> Tensor:
+        """Linear attention forward pass (`causal`: position i sees keys up to i)."""
+        if causal:
+            return self.prefill(query, key, value)[0]
+        
         # Apply feature map
         q = self.feature_map(query)
         k = self.feature_map(key)
         
-        seq_q, d_k = q.shape.dims
-        seq_k = k.shape.dims[0]
-        d_v = value.shape.dims[1]
+        # Compute K^T @ V, then Q @ (K^T @ V)
+        kv = einsum('sd,sv->dv', k, value)
+        output = einsum('qd,dv->qv', q, kv)
         
-        # Compute K^T @ V
-        kv = zeros(d_k, d_v)
-        for i in range(seq_k):
-            for j in range(d_k):
-                for l in range(d_v):
-                    kv.data[j * d_v + l] += k.data[i * d_k + j] * value.data[i * d_v + l]
+        # Normalizer q_i . sum_s k_s (the keys are summed before the product)
+        normalizer = einsum('qd,sd->q', q, k)
+        normalizer = Tensor([max(n, self.eps) for n in normalizer.data])
+        return output / normalizer.reshape(-1, 1)
+    
+    def prefill(self, query: Tensor, key: Tensor, value: Tensor,
+                state: Optional[Tuple[Tensor, Tensor]] = None
+                ) -> Tuple[Tensor, Tuple[Tensor, Tensor]]:
+        """
+        Causal attention over a (..., seq, d) chunk, continuing from `state`.
         
-        # Compute Q @ (K^T @ V)
-        output_data = []
-        for i in range(seq_q):
-            normalizer = 0.0
-            for j in range(d_k):
-                for l in range(seq_k):
-                    normalizer += q.data[i * d_k + j] * k.data[l * d_k + j]
-            normalizer = max(normalizer, self.eps)
-            
-            for l in range(d_v):
-                val = 0.0
-                for j in range(d_k):
-                    val += q.data[i * d_k + j] * kv.data[j * d_v + l]
-                output_data.append(val / normalizer)
+        Returns the (..., seq, d_v) output and the state after the chunk,
+        ready for further ``prefill`` or ``step`` calls.
+        """
+        lead = query.shape.dims[:-2]
+        n, d = query.shape.dims[-2:]
+        dv = value.shape.dims[-1]
+        if key.shape.dims != query.shape.dims or value.shape.dims != lead + (n, dv):
+            raise ValueError(f"Causal linear attention needs matching query {query.shape}, "
+                             f"key {key.shape} and value {value.shape}")
+        kv = z = None
+        if state is not None:
+            kv, z = state
+            if kv.shape.dims != lead + (d, dv) or z.shape.dims != lead + (d,):
+                raise ValueError(f"State {kv.shape}, {z.shape} does not match {query.shape}")
+            kv, z = kv._buffer(), z._buffer()
         
-        return Tensor(output_data, Shape((seq_q, d_v)))
+        q = self.feature_map(query)
+        k = self.feature_map(key)
+        if value.dtype != q.dtype:
+            value = value.astype(q.dtype)
+        out, kv, z = get_backend().linear_attention(q._buffer(), k._buffer(), value._buffer(),
+                                                    Shape(lead).numel, n, d, dv, kv, z, self.eps)
+        return (Tensor(out, Shape(lead + (n, dv))),
+                (Tensor(kv, Shape(lead + (d, dv))), Tensor(z, Shape(lead + (d,)))))
     
-    def __call__(self, query: Tensor, key: Tensor, value: Tensor) -> Tensor:
-        return self.forward(query, key, value)
+    def step(self, q: Tensor, k: Tensor, v: Tensor,
+             state: Optional[Tuple[Tensor, Tensor]] = None
+             ) -> Tuple[Tensor, Tuple[Tensor, Tensor]]:
+        """
+        Attend one new token: q, k (..., d_k) and v (..., d_v).
+        
+        Returns the (..., d_v) output and the updated (kv, z) state.
+        """
+        lead = q.shape.dims[:-1]
+        out, state = self.prefill(q.reshape(lead + (1, q.shape.dims[-1])),
+                                  k.reshape(lead + (1, k.shape.dims[-1])),
+                                  v.reshape(lead + (1, v.shape.dims[-1])), state)
+        return out.reshape(lead + (out.shape.dims[-1],)), state
+    
+    def __call__(self, query: Tensor, key: Tensor, value: Tensor,
+                 causal: bool = False) -> Tensor:
+        return self.forward(query, key, value, causal)
 
 
 class AttentionMetrics:
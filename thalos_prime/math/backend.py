@@ -0,0 +1,843 @@
+"""
+THALOS Prime - Compute Backend Module
+Pluggable kernels behind the Tensor API.
+
+Tensors always keep their elements in packed ``array`` buffers; a backend
+receives those buffers plus their dimensions and returns a new buffer.
+The pure-Python backend is the reference implementation and the default.
+The NumPy backend wraps the same buffers without copying and runs the
+kernels vectorized. Select one with ``set_backend``/``use_backend`` or the
+``compute.backend`` setting ('python', 'numpy' or 'auto').
+"""
+
+from typing import Dict, List, Optional, Tuple, Union
+from array import array
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import repeat
+import importlib.util
+import math
+import operator
+from .memory import get_pool
+
+
+Dims = Tuple[int, ...]
+
+# Per query tile, the key blocks (j0, j1, tile mask or None) an attention kernel visits
+BlockLayout = List[List[Tuple[int, int, Optional[array]]]]
+
+
+def _numel(dims: Dims) -> int:
+    """Number of elements for the given dimensions."""
+    result = 1
+    for d in dims:
+        result *= d
+    return result
+
+
+def _broadcast_dims(dims_a: Dims, dims_b: Dims) -> Dims:
+    """Broadcast result dimensions of two shapes."""
+    ndim = max(len(dims_a), len(dims_b))
+    padded_a = (1,) * (ndim - len(dims_a)) + dims_a
+    padded_b = (1,) * (ndim - len(dims_b)) + dims_b
+    result = []
+    for d1, d2 in zip(padded_a, padded_b):
+        if d1 == d2 or d2 == 1:
+            result.append(d1)
+        elif d1 == 1:
+            result.append(d2)
+        else:
+            raise ValueError(f"Cannot broadcast shapes {dims_a} and {dims_b}")
+    return tuple(result)
+
+
+def _safe_div(a: float, b: float) -> float:
+    """Division that maps x / 0 to 0.0."""
+    return a / b if b != 0 else 0.0
+
+
+def _safe_pow(a: float, b: float) -> float:
+    """Power that maps 0 ** negative to +-inf, as NumPy does, instead of raising."""
+    try:
+        return a ** b
+    except ZeroDivisionError:
+        odd = float(b).is_integer() and int(b) % 2 == 1
+        return math.copysign(math.inf, a) if odd else math.inf
+
+
+def _broadcast_offsets(src_dims: Dims, dst_dims: Dims) -> array:
+    """Flat source index for every element of the broadcast destination."""
+    src_dims = (1,) * (len(dst_dims) - len(src_dims)) + src_dims
+    src_strides = []
+    stride = 1
+    for d in reversed(src_dims):
+        src_strides.append(stride)
+        stride *= d
+    src_strides.reverse()
+    
+    offsets = [0]
+    for size, src_size, stride in zip(dst_dims, src_dims, src_strides):
+        step = 0 if src_size == 1 else stride
+        offsets = [o + i * step for o in offsets for i in range(size)]
+    return array('q', offsets)
+
+
+@lru_cache(maxsize=256)
+def _broadcast_plan(dims_a: Dims, dims_b: Dims) -> tuple:
+    """
+    Compile how two shapes combine elementwise.
+    
+    Returns (out_dims, kind, extra). `kind` selects the kernel:
+        same      - identical layouts, zip the buffers
+        scalar_a  - a has one element
+        scalar_b  - b has one element
+        tile_a    - a repeats `extra` times to cover b (e.g. a bias row)
+        tile_b    - b repeats `extra` times to cover a
+        general   - `extra` holds precomputed source offsets for a and b
+    """
+    out_dims = _broadcast_dims(dims_a, dims_b)
+    numel_a = _numel(dims_a)
+    numel_b = _numel(dims_b)
+    numel_out = _numel(out_dims)
+    
+    if dims_a == dims_b:
+        return out_dims, 'same', None
+    if numel_b == 1:
+        return out_dims, 'scalar_b', None
+    if numel_a == 1:
+        return out_dims, 'scalar_a', None
+    
+    # One operand is a suffix of the other, so it tiles in memory order
+    stripped_a = dims_a[next((i for i, d in enumerate(dims_a) if d != 1), len(dims_a)):]
+    stripped_b = dims_b[next((i for i, d in enumerate(dims_b) if d != 1), len(dims_b)):]
+    if numel_a == numel_out and out_dims[len(out_dims) - len(stripped_b):] == stripped_b:
+        return out_dims, 'tile_b', numel_out // numel_b
+    if numel_b == numel_out and out_dims[len(out_dims) - len(stripped_a):] == stripped_a:
+        return out_dims, 'tile_a', numel_out // numel_a
+    
+    return out_dims, 'general', (_broadcast_offsets(dims_a, out_dims),
+                                 _broadcast_offsets(dims_b, out_dims))
+
+
+def _sigmoid(val: float) -> float:
+    """Numerically stable logistic function."""
+    if val >= 0:
+        return 1.0 / (1.0 + math.exp(-val))
+    exp_val = math.exp(val)
+    return exp_val / (1.0 + exp_val)
+
+
+_GELU_COEF = math.sqrt(2 / math.pi)
+
+_TWO_PI = 2.0 * math.pi
+
+
+def _gelu(val: float) -> float:
+    """Tanh approximation of GELU."""
+    return 0.5 * val * (1 + math.tanh(_GELU_COEF * (val + 0.044715 * val ** 3)))
+
+
+def _swish(val: float) -> float:
+    """Swish with beta = 1 (SiLU): val * sigmoid(val)."""
+    return val * _sigmoid(val)
+
+
+# Columns of B processed per block by the matmul kernel
+MATMUL_TILE = 64
+
+# Query rows per tile and key rows per block in the attention kernel
+ATTENTION_BLOCK = 64
+
+
+def matmul_rows(a_rows: List[List[float]], bt_rows: List[List[float]]) -> List[List[float]]:
+    """
+    Blocked matrix product on row lists.
+    
+    `a_rows` are the rows of A and `bt_rows` the rows of B^T (i.e. the
+    columns of B), so every output element is a dot product of two
+    contiguous rows. Columns of B are visited in blocks of MATMUL_TILE so
+    one block stays hot while every row of A passes over it.
+    """
+    mul = operator.mul
+    out = [[] for _ in a_rows]
+    for j0 in range(0, len(bt_rows), MATMUL_TILE):
+        tile = bt_rows[j0:j0 + MATMUL_TILE]
+        for row, out_row in zip(a_rows, out):
+            out_row.extend([sum(map(mul, row, col)) for col in tile])
+    return out
+
+
+class PythonBackend:
+    """Reference kernels written in pure Python."""
+    
+    name = 'python'
+    
+    _BINARY_OPS = {
+        'add': operator.add,
+        'sub': operator.sub,
+        'mul': operator.mul,
+        'div': operator.truediv,
+        'pow': _safe_pow,
+        'eq': operator.eq,
+        'ne': operator.ne,
+        'lt': operator.lt,
+        'le': operator.le,
+        'gt': operator.gt,
+        'ge': operator.ge,
+    }
+    
+    _UNARY_OPS = {
+        'neg': operator.neg,
+        'abs': abs,
+        'sqrt': lambda x: math.sqrt(max(0, x)),
+        'exp': lambda x: math.exp(min(x, 700)),
+        'log': lambda x: math.log(max(x, 1e-10)),
+        'relu': lambda x: max(0, x),
+        'sigmoid': _sigmoid,
+        'tanh': math.tanh,
+        'gelu': _gelu,
+        'swish': _swish,
+    }
+    
+    def binary(self, op: str, a: array, dims_a: Dims, b: Union[array, float, int],
+               dims_b: Optional[Dims] = None, reflected: bool = False,
+               typecode: Optional[str] = None, out: Optional[array] = None) -> Tuple[array, Dims]:
+        """
+        Element-wise op(a, b) with broadcasting, or op(b, a) when `reflected`.
+        
+        `b` may be a Python scalar, in which case `dims_b` is ignored.
+        The result is packed with `typecode` (default: a's); comparisons
+        (eq, ne, lt, le, gt, ge) are meant for the 'B' typecode.
+        Division by zero yields 0.0 and 0 ** negative yields +-inf (as in
+        NumPy). When `out` is given (a buffer holding
+        exactly the result's elements) the result is written into it and
+        `out` is returned; `out` may alias `a` or `b`.
+        """
+        try:
+            data, dims = self._binary(self._BINARY_OPS[op], a, dims_a, b, dims_b, reflected,
+                                      typecode)
+        except ZeroDivisionError:
+            if op != 'div':
+                raise
+            data, dims = self._binary(_safe_div, a, dims_a, b, dims_b, reflected, typecode)
+        if out is None:
+            return data, dims
+        out[:] = data
+        return out, dims
+    
+    def _binary(self, fn, a, dims_a, b, dims_b, reflected, typecode):
+        typecode = typecode or a.typecode
+        if isinstance(b, (int, float)):
+            scalar = repeat(b, len(a))
+            args = (scalar, a) if reflected else (a, scalar)
+            return array(typecode, map(fn, *args)), dims_a
+        
+        if reflected:
+            a, b = b, a
+            dims_a, dims_b = dims_b, dims_a
+        out_dims, kind, extra = _broadcast_plan(dims_a, dims_b)
+        
+        if kind == 'scalar_b':
+            b = repeat(b[0], len(a))
+        elif kind == 'scalar_a':
+            a = repeat(a[0], len(b))
+        elif kind == 'tile_b':
+            b = b * extra
+        elif kind == 'tile_a':
+            a = a * extra
+        elif kind == 'general':
+            idx_a, idx_b = extra
+            a = [a[i] for i in idx_a]
+            b = [b[i] for i in idx_b]
+        
+        return array(typecode, map(fn, a, b)), out_dims
+    
+    def unary(self, op: str, a: array, typecode: Optional[str] = None) -> array:
+        """Element-wise function (neg, abs, sqrt, exp, log, relu, sigmoid, tanh, gelu)."""
+        return array(typecode or a.typecode, map(self._UNARY_OPS[op], a))
+    
+    def masked_fill(self, a: array, dims_a: Dims, mask: array, dims_mask: Dims,
+                    value: Union[float, int], typecode: Optional[str] = None) -> array:
+        """Copy of `a` with `value` wherever `mask`, broadcast to `dims_a`, is nonzero."""
+        out_dims, kind, extra = _broadcast_plan(dims_a, dims_mask)
+        if out_dims != dims_a:
+            raise ValueError(f"Mask of shape {dims_mask} does not broadcast to {dims_a}")
+        if kind == 'scalar_b':
+            mask = repeat(mask[0], len(a))
+        elif kind == 'tile_b':
+            mask = mask * extra
+        elif kind == 'general':
+            mask = [mask[i] for i in extra[1]]
+        return array(typecode or a.typecode, [value if m else v for v, m in zip(a, mask)])
+    
+    def reduce_sum(self, a: array, dims: Dims, dim: int) -> array:
+        """Sum over dimension `dim`; the result drops that dimension."""
+        reduce_size = dims[dim]
+        inner = _numel(dims[dim + 1:])
+        outer = _numel(dims[:dim])
+        block = reduce_size * inner
+        
+        out = array(a.typecode)
+        for o in range(outer):
+            base = o * block
+            if reduce_size == 0:
+                out += array(a.typecode, (0,)) * inner
+            elif inner == 1:
+                out.append(sum(a[base:base + reduce_size]))
+            else:
+                acc = a[base:base + inner]
+                for r in range(1, reduce_size):
+                    start = base + r * inner
+                    acc = array(a.typecode, map(operator.add, acc, a[start:start + inner]))
+                out += acc
+        return out
+    
+    def transpose(self, a: array, rows: int, cols: int) -> array:
+        """Transpose a row-major (rows, cols) buffer into (cols, rows)."""
+        out = array(a.typecode)
+        for j in range(cols):
+            out += a[j::cols]
+        return out
+    
+    def matmul(self, a: array, b: array, m: int, k: int, n: int,
+               out: Optional[array] = None) -> array:
+        """(m, k) @ (k, n) on row-major buffers, optionally into `out`."""
+        return self.matmul_bt(a, self.transpose(b, k, n), m, k, n, out)
+    
+    def matmul_bt(self, a: array, bt: array, m: int, k: int, n: int,
+                  out: Optional[array] = None) -> array:
+        """(m, k) @ (n, k)^T, with B supplied already transposed."""
+        a_rows = [a[i * k:(i + 1) * k].tolist() for i in range(m)]
+        if out is None:
+            out = get_pool().acquire(a.typecode, m * n, zero=False)
+        # Materialize B^T rows one block at a time to bound memory
+        step = MATMUL_TILE * k
+        for j0 in range(0, n, MATMUL_TILE):
+            tile = [bt[s:s + k].tolist() for s in range(j0 * k, min(j0 * k + step, n * k), k)]
+            for i, block in enumerate(matmul_rows(a_rows, tile)):
+                base = i * n + j0
+                out[base:base + len(block)] = array(out.typecode, block)
+        return out
+    
+    def bmm(self, a: array, b: array, batch: int, m: int, k: int, n: int) -> array:
+        """Batched (batch, m, k) @ (batch, k, n) on row-major buffers."""
+        out = array(a.typecode)
+        for i in range(batch):
+            out += self.matmul(a[i * m * k:(i + 1) * m * k], b[i * k * n:(i + 1) * k * n], m, k, n)
+        return out
+    
+    def bmm_bt(self, a: array, bt: array, batch: int, m: int, k: int, n: int) -> array:
+        """Batched (batch, m, k) @ (batch, n, k)^T, with B supplied already transposed."""
+        out = array(a.typecode)
+        for i in range(batch):
+            out += self.matmul_bt(a[i * m * k:(i + 1) * m * k], bt[i * n * k:(i + 1) * n * k],
+                                  m, k, n)
+        return out
+    
+    def spmm(self, indptr: array, indices: array, values: array, b: array,
+             rows: int, n: int, typecode: Optional[str] = None) -> array:
+        """CSR (rows, k) @ row-major (k, n); each row scales and sums rows of B."""
+        out = array(typecode or b.typecode)
+        for r in range(rows):
+            start, end = indptr[r], indptr[r + 1]
+            if n == 1:
+                out.append(sum([v * b[j] for j, v in zip(indices[start:end], values[start:end])]))
+                continue
+            acc = [0] * n
+            for j, v in zip(indices[start:end], values[start:end]):
+                acc = [x + v * y for x, y in zip(acc, b[j * n:(j + 1) * n])]
+            out.extend(acc)
+        return out
+    
+    def normal(self, numel: int, mean: float, std: float, rng,
+               typecode: str = 'd') -> array:
+        """
+        `numel` samples of N(mean, std^2) drawn from `rng` (a random.Random).
+        
+        Bulk Box-Muller: every pair of uniforms yields two samples (the
+        cosine and sine outputs), and the log/sqrt/cos/sin run through
+        `map` over whole columns rather than element by element.
+        """
+        rand = rng.random
+        half = (numel + 1) // 2
+        # 1 - U lies in (0, 1], so the log never sees zero
+        radius = [1.0 - rand() for _ in range(half)]
+        theta = [_TWO_PI * rand() for _ in range(half)]
+        radius = list(map(math.sqrt, map(operator.mul, repeat(-2.0 * std * std),
+                                         map(math.log, radius))))
+        
+        out = array(typecode, bytes(2 * half * array(typecode).itemsize))
+        out[0::2] = array(typecode, map(operator.mul, radius, map(math.cos, theta)))
+        out[1::2] = array(typecode, map(operator.mul, radius, map(math.sin, theta)))
+        del out[numel:]
+        if mean:
+            out = array(typecode, map(operator.add, out, repeat(mean)))
+        return out
+    
+    def uniform(self, numel: int, low: float, high: float, rng,
+                typecode: str = 'd') -> array:
+        """`numel` samples of U(low, high) drawn from `rng`."""
+        rand = rng.random
+        width = high - low
+        return array(typecode, [low + width * rand() for _ in range(numel)])
+    
+    def attention(self, q: array, k: array, v: array, batch: int, m: int, n: int, d: int,
+                  dv: int, scale: float, mask: Optional[array] = None, causal: bool = False,
+                  block: int = ATTENTION_BLOCK, layout: Optional[BlockLayout] = None) -> array:
+        """
+        softmax(scale * Q K^T) V without materializing the (m, n) scores.
+        
+        Q (batch, m, d), K (batch, n, d) and V (batch, n, dv) are row-major.
+        Query rows are taken in tiles and key rows streamed in blocks of
+        `block`. Each row keeps a running max and sum (online softmax), and
+        its output is rescaled whenever the max grows. `mask` is an (m, n)
+        bool buffer shared by the batch; `causal` lets query i see keys up
+        to i + n - m. Key blocks a query tile cannot see are skipped
+        outright. Rows with no visible key come out as zeros.
+        
+        `layout`, if given, lists for each query tile the key blocks to
+        visit as (j0, j1, tile_mask) triples; tile_mask is None when the
+        whole block is visible, else a row-major (tile rows, j1 - j0) bool
+        buffer. Unlisted blocks are never scored.
+        """
+        mul = operator.mul
+        sub = operator.sub
+        exp = math.exp
+        neg_inf = -math.inf
+        shift = n - m
+        out = array(q.typecode)
+        for b in range(batch):
+            q_rows = [[x * scale for x in q[(b * m + i) * d:(b * m + i + 1) * d]]
+                      for i in range(m)]
+            k_rows = [k[(b * n + j) * d:(b * n + j + 1) * d].tolist() for j in range(n)]
+            v_rows = [v[(b * n + j) * dv:(b * n + j + 1) * dv].tolist() for j in range(n)]
+            for tile, i0 in enumerate(range(0, m, block)):
+                i1 = min(i0 + block, m)
+                run_max = [neg_inf] * (i1 - i0)
+                run_sum = [0.0] * (i1 - i0)
+                acc = [[0.0] * dv for _ in range(i0, i1)]
+                if layout is not None:
+                    blocks = layout[tile]
+                else:
+                    limit = min(n, i1 + shift) if causal else n
+                    blocks = [(j0, min(j0 + block, limit), None) for j0 in range(0, limit, block)]
+                for j0, j1, tile_mask in blocks:
+                    if mask is not None and not any(
+                            any(mask[i * n + j0:i * n + j1]) for i in range(i0, i1)):
+                        continue
+                    scores = matmul_rows(q_rows[i0:i1], k_rows[j0:j1])
+                    v_cols = list(zip(*v_rows[j0:j1]))
+                    width = j1 - j0
+                    for r, row in enumerate(scores):
+                        i = i0 + r
+                        if causal:
+                            visible = i + shift + 1 - j0
+                            if visible <= 0:
+                                continue
+                            row = row[:visible]
+                        if tile_mask is not None:
+                            allowed = tile_mask[r * width:r * width + len(row)]
+                            row = [x if a else neg_inf for x, a in zip(row, allowed)]
+                        if mask is not None:
+                            allowed = mask[i * n + j0:i * n + j0 + len(row)]
+                            row = [x if a else neg_inf for x, a in zip(row, allowed)]
+                        block_max = max(row)
+                        if block_max == neg_inf:
+                            continue
+                        new_max = max(run_max[r], block_max)
+                        correction = exp(run_max[r] - new_max)
+                        p = list(map(exp, map(sub, row, repeat(new_max))))
+                        run_sum[r] = run_sum[r] * correction + sum(p)
+                        acc[r] = [a * correction + sum(map(mul, p, col))
+                                  for a, col in zip(acc[r], v_cols)]
+                        run_max[r] = new_max
+                for total, row in zip(run_sum, acc):
+                    out.extend([x / total for x in row] if total else row)
+        return out
+    
+    def linear_attention(self, q: array, k: array, v: array, batch: int, n: int, d: int,
+                         dv: int, kv: Optional[array] = None, z: Optional[array] = None,
+                         eps: float = 1e-6) -> Tuple[array, array, array]:
+        """
+        Causal linear attention as a recurrence over prefix sums.
+        
+        q and k (batch, n, d) are already feature-mapped; v is (batch, n, dv).
+        Each step adds k_t v_t^T to the running (d, dv) state kv and k_t to
+        the running normalizer z, then emits q_t kv / max(q_t . z, eps),
+        so a token costs O(d * dv) however long the context. `kv` and `z`
+        continue an earlier call (zeros if None). Returns (out, kv, z).
+        """
+        add = operator.add
+        mul = operator.mul
+        out = array(q.typecode)
+        kv_out = array(q.typecode)
+        z_out = array(q.typecode)
+        for b in range(batch):
+            if kv is None:
+                state = [[0.0] * dv for _ in range(d)]
+                norm = [0.0] * d
+            else:
+                state = [kv[(b * d + a) * dv:(b * d + a + 1) * dv].tolist() for a in range(d)]
+                norm = z[b * d:(b + 1) * d].tolist()
+            for t in range(b * n, (b + 1) * n):
+                q_t = q[t * d:(t + 1) * d]
+                k_t = k[t * d:(t + 1) * d]
+                v_t = v[t * dv:(t + 1) * dv]
+                for a, weight in enumerate(k_t):
+                    if weight:
+                        state[a] = list(map(add, state[a], map(mul, repeat(weight), v_t)))
+                norm = list(map(add, norm, k_t))
+                scale = 1.0 / max(sum(map(mul, q_t, norm)), eps)
+                out.extend([sum(map(mul, q_t, col)) * scale for col in zip(*state)])
+            for row in state:
+                kv_out.extend(row)
+            z_out.extend(norm)
+        return out, kv_out, z_out
+    
+    def softmax(self, a: array, cols: int) -> array:
+        """Softmax over each contiguous row of `cols` elements."""
+        result = array(a.typecode)
+        for start in range(0, len(a), cols):
+            row = a[start:start + cols]
+            max_val = max(row)
+            exp_vals = [math.exp(val - max_val) for val in row]
+            sum_exp = sum(exp_vals)
+            result.extend([val / sum_exp for val in exp_vals])
+        return result
+    
+    def layer_norm(self, a: array, cols: int, gamma: array, beta: array,
+                   eps: float) -> array:
+        """Layer normalization over each row of `cols` elements."""
+        result = array(a.typecode)
+        for start in range(0, len(a), cols):
+            row = a[start:start + cols]
+            mean = sum(row) / len(row)
+            var = sum((val - mean) ** 2 for val in row) / len(row)
+            std = math.sqrt(var + eps)
+            result.extend([(val - mean) / std * g + b for val, g, b in zip(row, gamma, beta)])
+        return result
+    
+    def rms_norm(self, a: array, cols: int, weight: array, eps: float) -> array:
+        """RMS normalization over each row of `cols` elements."""
+        result = array(a.typecode)
+        for start in range(0, len(a), cols):
+            row = a[start:start + cols]
+            rms = math.sqrt(sum(val ** 2 for val in row) / len(row) + eps)
+            result.extend([val / rms * w for val, w in zip(row, weight)])
+        return result
+
+
+class NumPyBackend(PythonBackend):
+    """Vectorized kernels on NumPy views of the packed buffers."""
+    
+    name = 'numpy'
+    
+    _COMPARE_UFUNCS = {
+        'eq': 'equal',
+        'ne': 'not_equal',
+        'lt': 'less',
+        'le': 'less_equal',
+        'gt': 'greater',
+        'ge': 'greater_equal',
+    }
+    
+    def __init__(self):
+        import numpy
+        self.np = numpy
+    
+    def _wrap(self, a: array, dims: Optional[Dims] = None):
+        """Zero-copy NumPy view of a buffer."""
+        view = self.np.frombuffer(a, dtype=a.typecode) if len(a) else \
+            self.np.zeros(0, dtype=a.typecode)
+        return view.reshape(dims) if dims is not None else view
+    
+    def _unwrap(self, result, typecode: str) -> array:
+        """Copy a NumPy result into a (pooled) packed buffer."""
+        result = self.np.asarray(result)
+        buf = get_pool().acquire(typecode, result.size, zero=False)
+        self._wrap(buf, result.shape)[...] = result
+        return buf
+    
+    def binary(self, op: str, a: array, dims_a: Dims, b: Union[array, float, int],
+               dims_b: Optional[Dims] = None, reflected: bool = False,
+               typecode: Optional[str] = None, out: Optional[array] = None) -> Tuple[array, Dims]:
+        np = self.np
+        typecode = typecode or a.typecode
+        x = self._wrap(a, dims_a)
+        y = b if isinstance(b, (int, float)) else self._wrap(b, dims_b)
+        if reflected:
+            x, y = y, x
+        # Ufuncs write straight into the output buffer
+        target = None if out is None else self._wrap(out, np.broadcast_shapes(np.shape(x),
+                                                                               np.shape(y)))
+        
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            if op == 'add':
+                result = np.add(x, y, out=target)
+            elif op == 'sub':
+                result = np.subtract(x, y, out=target)
+            elif op == 'mul':
+                result = np.multiply(x, y, out=target)
+            elif op == 'div':
+                result = np.where(np.asarray(y) == 0, 0.0, np.true_divide(x, y))
+                if target is not None:
+                    np.copyto(target, result, casting='same_kind')
+            elif op == 'pow':
+                if typecode in 'df' and np.result_type(x, y).kind != 'f':
+                    # Integer bases with negative exponents need float math
+                    x = np.asarray(x, dtype=np.float64)
+                result = np.power(x, y, out=target)
+            elif op in self._COMPARE_UFUNCS:
+                result = getattr(np, self._COMPARE_UFUNCS[op])(x, y)
+            else:
+                raise ValueError(f"Unknown binary op: {op}")
+        result = np.asarray(result)
+        dims = tuple(result.shape) if result.ndim else (1,)
+        if out is not None:
+            return out, dims
+        return self._unwrap(result, typecode), dims
+    
+    def unary(self, op: str, a: array, typecode: Optional[str] = None) -> array:
+        np = self.np
+        typecode = typecode or a.typecode
+        x = self._wrap(a)
+        if typecode != a.typecode:
+            x = x.astype(typecode)
+        if op == 'neg':
+            out = -x
+        elif op == 'abs':
+            out = np.abs(x)
+        elif op == 'sqrt':
+            out = np.sqrt(np.maximum(x, 0))
+        elif op == 'exp':
+            out = np.exp(np.minimum(x, 700))
+        elif op == 'log':
+            out = np.log(np.maximum(x, 1e-10))
+        elif op == 'relu':
+            out = np.maximum(x, 0)
+        elif op == 'sigmoid':
+            e = np.exp(-np.abs(x))
+            out = np.where(x >= 0, 1.0 / (1.0 + e), e / (1.0 + e))
+        elif op == 'tanh':
+            out = np.tanh(x)
+        elif op == 'gelu':
+            out = 0.5 * x * (1 + np.tanh(_GELU_COEF * (x + 0.044715 * x ** 3)))
+        elif op == 'swish':
+            e = np.exp(-np.abs(x))
+            out = x * np.where(x >= 0, 1.0 / (1.0 + e), e / (1.0 + e))
+        else:
+            raise ValueError(f"Unknown unary op: {op}")
+        return self._unwrap(out, typecode)
+    
+    def masked_fill(self, a: array, dims_a: Dims, mask: array, dims_mask: Dims,
+                    value: Union[float, int], typecode: Optional[str] = None) -> array:
+        np = self.np
+        x = self._wrap(a, dims_a)
+        m = self._wrap(mask, dims_mask)
+        if np.broadcast_shapes(x.shape, m.shape) != x.shape:
+            raise ValueError(f"Mask of shape {dims_mask} does not broadcast to {dims_a}")
+        return self._unwrap(np.where(m != 0, value, x), typecode or a.typecode)
+    
+    def reduce_sum(self, a: array, dims: Dims, dim: int) -> array:
+        return self._unwrap(self._wrap(a, dims).sum(axis=dim), a.typecode)
+    
+    def transpose(self, a: array, rows: int, cols: int) -> array:
+        return self._unwrap(self._wrap(a, (rows, cols)).T, a.typecode)
+    
+    def _matmul_into(self, x, y, out: Optional[array], typecode: str) -> array:
+        if out is None:
+            return self._unwrap(x @ y, typecode)
+        target = self._wrap(out, (x.shape[0], y.shape[1]))
+        if target.dtype == x.dtype:
+            self.np.matmul(x, y, out=target)
+        else:
+            self.np.copyto(target, x @ y, casting='same_kind')
+        return out
+    
+    def matmul(self, a: array, b: array, m: int, k: int, n: int,
+               out: Optional[array] = None) -> array:
+        return self._matmul_into(self._wrap(a, (m, k)), self._wrap(b, (k, n)), out, a.typecode)
+    
+    def matmul_bt(self, a: array, bt: array, m: int, k: int, n: int,
+                  out: Optional[array] = None) -> array:
+        return self._matmul_into(self._wrap(a, (m, k)), self._wrap(bt, (n, k)).T, out,
+                                 a.typecode)
+    
+    def bmm(self, a: array, b: array, batch: int, m: int, k: int, n: int) -> array:
+        return self._unwrap(self._wrap(a, (batch, m, k)) @ self._wrap(b, (batch, k, n)),
+                            a.typecode)
+    
+    def bmm_bt(self, a: array, bt: array, batch: int, m: int, k: int, n: int) -> array:
+        return self._unwrap(self._wrap(a, (batch, m, k)) @
+                            self._wrap(bt, (batch, n, k)).transpose(0, 2, 1), a.typecode)
+    
+    def spmm(self, indptr: array, indices: array, values: array, b: array,
+             rows: int, n: int, typecode: Optional[str] = None) -> array:
+        np = self.np
+        typecode = typecode or b.typecode
+        counts = np.diff(self._wrap(indptr))
+        row_of = np.repeat(np.arange(rows), counts)
+        out = np.zeros((rows, n), dtype=typecode)
+        contrib = self._wrap(values)[:, None] * self._wrap(b, (-1, n))[self._wrap(indices)]
+        np.add.at(out, row_of, contrib)
+        return self._unwrap(out, typecode)
+    
+    def _generator(self, rng):
+        """NumPy generator seeded from `rng`, so a seeded random.Random stays reproducible."""
+        return self.np.random.default_rng(rng.getrandbits(64))
+    
+    def normal(self, numel: int, mean: float, std: float, rng,
+               typecode: str = 'd') -> array:
+        return self._unwrap(self._generator(rng).normal(mean, std, numel), typecode)
+    
+    def uniform(self, numel: int, low: float, high: float, rng,
+                typecode: str = 'd') -> array:
+        return self._unwrap(self._generator(rng).uniform(low, high, numel), typecode)
+    
+    def attention(self, q: array, k: array, v: array, batch: int, m: int, n: int, d: int,
+                  dv: int, scale: float, mask: Optional[array] = None, causal: bool = False,
+                  block: int = ATTENTION_BLOCK, layout: Optional[BlockLayout] = None) -> array:
+        np = self.np
+        x = self._wrap(q, (batch, m, d)) * scale
+        keys = self._wrap(k, (batch, n, d))
+        values = self._wrap(v, (batch, n, dv))
+        allowed = None if mask is None else self._wrap(mask, (m, n)).astype(bool)
+        shift = n - m
+        if layout is None:
+            # All queries form one tile; every key block up to the causal limit
+            limit = min(n, m + shift) if causal else n
+            tiles = [(0, m, [(j0, min(j0 + block, limit), None)
+                             for j0 in range(0, limit, block)])]
+        else:
+            tiles = [(i0, min(i0 + block, m), blocks)
+                     for i0, blocks in zip(range(0, m, block), layout)]
+        out = np.zeros((batch, m, dv))
+        for i0, i1, blocks in tiles:
+            rows = np.arange(i0, i1)[:, None]
+            acc = np.zeros((batch, i1 - i0, dv))
+            run_max = np.full((batch, i1 - i0, 1), -np.inf)
+            run_sum = np.zeros((batch, i1 - i0, 1))
+            for j0, j1, tile_mask in blocks:
+                keep = np.arange(j0, j1)[None, :] <= rows + shift if causal else None
+                if tile_mask is not None:
+                    part = self._wrap(tile_mask, (i1 - i0, j1 - j0)).astype(bool)
+                    keep = part if keep is None else keep & part
+                if allowed is not None:
+                    if not allowed[i0:i1, j0:j1].any():
+                        continue
+                    part = allowed[i0:i1, j0:j1]
+                    keep = part if keep is None else keep & part
+                scores = x[:, i0:i1] @ keys[:, j0:j1].transpose(0, 2, 1)
+                if keep is not None:
+                    scores = np.where(keep, scores, -np.inf)
+                new_max = np.maximum(run_max, scores.max(axis=-1, keepdims=True))
+                safe = np.where(np.isfinite(new_max), new_max, 0.0)
+                p = np.exp(scores - safe)
+                correction = np.exp(run_max - safe)
+                run_sum = run_sum * correction + p.sum(axis=-1, keepdims=True)
+                acc = acc * correction + p @ values[:, j0:j1]
+                run_max = new_max
+            out[:, i0:i1] = np.divide(acc, run_sum, out=np.zeros_like(acc), where=run_sum > 0)
+        return self._unwrap(out, q.typecode)
+    
+    def linear_attention(self, q: array, k: array, v: array, batch: int, n: int, d: int,
+                         dv: int, kv: Optional[array] = None, z: Optional[array] = None,
+                         eps: float = 1e-6) -> Tuple[array, array, array]:
+        np = self.np
+        queries = self._wrap(q, (batch, n, d))
+        keys = self._wrap(k, (batch, n, d))
+        values = self._wrap(v, (batch, n, dv))
+        state = np.zeros((batch, d, dv)) if kv is None else self._wrap(kv, (batch, d, dv))
+        norm = np.zeros((batch, d, 1)) if z is None else self._wrap(z, (batch, d, 1))
+        out = np.empty((batch, n, dv))
+        # Chunked form: the carried state covers earlier chunks, a lower
+        # triangle of scores covers the chunk itself
+        for t0 in range(0, n, ATTENTION_BLOCK):
+            t1 = min(t0 + ATTENTION_BLOCK, n)
+            qc, kc, vc = queries[:, t0:t1], keys[:, t0:t1], values[:, t0:t1]
+            scores = np.tril(qc @ kc.transpose(0, 2, 1))
+            num = qc @ state + scores @ vc
+            den = qc @ norm + scores.sum(axis=-1, keepdims=True)
+            out[:, t0:t1] = num / np.maximum(den, eps)
+            state = state + kc.transpose(0, 2, 1) @ vc
+            norm = norm + kc.sum(axis=1)[:, :, None]
+        return (self._unwrap(out, q.typecode), self._unwrap(state, q.typecode),
+                self._unwrap(norm, q.typecode))
+    
+    def softmax(self, a: array, cols: int) -> array:
+        x = self._wrap(a, (-1, cols))
+        e = self.np.exp(x - x.max(axis=1, keepdims=True))
+        return self._unwrap(e / e.sum(axis=1, keepdims=True), a.typecode)
+    
+    def layer_norm(self, a: array, cols: int, gamma: array, beta: array,
+                   eps: float) -> array:
+        x = self._wrap(a, (-1, cols))
+        mean = x.mean(axis=1, keepdims=True)
+        var = ((x - mean) ** 2).mean(axis=1, keepdims=True)
+        out = (x - mean) / self.np.sqrt(var + eps) * self._wrap(gamma) + self._wrap(beta)
+        return self._unwrap(out, a.typecode)
+    
+    def rms_norm(self, a: array, cols: int, weight: array, eps: float) -> array:
+        x = self._wrap(a, (-1, cols))
+        rms = self.np.sqrt((x ** 2).mean(axis=1, keepdims=True) + eps)
+        return self._unwrap(x / rms * self._wrap(weight), a.typecode)
+
+
+_BACKENDS = {
+    'python': PythonBackend,
+    'numpy': NumPyBackend,
+}
+
+_active: Optional[PythonBackend] = None
+_instances: Dict[str, PythonBackend] = {}
+
+
+def numpy_available() -> bool:
+    """Whether NumPy can be imported."""
+    return importlib.util.find_spec('numpy') is not None
+
+
+def available_backends() -> List[str]:
+    """Names of backends usable in this environment."""
+    return [name for name in _BACKENDS if name != 'numpy' or numpy_available()]
+
+
+def _resolve(name: str) -> PythonBackend:
+    """Instantiate (or reuse) a backend by name."""
+    if name == 'auto':
+        name = 'numpy' if numpy_available() else 'python'
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown compute backend: {name}")
+    if name == 'numpy' and not numpy_available():
+        raise ImportError("The 'numpy' compute backend requires NumPy to be installed")
+    if name not in _instances:
+        _instances[name] = _BACKENDS[name]()
+    return _instances[name]
+
+
+def set_backend(name: str) -> PythonBackend:
+    """Select the active backend ('python', 'numpy' or 'auto')."""
+    global _active
+    _active = _resolve(name)
+    return _active
+
+
+def get_backend() -> PythonBackend:
+    """Active backend, initialized from the `compute.backend` setting."""
+    global _active
+    if _active is None:
+        from ..config import get_settings
+        _active = _resolve(get_settings().get('compute.backend', 'python'))
+    return _active
+
+
+@contextmanager
+def use_backend(name: str):
+    """Temporarily switch the active backend."""
+    global _active
+    previous = get_backend()
+    _active = _resolve(name)
+    try:
+        yield _active
+    finally:
+        _active = previous
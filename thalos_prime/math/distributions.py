@@ -6,68 +6,49 @@ Random sampling and initialization schemes.
 from typing import Tuple, Optional
 import math
 import random
-from .tensor import Tensor, Shape
+from array import array
+from .tensor import Tensor, Shape, normal_buffer, uniform_buffer
+from .linear_algebra import _householder_qr
 
 
 class Distributions:
     """Probability distributions for sampling."""
     
     @staticmethod
-    def normal(mean: float = 0.0, std: float = 1.0, size: Tuple[int, ...] = (1,)) -> Tensor:
-        """Sample from normal distribution using Box-Muller transform."""
-        numel = 1
-        for d in size:
-            numel *= d
-        
-        data = []
-        for _ in range(numel):
-            u1 = random.random()
-            u2 = random.random()
-            z = math.sqrt(-2 * math.log(max(u1, 1e-10))) * math.cos(2 * math.pi * u2)
-            data.append(mean + std * z)
-        
-        return Tensor(data, Shape(size))
+    def normal(mean: float = 0.0, std: float = 1.0, size: Tuple[int, ...] = (1,),
+               generator: Optional[random.Random] = None) -> Tensor:
+        """Sample from normal distribution using bulk Box-Muller (both outputs kept)."""
+        return Tensor(normal_buffer(Shape(size).numel, mean, std, generator), Shape(size))
     
     @staticmethod
-    def uniform(low: float = 0.0, high: float = 1.0, size: Tuple[int, ...] = (1,)) -> Tensor:
+    def uniform(low: float = 0.0, high: float = 1.0, size: Tuple[int, ...] = (1,),
+                generator: Optional[random.Random] = None) -> Tensor:
         """Sample from uniform distribution."""
-        numel = 1
-        for d in size:
-            numel *= d
-        
-        data = [random.uniform(low, high) for _ in range(numel)]
-        return Tensor(data, Shape(size))
+        return Tensor(uniform_buffer(Shape(size).numel, low, high, generator), Shape(size))
     
     @staticmethod
     def truncated_normal(mean: float = 0.0, std: float = 1.0, 
                          low: float = -2.0, high: float = 2.0,
-                         size: Tuple[int, ...] = (1,)) -> Tensor:
-        """Sample from truncated normal distribution."""
-        numel = 1
-        for d in size:
-            numel *= d
-        
-        data = []
-        for _ in range(numel):
-            while True:
-                u1 = random.random()
-                u2 = random.random()
-                z = math.sqrt(-2 * math.log(max(u1, 1e-10))) * math.cos(2 * math.pi * u2)
-                val = mean + std * z
-                if low <= val <= high:
-                    data.append(val)
-                    break
+                         size: Tuple[int, ...] = (1,),
+                         generator: Optional[random.Random] = None) -> Tensor:
+        """Sample from truncated normal distribution (bulk draws, rejected ones redrawn)."""
+        numel = Shape(size).numel
+        data = array('d')
+        while len(data) < numel:
+            missing = numel - len(data)
+            # Over-draw a little so one round usually suffices
+            batch = normal_buffer(missing + missing // 8 + 8, mean, std, generator)
+            data.extend(v for v in batch if low <= v <= high)
+        del data[numel:]
         
         return Tensor(data, Shape(size))
     
     @staticmethod
-    def exponential(rate: float = 1.0, size: Tuple[int, ...] = (1,)) -> Tensor:
+    def exponential(rate: float = 1.0, size: Tuple[int, ...] = (1,),
+                    generator: Optional[random.Random] = None) -> Tensor:
         """Sample from exponential distribution."""
-        numel = 1
-        for d in size:
-            numel *= d
-        
-        data = [-math.log(max(random.random(), 1e-10)) / rate for _ in range(numel)]
+        rand = generator.random if generator is not None else random.random
+        data = array('d', [-math.log(1.0 - rand()) / rate for _ in range(Shape(size).numel)])
         return Tensor(data, Shape(size))
     
     @staticmethod
@@ -108,13 +89,11 @@ class Distributions:
         return math.sqrt(-2 * math.log(max(u1, 1e-10))) * math.cos(2 * math.pi * u2)
     
     @staticmethod
-    def bernoulli(p: float = 0.5, size: Tuple[int, ...] = (1,)) -> Tensor:
+    def bernoulli(p: float = 0.5, size: Tuple[int, ...] = (1,),
+                  generator: Optional[random.Random] = None) -> Tensor:
         """Sample from Bernoulli distribution."""
-        numel = 1
-        for d in size:
-            numel *= d
-        
-        data = [1.0 if random.random() < p else 0.0 for _ in range(numel)]
+        rand = generator.random if generator is not None else random.random
+        data = array('d', [rand() < p for _ in range(Shape(size).numel)])
         return Tensor(data, Shape(size))
     
     @staticmethod
@@ -133,60 +112,63 @@ class Initializers:
     """Weight initialization schemes."""
     
     @staticmethod
-    def xavier_uniform(fan_in: int, fan_out: int, size: Tuple[int, ...]) -> Tensor:
+    def xavier_uniform(fan_in: int, fan_out: int, size: Tuple[int, ...],
+                       generator: Optional[random.Random] = None) -> Tensor:
         """Xavier/Glorot uniform initialization."""
         limit = math.sqrt(6.0 / (fan_in + fan_out))
-        return Distributions.uniform(-limit, limit, size)
+        return Distributions.uniform(-limit, limit, size, generator)
     
     @staticmethod
-    def xavier_normal(fan_in: int, fan_out: int, size: Tuple[int, ...]) -> Tensor:
+    def xavier_normal(fan_in: int, fan_out: int, size: Tuple[int, ...],
+                      generator: Optional[random.Random] = None) -> Tensor:
         """Xavier/Glorot normal initialization."""
         std = math.sqrt(2.0 / (fan_in + fan_out))
-        return Distributions.normal(0.0, std, size)
+        return Distributions.normal(0.0, std, size, generator)
     
     @staticmethod
-    def he_uniform(fan_in: int, size: Tuple[int, ...]) -> Tensor:
+    def he_uniform(fan_in: int, size: Tuple[int, ...],
+                   generator: Optional[random.Random] = None) -> Tensor:
         """He uniform initialization (for ReLU)."""
         limit = math.sqrt(6.0 / fan_in)
-        return Distributions.uniform(-limit, limit, size)
+        return Distributions.uniform(-limit, limit, size, generator)
     
     @staticmethod
-    def he_normal(fan_in: int, size: Tuple[int, ...]) -> Tensor:
+    def he_normal(fan_in: int, size: Tuple[int, ...],
+                  generator: Optional[random.Random] = None) -> Tensor:
         """He normal initialization (for ReLU)."""
         std = math.sqrt(2.0 / fan_in)
-        return Distributions.normal(0.0, std, size)
+        return Distributions.normal(0.0, std, size, generator)
     
     @staticmethod
-    def lecun_uniform(fan_in: int, size: Tuple[int, ...]) -> Tensor:
+    def lecun_uniform(fan_in: int, size: Tuple[int, ...],
+                      generator: Optional[random.Random] = None) -> Tensor:
         """LeCun uniform initialization."""
         limit = math.sqrt(3.0 / fan_in)
-        return Distributions.uniform(-limit, limit, size)
+        return Distributions.uniform(-limit, limit, size, generator)
     
     @staticmethod
-    def lecun_normal(fan_in: int, size: Tuple[int, ...]) -> Tensor:
+    def lecun_normal(fan_in: int, size: Tuple[int, ...],
+                     generator: Optional[random.Random] = None) -> Tensor:
         """LeCun normal initialization."""
         std = math.sqrt(1.0 / fan_in)
-        return Distributions.normal(0.0, std, size)
+        return Distributions.normal(0.0, std, size, generator)
     
     @staticmethod
-    def orthogonal(rows: int, cols: int) -> Tensor:
-        """Orthogonal initialization."""
-        # Generate random matrix
-        flat = [Distributions._standard_normal() for _ in range(rows * cols)]
+    def orthogonal(rows: int, cols: int, generator: Optional[random.Random] = None) -> Tensor:
+        """
+        Orthogonal initialization.
         
-        # Simple Gram-Schmidt for small matrices
-        if rows <= cols:
-            # QR on random matrix
-            q = []
-            for i in range(rows):
-                v = flat[i * cols:(i + 1) * cols]
-                for j in range(i):
-                    dot = sum(q[j][k] * v[k] for k in range(cols))
-                    v = [v[k] - dot * q[j][k] for k in range(cols)]
-                norm = math.sqrt(sum(x ** 2 for x in v))
-                if norm > 1e-10:
-                    v = [x / norm for x in v]
-                q.append(v)
+        Householder QR of a Gaussian matrix: the columns are orthonormal
+        when rows >= cols and the rows are orthonormal otherwise.
+        """
+        flat = normal_buffer(rows * cols, generator=generator).tolist()
+        long, short = max(rows, cols), min(rows, cols)
+        # QR of the tall orientation; its Q vectors are our columns or rows
+        vectors = [flat[i * long:(i + 1) * long] for i in range(short)]
+        q, _ = _householder_qr(vectors, long)
+        if rows >= cols:
+            flat = [q[j][i] for i in range(rows) for j in range(cols)]
+        else:
             flat = [x for row in q for x in row]
         
         return Tensor(flat, Shape((rows, cols)))
@@ -0,0 +1,246 @@
+"""
+THALOS Prime - Lazy Elementwise Expressions
+Deferred Tensor arithmetic fused into a single pass over the data.
+
+``x.lazy()`` returns a LazyTensor whose elementwise operations record an
+expression DAG instead of running. ``materialize()`` compiles the DAG
+into one Python function and applies it in a single ``map`` over the
+operands, so a chain such as ``(x - mean) * inv_std * gamma + beta``
+allocates one output buffer and makes one loop instead of one per step.
+Compiled kernels are cached by expression structure; scalar constants
+are bound at call time, so changing them does not recompile. Under a
+non-Python backend the expression is evaluated eagerly with that
+backend's vectorized kernels instead.
+"""
+
+from typing import Dict, List, Tuple, Union
+from array import array
+from functools import lru_cache
+from itertools import chain, repeat
+import math
+
+from .tensor import Tensor, Shape, _TYPECODES, _result_dtype, _unary_dtype
+from .backend import (get_backend, _broadcast_dims, _broadcast_plan, _sigmoid, _gelu, _swish,
+                      _safe_pow)
+
+
+# Source templates for each op; operands are always plain names
+_BINARY_EXPR = {
+    'add': '{0} + {1}',
+    'sub': '{0} - {1}',
+    'mul': '{0} * {1}',
+    'div': '{0} / {1} if {1} else 0.0',
+    'pow': '_pow({0}, {1})',
+}
+
+_UNARY_EXPR = {
+    'neg': '-{0}',
+    'abs': 'abs({0})',
+    'sqrt': '_sqrt({0}) if {0} > 0 else 0.0',
+    'exp': '_exp({0} if {0} < 700 else 700)',
+    'log': '_log({0} if {0} > 1e-10 else 1e-10)',
+    'relu': '{0} if {0} > 0 else 0',
+    'sigmoid': '_sigmoid({0})',
+    'tanh': '_tanh({0})',
+    'gelu': '_gelu({0})',
+    'swish': '_swish({0})',
+}
+
+_KERNEL_GLOBALS = {
+    '_sqrt': math.sqrt,
+    '_exp': math.exp,
+    '_log': math.log,
+    '_tanh': math.tanh,
+    '_sigmoid': _sigmoid,
+    '_gelu': _gelu,
+    '_swish': _swish,
+    '_pow': _safe_pow,
+}
+
+Operand = Union['LazyTensor', Tensor, float, int]
+
+
+class LazyTensor:
+    """A deferred elementwise expression over tensors and scalars."""
+    
+    __slots__ = ('op', 'args', 'shape', 'dtype')
+    
+    def __init__(self, op: str, args: tuple, shape: Shape, dtype: str):
+        self.op = op
+        self.args = args
+        self.shape = shape
+        self.dtype = dtype
+    
+    @staticmethod
+    def leaf(tensor: Tensor) -> 'LazyTensor':
+        """Wrap a tensor as an expression input."""
+        return LazyTensor('leaf', (tensor,), tensor.shape, tensor.dtype)
+    
+    def _binary(self, other: Operand, op: str, reflected: bool = False) -> 'LazyTensor':
+        if isinstance(other, (int, float)):
+            dims, dtype = self.shape.dims, _result_dtype(self.dtype, other, op)
+        else:
+            if not isinstance(other, LazyTensor):
+                other = LazyTensor.leaf(other if isinstance(other, Tensor) else Tensor(other))
+            dims = _broadcast_dims(self.shape.dims, other.shape.dims)
+            dtype = _result_dtype(self.dtype, other.dtype, op)
+        args = (other, self) if reflected else (self, other)
+        return LazyTensor(op, args, Shape(dims), dtype)
+    
+    def _unary(self, op: str) -> 'LazyTensor':
+        return LazyTensor(op, (self,), self.shape, _unary_dtype(self.dtype, op))
+    
+    def __add__(self, other) -> 'LazyTensor':
+        return self._binary(other, 'add')
+    
+    def __radd__(self, other) -> 'LazyTensor':
+        return self._binary(other, 'add', reflected=True)
+    
+    def __sub__(self, other) -> 'LazyTensor':
+        return self._binary(other, 'sub')
+    
+    def __rsub__(self, other) -> 'LazyTensor':
+        return self._binary(other, 'sub', reflected=True)
+    
+    def __mul__(self, other) -> 'LazyTensor':
+        return self._binary(other, 'mul')
+    
+    def __rmul__(self, other) -> 'LazyTensor':
+        return self._binary(other, 'mul', reflected=True)
+    
+    def __truediv__(self, other) -> 'LazyTensor':
+        return self._binary(other, 'div')
+    
+    def __rtruediv__(self, other) -> 'LazyTensor':
+        return self._binary(other, 'div', reflected=True)
+    
+    def __pow__(self, exponent) -> 'LazyTensor':
+        return self._binary(exponent, 'pow')
+    
+    def __neg__(self) -> 'LazyTensor':
+        return self._unary('neg')
+    
+    def abs(self) -> 'LazyTensor':
+        return self._unary('abs')
+    
+    def sqrt(self) -> 'LazyTensor':
+        return self._unary('sqrt')
+    
+    def exp(self) -> 'LazyTensor':
+        return self._unary('exp')
+    
+    def log(self) -> 'LazyTensor':
+        return self._unary('log')
+    
+    def relu(self) -> 'LazyTensor':
+        return self._unary('relu')
+    
+    def sigmoid(self) -> 'LazyTensor':
+        return self._unary('sigmoid')
+    
+    def tanh(self) -> 'LazyTensor':
+        return self._unary('tanh')
+    
+    def gelu(self) -> 'LazyTensor':
+        return self._unary('gelu')
+    
+    def swish(self) -> 'LazyTensor':
+        return self._unary('swish')
+    
+    def materialize(self) -> Tensor:
+        """Evaluate the expression into a new tensor."""
+        if self.op == 'leaf':
+            return self.args[0]
+        if get_backend().name != 'python':
+            return self._evaluate_eagerly({})
+        
+        source, leaves, scalars = _lower(self)
+        kernel = _compile(source, len(leaves), len(scalars))(*scalars)
+        out_dims = self.shape.dims
+        numel = self.shape.numel
+        operands = [_iterate(leaf, out_dims, numel) for leaf in leaves]
+        return Tensor(array(_TYPECODES[self.dtype], map(kernel, *operands)),
+                      Shape(out_dims), self.dtype)
+    
+    def _evaluate_eagerly(self, memo: Dict[int, Tensor]) -> Tensor:
+        """Run each node with the active backend's kernels."""
+        key = id(self)
+        if key not in memo:
+            if self.op == 'leaf':
+                result = self.args[0]
+            else:
+                values = [arg._evaluate_eagerly(memo) if isinstance(arg, LazyTensor) else arg
+                          for arg in self.args]
+                if self.op in _UNARY_EXPR:
+                    result = values[0]._unary_op(self.op)
+                elif isinstance(values[0], Tensor):
+                    result = values[0]._broadcast_op(values[1], self.op)
+                else:
+                    result = values[1]._broadcast_op(values[0], self.op, reflected=True)
+            memo[key] = result
+        return memo[key]
+    
+    def __repr__(self) -> str:
+        return f"LazyTensor(op={self.op}, shape={self.shape})"
+
+
+def _lower(root: LazyTensor) -> Tuple[str, List[Tensor], List[float]]:
+    """
+    Turn the DAG into straight-line source for a per-element kernel.
+    
+    Returns the source, the distinct input tensors (arguments a0, a1, ...)
+    and the scalar constants (bound as c0, c1, ...). Nodes reachable along
+    several paths are computed once.
+    """
+    names: Dict[int, str] = {}
+    leaves: List[Tensor] = []
+    scalars: List[float] = []
+    lines: List[str] = []
+    
+    def visit(node) -> str:
+        if isinstance(node, (int, float)):
+            scalars.append(node)
+            return f"c{len(scalars) - 1}"
+        key = id(node.args[0]) if node.op == 'leaf' else id(node)
+        if key in names:
+            return names[key]
+        if node.op == 'leaf':
+            leaves.append(node.args[0])
+            name = f"a{len(leaves) - 1}"
+        else:
+            operands = [visit(arg) for arg in node.args]
+            template = _UNARY_EXPR.get(node.op) or _BINARY_EXPR[node.op]
+            name = f"t{len(lines)}"
+            lines.append(f"    {name} = {template.format(*operands)}")
+        names[key] = name
+        return name
+    
+    result = visit(root)
+    args = ', '.join(f"a{i}" for i in range(len(leaves)))
+    body = '\n'.join(lines)
+    source = f"def _kernel({args}):\n{body}\n    return {result}"
+    return source, leaves, scalars
+
+
+@lru_cache(maxsize=128)
+def _compile(source: str, num_leaves: int, num_scalars: int):
+    """Build a factory that binds scalar constants into the kernel."""
+    params = ', '.join(f"c{i}" for i in range(num_scalars))
+    indented = source.replace('\n', '\n    ')
+    factory_source = f"def _factory({params}):\n    {indented}\n    return _kernel"
+    namespace = dict(_KERNEL_GLOBALS)
+    exec(compile(factory_source, '<fused elementwise kernel>', 'exec'), namespace)
+    return namespace['_factory']
+
+
+def _iterate(tensor: Tensor, out_dims: Tuple[int, ...], numel: int):
+    """Iterate a tensor's elements broadcast to `out_dims` without copying."""
+    buf = tensor._buffer()
+    if len(buf) == numel:
+        return buf
+    if len(buf) == 1:
+        return repeat(buf[0], numel)
+    _, kind, extra = _broadcast_plan(tensor.shape.dims, out_dims)
+    if kind == 'tile_a':
+        return chain.from_iterable(repeat(buf, extra))
+    return map(buf.__getitem__, extra[0])
@@ -4,8 +4,17 @@ Matrix operations, decompositions, and solvers.
 """
 
 from typing import List, Tuple, Optional
+from operator import mul
 import math
-from .tensor import Tensor, Shape, zeros, eye
+import random
+import sys
+from .tensor import (Tensor, Shape, zeros, eye, randn, normal_buffer, matmul as _matmul,
+                     bmm as _bmm)
+from .einsum import einsum, tensordot
+
+
+# Machine epsilon of float64, the scale of svd's rank cutoff
+_EPS = sys.float_info.epsilon
 
 
 class LinearAlgebra:
@@ -13,27 +22,25 @@ class LinearAlgebra:
     
     @staticmethod
     def matmul(a: Tensor, b: Tensor) -> Tensor:
-        """Matrix multiplication."""
+        """Matrix multiplication, broadcasting over leading batch dimensions."""
         if a.shape.ndim < 2 or b.shape.ndim < 2:
             raise ValueError("matmul requires 2D tensors")
-        
-        m, k1 = a.shape.dims[-2], a.shape.dims[-1]
-        k2, n = b.shape.dims[-2], b.shape.dims[-1]
-        
-        if k1 != k2:
-            raise ValueError(f"Incompatible shapes for matmul: {a.shape} @ {b.shape}")
-        
-        result_data = []
-        for i in range(m):
-            for j in range(n):
-                total = 0.0
-                for k in range(k1):
-                    idx_a = i * k1 + k
-                    idx_b = k * n + j
-                    total += a.data[idx_a] * b.data[idx_b]
-                result_data.append(total)
-        
-        return Tensor(result_data, Shape((m, n)))
+        return _matmul(a, b)
+    
+    @staticmethod
+    def bmm(a: Tensor, b: Tensor) -> Tensor:
+        """Batched matrix multiplication of (batch, m, k) and (batch, k, n)."""
+        return _bmm(a, b)
+    
+    @staticmethod
+    def einsum(spec: str, *operands: Tensor) -> Tensor:
+        """Einstein summation (see thalos_prime.math.einsum)."""
+        return einsum(spec, *operands)
+    
+    @staticmethod
+    def tensordot(a: Tensor, b: Tensor, dims=2) -> Tensor:
+        """Contract the last `dims` dimensions of a with the first of b."""
+        return tensordot(a, b, dims)
     
     @staticmethod
     def transpose(a: Tensor) -> Tensor:
@@ -57,13 +64,7 @@ class LinearAlgebra:
         if a.shape.ndim != 1 or b.shape.ndim != 1:
             raise ValueError("outer requires 1D tensors")
         
-        m, n = len(a.data), len(b.data)
-        result_data = []
-        for i in range(m):
-            for j in range(n):
-                result_data.append(a.data[i] * b.data[j])
-        
-        return Tensor(result_data, Shape((m, n)))
+        return einsum('i,j->ij', a, b)
     
     @staticmethod
     def norm(a: Tensor, p: float = 2.0) -> float:
@@ -86,67 +87,31 @@ class LinearAlgebra:
         if ord == 'fro':
             return math.sqrt(sum(x ** 2 for x in a.data))
         elif ord == 'nuc':
-            # Nuclear norm = sum of singular values (simplified)
-            return math.sqrt(sum(x ** 2 for x in a.data))
+            # Nuclear norm = sum of singular values
+            return sum(LinearAlgebra.svd(a)[1].data)
         else:
             raise ValueError(f"Unknown norm: {ord}")
     
     @staticmethod
     def qr(a: Tensor) -> Tuple[Tensor, Tensor]:
-        """QR decomposition using Gram-Schmidt."""
+        """
+        Reduced QR decomposition by Householder reflections.
+        
+        Returns Q (m, k) with orthonormal columns and upper-triangular
+        R (k, n), k = min(m, n), with a non-negative diagonal. Unlike
+        Gram-Schmidt, orthogonality does not degrade with conditioning.
+        """
         if a.shape.ndim != 2:
             raise ValueError("qr requires 2D tensor")
-        
         m, n = a.shape.dims
-        
-        # Convert to list of column vectors
-        cols = []
-        for j in range(n):
-            col = [a.data[i * n + j] for i in range(m)]
-            cols.append(col)
-        
-        # Gram-Schmidt orthogonalization
-        q_cols = []
-        r_data = [[0.0] * n for _ in range(n)]
-        
-        for j in range(n):
-            v = cols[j].copy()
-            
-            for i in range(j):
-                # r[i,j] = q_i . a_j
-                r_ij = sum(q_cols[i][k] * cols[j][k] for k in range(m))
-                r_data[i][j] = r_ij
-                # v = v - r[i,j] * q_i
-                for k in range(m):
-                    v[k] -= r_ij * q_cols[i][k]
-            
-            # r[j,j] = ||v||
-            norm_v = math.sqrt(sum(x ** 2 for x in v))
-            r_data[j][j] = norm_v
-            
-            # q_j = v / ||v||
-            if norm_v > 1e-10:
-                q_col = [x / norm_v for x in v]
-            else:
-                q_col = [0.0] * m
-            q_cols.append(q_col)
-        
-        # Build Q and R tensors
-        q_data = []
-        for i in range(m):
-            for j in range(n):
-                q_data.append(q_cols[j][i])
-        
-        r_flat = []
-        for i in range(n):
-            for j in range(n):
-                r_flat.append(r_data[i][j])
-        
-        return Tensor(q_data, Shape((m, n))), Tensor(r_flat, Shape((n, n)))
+        q_cols, r_rows = _householder_qr(_columns(a), m)
+        k = len(q_cols)
+        return (Tensor([q_cols[j][i] for i in range(m) for j in range(k)], Shape((m, k))),
+                Tensor([x for row in r_rows for x in row], Shape((k, n))))
     
     @staticmethod
     def det(a: Tensor) -> float:
-        """Compute determinant (2x2 or 3x3 matrices)."""
+        """Compute determinant (closed form up to 3x3, LU beyond)."""
         if a.shape.ndim != 2:
             raise ValueError("det requires 2D tensor")
         if a.shape.dims[0] != a.shape.dims[1]:
@@ -154,21 +119,21 @@ class LinearAlgebra:
         
         n = a.shape.dims[0]
         
+        d = a._buffer()
         if n == 1:
-            return a.data[0]
+            return d[0]
         elif n == 2:
-            return a.data[0] * a.data[3] - a.data[1] * a.data[2]
+            return d[0] * d[3] - d[1] * d[2]
         elif n == 3:
             # Sarrus rule
-            return (a.data[0] * a.data[4] * a.data[8] +
-                    a.data[1] * a.data[5] * a.data[6] +
-                    a.data[2] * a.data[3] * a.data[7] -
-                    a.data[2] * a.data[4] * a.data[6] -
-                    a.data[1] * a.data[3] * a.data[8] -
-                    a.data[0] * a.data[5] * a.data[7])
+            return (d[0] * d[4] * d[8] +
+                    d[1] * d[5] * d[6] +
+                    d[2] * d[3] * d[7] -
+                    d[2] * d[4] * d[6] -
+                    d[1] * d[3] * d[8] -
+                    d[0] * d[5] * d[7])
         else:
-            # LU decomposition for larger matrices
-            raise NotImplementedError("det for n > 3 not implemented")
+            return LUFactorization(a).det()
     
     @staticmethod
     def trace(a: Tensor) -> float:
@@ -179,178 +144,422 @@ class LinearAlgebra:
             raise ValueError("trace requires square matrix")
         
         n = a.shape.dims[0]
-        return sum(a.data[i * n + i] for i in range(n))
+        data = a._buffer()
+        return sum(data[i * n + i] for i in range(n))
+    
+    @staticmethod
+    def lu(a: Tensor) -> 'LUFactorization':
+        """Factor a square matrix once for repeated solves, det and inv."""
+        return LUFactorization(a)
     
     @staticmethod
     def solve(a: Tensor, b: Tensor) -> Tensor:
-        """Solve linear system Ax = b using Gaussian elimination."""
-        if a.shape.ndim != 2 or b.shape.ndim != 1:
-            raise ValueError("solve requires 2D matrix and 1D vector")
-        
+        """Solve Ax = b (b may hold several right-hand sides as columns)."""
+        if a.shape.ndim != 2 or b.shape.ndim not in (1, 2):
+            raise ValueError("solve requires 2D matrix and 1D vector or 2D matrix")
+        return LUFactorization(a).solve(b)
+    
+    @staticmethod
+    def eigh(a: Tensor, tol: float = 1e-12, max_sweeps: int = 50) -> Tuple[List[float], Tensor]:
+        """
+        All eigenpairs of a symmetric matrix by cyclic Jacobi rotations.
+        
+        Sweeps stop once the off-diagonal mass falls below `tol` relative
+        to the matrix norm. Returns the eigenvalues in ascending order and
+        the matching eigenvectors as the columns of an (n, n) tensor.
+        """
+        if a.shape.ndim != 2 or a.shape.dims[0] != a.shape.dims[1]:
+            raise ValueError("eigh requires square matrix")
         n = a.shape.dims[0]
-        if a.shape.dims[1] != n or len(b.data) != n:
-            raise ValueError("Incompatible dimensions")
-        
-        # Create augmented matrix
-        aug = [[0.0] * (n + 1) for _ in range(n)]
-        for i in range(n):
-            for j in range(n):
-                aug[i][j] = a.data[i * n + j]
-            aug[i][n] = b.data[i]
-        
-        # Forward elimination with partial pivoting
-        for k in range(n):
-            # Find pivot
-            max_idx = k
-            max_val = abs(aug[k][k])
-            for i in range(k + 1, n):
-                if abs(aug[i][k]) > max_val:
-                    max_val = abs(aug[i][k])
-                    max_idx = i
-            
-            # Swap rows
-            aug[k], aug[max_idx] = aug[max_idx], aug[k]
-            
-            if abs(aug[k][k]) < 1e-10:
-                raise ValueError("Matrix is singular")
-            
-            # Eliminate
-            for i in range(k + 1, n):
-                factor = aug[i][k] / aug[k][k]
-                for j in range(k, n + 1):
-                    aug[i][j] -= factor * aug[k][j]
-        
-        # Back substitution
-        x = [0.0] * n
-        for i in range(n - 1, -1, -1):
-            x[i] = aug[i][n]
-            for j in range(i + 1, n):
-                x[i] -= aug[i][j] * x[j]
-            x[i] /= aug[i][i]
-        
-        return Tensor(x)
+        flat = a._buffer().tolist()
+        values, vec_cols = _jacobi_eigh([flat[i * n:(i + 1) * n] for i in range(n)],
+                                        tol, max_sweeps)
+        order = sorted(range(n), key=values.__getitem__)
+        return ([values[j] for j in order],
+                Tensor([vec_cols[j][i] for i in range(n) for j in order], Shape((n, n))))
     
     @staticmethod
-    def eig(a: Tensor, num_iterations: int = 100) -> Tuple[List[float], List[Tensor]]:
-        """Compute eigenvalues using power iteration (simplified)."""
+    def eig(a: Tensor, num_iterations: int = 100,
+            tol: float = 1e-10) -> Tuple[List[float], List[Tensor]]:
+        """
+        Eigenvalues, largest magnitude first, with their eigenvectors.
+        
+        Symmetric matrices get every eigenpair from eigh. Otherwise only
+        the dominant pair is found by power iteration, which stops once
+        the Rayleigh quotient settles to within `tol` (or after
+        `num_iterations` steps).
+        """
         if a.shape.ndim != 2:
             raise ValueError("eig requires 2D tensor")
         if a.shape.dims[0] != a.shape.dims[1]:
             raise ValueError("eig requires square matrix")
         
         n = a.shape.dims[0]
-        eigenvalues = []
-        eigenvectors = []
-        
-        # Power iteration for dominant eigenvalue
-        v = Tensor([1.0] * n)
-        
+        flat = a._buffer().tolist()
+        rows = [flat[i * n:(i + 1) * n] for i in range(n)]
+        if all(abs(rows[i][j] - rows[j][i]) <= tol * (abs(rows[i][j]) + 1)
+               for i in range(n) for j in range(i)):
+            values, vec_cols = _jacobi_eigh(rows, 1e-12, 50)
+            order = sorted(range(n), key=lambda j: -abs(values[j]))
+            return [values[j] for j in order], [Tensor(vec_cols[j]) for j in order]
+        
+        # Power iteration for the dominant eigenvalue
+        v = [1.0 / math.sqrt(n)] * n
+        eigenvalue = 0.0
         for _ in range(num_iterations):
-            # v = A @ v
-            new_v = []
-            for i in range(n):
-                total = 0.0
-                for j in range(n):
-                    total += a.data[i * n + j] * v.data[j]
-                new_v.append(total)
-            
-            # Normalize
-            norm = math.sqrt(sum(x ** 2 for x in new_v))
-            if norm > 1e-10:
-                v = Tensor([x / norm for x in new_v])
-            else:
+            av = [sum(map(mul, row, v)) for row in rows]
+            previous, eigenvalue = eigenvalue, sum(map(mul, v, av))
+            norm = math.sqrt(sum(x * x for x in av))
+            if norm < 1e-300:
+                break
+            v = [x / norm for x in av]
+            if abs(eigenvalue - previous) <= tol * max(1.0, abs(eigenvalue)):
                 break
         
-        # Compute eigenvalue: lambda = (v^T A v) / (v^T v)
-        av = []
-        for i in range(n):
-            total = 0.0
-            for j in range(n):
-                total += a.data[i * n + j] * v.data[j]
-            av.append(total)
-        
-        eigenvalue = sum(v.data[i] * av[i] for i in range(n))
-        eigenvalues.append(eigenvalue)
-        eigenvectors.append(v)
-        
-        return eigenvalues, eigenvectors
+        av = [sum(map(mul, row, v)) for row in rows]
+        return [sum(map(mul, v, av))], [Tensor(v)]
     
     @staticmethod
     def inv(a: Tensor) -> Tensor:
-        """Compute matrix inverse using Gaussian elimination."""
+        """Compute matrix inverse from an LU factorization."""
         if a.shape.ndim != 2:
             raise ValueError("inv requires 2D tensor")
-        if a.shape.dims[0] != a.shape.dims[1]:
-            raise ValueError("inv requires square matrix")
-        
-        n = a.shape.dims[0]
-        
-        # Create augmented matrix [A | I]
-        aug = [[0.0] * (2 * n) for _ in range(n)]
-        for i in range(n):
-            for j in range(n):
-                aug[i][j] = a.data[i * n + j]
-            aug[i][n + i] = 1.0
-        
-        # Gaussian elimination
-        for k in range(n):
-            # Find pivot
-            max_idx = k
-            max_val = abs(aug[k][k])
-            for i in range(k + 1, n):
-                if abs(aug[i][k]) > max_val:
-                    max_val = abs(aug[i][k])
-                    max_idx = i
-            
-            aug[k], aug[max_idx] = aug[max_idx], aug[k]
-            
-            if abs(aug[k][k]) < 1e-10:
-                raise ValueError("Matrix is singular")
-            
-            # Scale pivot row
-            pivot = aug[k][k]
-            for j in range(2 * n):
-                aug[k][j] /= pivot
-            
-            # Eliminate
-            for i in range(n):
-                if i != k:
-                    factor = aug[i][k]
-                    for j in range(2 * n):
-                        aug[i][j] -= factor * aug[k][j]
-        
-        # Extract inverse
-        inv_data = []
-        for i in range(n):
-            for j in range(n):
-                inv_data.append(aug[i][n + j])
-        
-        return Tensor(inv_data, Shape((n, n)))
+        return LUFactorization(a).inv()
     
     @staticmethod
-    def svd(a: Tensor) -> Tuple[Tensor, Tensor, Tensor]:
-        """Simplified SVD using power iteration."""
+    def svd(a: Tensor, tol: float = 1e-12,
+            generator: Optional[random.Random] = None) -> Tuple[Tensor, Tensor, Tensor]:
+        """
+        Thin SVD: U (m, k), S (k,) descending and Vt (k, n), k = min(m, n).
+        
+        One-sided Jacobi: pairs of columns of A are rotated until all are
+        orthogonal to within `tol`, so the singular values are accurate
+        relative to A itself rather than to its Gram matrix. Singular
+        values below max(m, n) * eps * S[0] are set to zero, and U is
+        completed to an orthonormal basis by Householder QR; pass a seeded
+        `random.Random` as `generator` to make that completion reproducible.
+        """
         if a.shape.ndim != 2:
             raise ValueError("svd requires 2D tensor")
-        
         m, n = a.shape.dims
-        k = min(m, n)
-        
-        # A^T A
-        ata = LinearAlgebra.matmul(a.T, a)
-        
-        # Get top eigenvalue/vector of A^T A
-        eigenvalues, eigenvectors = LinearAlgebra.eig(ata)
+        if m < n:
+            u, s, vt = LinearAlgebra.svd(a.T.contiguous(), tol, generator)
+            return vt.T.contiguous(), s, u.T.contiguous()
+        
+        w_cols, v_cols = _one_sided_jacobi(_columns(a), tol, 60)
+        norms = [math.sqrt(sum(x * x for x in w)) for w in w_cols]
+        order = sorted(range(n), key=lambda j: -norms[j])
+        sigma = [norms[j] for j in order]
+        v_cols = [v_cols[j] for j in order]
+        
+        # U = A V / sigma for the singular values above the rank cutoff
+        cutoff = (sigma[0] if sigma else 0.0) * max(m, n) * _EPS
+        u_cols = []
+        for j, s_j in zip(order, sigma):
+            if s_j <= cutoff:
+                break
+            u_cols.append([x / s_j for x in w_cols[j]])
+        sigma[len(u_cols):] = [0.0] * (n - len(u_cols))
+        u_cols = _complete_basis(u_cols, m, n, generator)
         
-        # Build simplified SVD
-        sigma = [math.sqrt(max(0, ev)) for ev in eigenvalues]
+        return (Tensor([u_cols[j][i] for i in range(m) for j in range(n)], Shape((m, n))),
+                Tensor(sigma, Shape((n,))),
+                Tensor([x for v in v_cols for x in v], Shape((n, n))))
+    
+    @staticmethod
+    def truncated_svd(a: Tensor, k: int, tol: float = 1e-8, max_iter: int = 50,
+                      oversample: int = 5,
+                      generator: Optional[random.Random] = None) -> Tuple[Tensor, Tensor, Tensor]:
+        """
+        Leading k singular triplets by randomized subspace iteration.
+        
+        A random (n, k + oversample) probe is pushed through A and A^T,
+        re-orthonormalized by QR each round, until the top k singular
+        values change by less than `tol` (relative). Only products with A
+        and small dense problems are needed, which suits low-rank
+        compression of large weight matrices. Pass a seeded `random.Random`
+        as `generator` for a reproducible probe.
+        """
+        if a.shape.ndim != 2:
+            raise ValueError("truncated_svd requires 2D tensor")
+        m, n = a.shape.dims
+        k = min(k, m, n)
+        width = min(k + oversample, m, n)
+        q, _ = LinearAlgebra.qr(_matmul(a, randn(n, width, generator=generator)))
+        
+        previous = None
+        for _ in range(max_iter):
+            q, _ = LinearAlgebra.qr(_matmul(a, _matmul(a.T, q)))
+            u_small, s, vt = LinearAlgebra.svd(_matmul(q.T, a), generator=generator)
+            top = s.tolist()[:k]
+            if previous is not None and all(abs(x - y) <= tol * max(top[0], 1e-300)
+                                            for x, y in zip(top, previous)):
+                break
+            previous = top
         
-        # U, S, V placeholders
-        u_data = [0.0] * (m * k)
-        s_data = sigma + [0.0] * (k - len(sigma))
-        v_data = [v.data[i] if i < len(v.data) else 0.0 
-                  for v in eigenvectors for i in range(n)]
+        u = _matmul(q, u_small)
+        return (u.narrow(1, 0, k).contiguous(), s.narrow(0, 0, k).contiguous(),
+                vt.narrow(0, 0, k).contiguous())
+
+
+def _columns(a: Tensor) -> List[List[float]]:
+    """Columns of a 2D tensor as lists."""
+    return a.T.tolist()
+
+
+def _householder_qr(cols: List[List[float]], m: int) -> Tuple[List[List[float]], List[List[float]]]:
+    """
+    Householder QR on a list of columns.
+    
+    Returns the k = min(m, n) columns of Q and the k rows of R, with the
+    signs arranged so R has a non-negative diagonal.
+    """
+    cols = [list(c) for c in cols]
+    n = len(cols)
+    k = min(m, n)
+    reflectors = []
+    for j in range(k):
+        x = cols[j][j:]
+        norm = math.sqrt(sum(v * v for v in x))
+        if norm == 0.0:
+            reflectors.append(None)
+            continue
+        v = x[:]
+        v[0] += math.copysign(norm, x[0])
+        scale = 2.0 / sum(t * t for t in v)
+        for c in range(j, n):
+            col = cols[c]
+            f = scale * sum(map(mul, v, col[j:]))
+            if f:
+                col[j:] = [y - f * t for y, t in zip(col[j:], v)]
+        reflectors.append((v, scale))
+    
+    # Q = H_0 ... H_{k-1} applied to the first k unit vectors
+    q_cols = [[1.0 if i == c else 0.0 for i in range(m)] for c in range(k)]
+    for j in reversed(range(k)):
+        if reflectors[j] is None:
+            continue
+        v, scale = reflectors[j]
+        for col in q_cols:
+            f = scale * sum(map(mul, v, col[j:]))
+            if f:
+                col[j:] = [y - f * t for y, t in zip(col[j:], v)]
+    
+    r_rows = [[cols[c][i] if c >= i else 0.0 for c in range(n)] for i in range(k)]
+    for i in range(k):
+        if r_rows[i][i] < 0:
+            r_rows[i] = [-x for x in r_rows[i]]
+            q_cols[i] = [-x for x in q_cols[i]]
+    return q_cols, r_rows
+
+
+def _complete_basis(cols: List[List[float]], m: int, k: int,
+                    generator: Optional[random.Random] = None) -> List[List[float]]:
+    """Extend orthonormal columns to k orthonormal columns (random directions + QR)."""
+    if len(cols) >= k:
+        return cols[:k]
+    noise = normal_buffer(m * (k - len(cols)), generator=generator)
+    extra = [list(noise[i:i + m]) for i in range(0, len(noise), m)]
+    q_cols, _ = _householder_qr(cols + extra, m)
+    return cols + q_cols[len(cols):]
+
+
+def _one_sided_jacobi(cols: List[List[float]], tol: float,
+                      max_sweeps: int) -> Tuple[List[List[float]], List[List[float]]]:
+    """
+    Orthogonalize the columns of A (m >= n) by Jacobi rotations.
+    
+    Returns the rotated columns W = A V, whose norms are the singular
+    values, and the columns of the orthogonal V.
+    """
+    w = [list(map(float, c)) for c in cols]
+    n = len(w)
+    v = [[1.0 if i == j else 0.0 for i in range(n)] for j in range(n)]
+    for _ in range(max_sweeps):
+        rotated = False
+        for p in range(n - 1):
+            for q in range(p + 1, n):
+                wp, wq = w[p], w[q]
+                gamma = sum(map(mul, wp, wq))
+                alpha = sum(map(mul, wp, wp))
+                beta = sum(map(mul, wq, wq))
+                if gamma == 0.0 or abs(gamma) <= tol * math.sqrt(alpha * beta):
+                    continue
+                rotated = True
+                zeta = (beta - alpha) / (2.0 * gamma)
+                t = math.copysign(1.0, zeta) / (abs(zeta) + math.sqrt(1.0 + zeta * zeta))
+                c = 1.0 / math.sqrt(1.0 + t * t)
+                s = c * t
+                for mat in (w, v):
+                    xp, xq = mat[p], mat[q]
+                    mat[p] = [c * x - s * y for x, y in zip(xp, xq)]
+                    mat[q] = [s * x + c * y for x, y in zip(xp, xq)]
+        if not rotated:
+            break
+    return w, v
+
+
+def _jacobi_eigh(rows: List[List[float]], tol: float,
+                 max_sweeps: int) -> Tuple[List[float], List[List[float]]]:
+    """
+    Cyclic Jacobi eigen-decomposition of a symmetric matrix given as rows.
+    
+    Returns the (unsorted) eigenvalues and eigenvectors as columns.
+    """
+    n = len(rows)
+    a = [list(map(float, row)) for row in rows]
+    v = [[1.0 if i == j else 0.0 for j in range(n)] for i in range(n)]
+    total = sum(x * x for row in a for x in row)
+    
+    for _ in range(max_sweeps):
+        off = sum(a[i][j] ** 2 for i in range(n) for j in range(n) if i != j)
+        if off <= tol * tol * total:
+            break
+        for p in range(n - 1):
+            for q in range(p + 1, n):
+                apq = a[p][q]
+                if abs(apq) < 1e-300:
+                    continue
+                theta = (a[q][q] - a[p][p]) / (2.0 * apq)
+                t = math.copysign(1.0, theta) / (abs(theta) + math.sqrt(theta * theta + 1.0))
+                c = 1.0 / math.sqrt(t * t + 1.0)
+                s = t * c
+                # A <- J^T A J, touching only rows/columns p and q
+                for row in a:
+                    x, y = row[p], row[q]
+                    row[p] = c * x - s * y
+                    row[q] = s * x + c * y
+                row_p, row_q = a[p], a[q]
+                a[p] = [c * x - s * y for x, y in zip(row_p, row_q)]
+                a[q] = [s * x + c * y for x, y in zip(row_p, row_q)]
+                for row in v:
+                    x, y = row[p], row[q]
+                    row[p] = c * x - s * y
+                    row[q] = s * x + c * y
+    
+    return [a[i][i] for i in range(n)], [[v[i][j] for i in range(n)] for j in range(n)]
+
+
+class LUFactorization:
+    """
+    PA = LU with partial pivoting.
+    
+    Factoring costs O(n^3) once; every later solve is O(n^2) forward and
+    back substitution, so repeated systems against the same matrix only
+    pay for the substitutions. L (unit lower) and U share one set of rows.
+    """
+    
+    def __init__(self, a: Tensor, tol: float = 1e-10):
+        if a.shape.ndim != 2 or a.shape.dims[0] != a.shape.dims[1]:
+            raise ValueError("LU factorization requires a square matrix")
+        n = a.shape.dims[0]
+        flat = a._buffer().tolist()
+        rows = [[float(v) for v in flat[i * n:(i + 1) * n]] for i in range(n)]
+        perm = list(range(n))
+        sign = 1
+        singular = False
         
-        return (Tensor(u_data, Shape((m, k))),
-                Tensor(s_data, Shape((k,))),
-                Tensor(v_data, Shape((k, n))))
+        for k in range(n):
+            p = max(range(k, n), key=lambda i: abs(rows[i][k]))
+            if p != k:
+                rows[k], rows[p] = rows[p], rows[k]
+                perm[k], perm[p] = perm[p], perm[k]
+                sign = -sign
+            pivot_row = rows[k]
+            pivot = pivot_row[k]
+            if abs(pivot) < tol:
+                singular = True
+                continue
+            tail = pivot_row[k + 1:]
+            for i in range(k + 1, n):
+                row = rows[i]
+                factor = row[k] / pivot
+                if factor:
+                    row[k] = factor
+                    row[k + 1:] = [x - factor * y for x, y in zip(row[k + 1:], tail)]
+        
+        self.n = n
+        self.perm = perm
+        self.sign = sign
+        self.singular = singular
+        self._rows = rows
+    
+    @property
+    def L(self) -> Tensor:
+        """Unit lower-triangular factor."""
+        n = self.n
+        data = [self._rows[i][j] if j < i else (1.0 if i == j else 0.0)
+                for i in range(n) for j in range(n)]
+        return Tensor(data, Shape((n, n)))
+    
+    @property
+    def U(self) -> Tensor:
+        """Upper-triangular factor."""
+        n = self.n
+        data = [self._rows[i][j] if j >= i else 0.0 for i in range(n) for j in range(n)]
+        return Tensor(data, Shape((n, n)))
+    
+    @property
+    def P(self) -> Tensor:
+        """Permutation matrix with PA = LU."""
+        n = self.n
+        data = [1.0 if j == self.perm[i] else 0.0 for i in range(n) for j in range(n)]
+        return Tensor(data, Shape((n, n)))
+    
+    def _substitute(self, b: List[float]) -> List[float]:
+        """Solve LUx = Pb for one right-hand side."""
+        rows = self._rows
+        y = [b[p] for p in self.perm]
+        for i in range(1, self.n):
+            y[i] -= sum(map(mul, rows[i][:i], y[:i]))
+        for i in reversed(range(self.n)):
+            row = rows[i]
+            y[i] = (y[i] - sum(map(mul, row[i + 1:], y[i + 1:]))) / row[i]
+        return y
+    
+    def solve(self, b: Tensor) -> Tensor:
+        """Solve Ax = b for a vector (n,) or for each column of an (n, k) matrix."""
+        if self.singular:
+            raise ValueError("Matrix is singular")
+        if b.shape.dims[0] != self.n or b.shape.ndim not in (1, 2):
+            raise ValueError("Incompatible dimensions")
+        if b.shape.ndim == 1:
+            return Tensor(self._substitute(b._buffer().tolist()))
+        k = b.shape.dims[1]
+        columns = [self._substitute(col) for col in b.T.tolist()]
+        return Tensor(columns, Shape((k, self.n))).T.contiguous()
+    
+    def det(self) -> float:
+        """Determinant: the pivot product with the permutation's sign."""
+        if self.singular:
+            return 0.0
+        result = float(self.sign)
+        for i in range(self.n):
+            result *= self._rows[i][i]
+        return result
+    
+    def slogdet(self) -> Tuple[float, float]:
+        """(sign, log|det|), free of the overflow a plain product hits for large n."""
+        if self.singular:
+            return 0.0, float('-inf')
+        sign = float(self.sign)
+        logabs = 0.0
+        for i in range(self.n):
+            pivot = self._rows[i][i]
+            if pivot < 0:
+                sign = -sign
+            logabs += math.log(abs(pivot))
+        return sign, logabs
+    
+    def logdet(self) -> float:
+        """log(det); nan for a negative determinant, -inf for a singular matrix."""
+        sign, logabs = self.slogdet()
+        return logabs if sign > 0 else (float('-inf') if sign == 0 else float('nan'))
+    
+    def inv(self) -> Tensor:
+        """Inverse, solving against each column of the identity."""
+        if self.singular:
+            raise ValueError("Matrix is singular")
+        n = self.n
+        columns = [self._substitute([1.0 if i == j else 0.0 for i in range(n)]) for j in range(n)]
+        return Tensor(columns, Shape((n, n))).T.contiguous()
@@ -0,0 +1,155 @@
+"""
+THALOS Prime - Tensor Memory Pool
+Size-bucketed reuse of the packed buffers behind tensors.
+
+When the last tensor using a buffer is garbage collected its storage is
+handed back to the pool, and ``zeros``/``empty`` and the matmul kernels
+draw buffers of the same typecode and length from it instead of
+allocating. Idle buffers are capped by ``max_bytes``; counters for
+allocations, reuse hits and peak outstanding bytes are available from
+``get_pool().get_stats()``.
+"""
+
+from typing import Dict, List, Optional, Tuple
+from array import array
+import sys
+import weakref
+
+
+def _itemsize(typecode: str) -> int:
+    return array(typecode).itemsize
+
+
+class BufferPool:
+    """Pool of idle ``array`` buffers keyed by (typecode, length)."""
+    
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, min_elements: int = 16,
+                 enabled: bool = True):
+        self.max_bytes = max_bytes
+        self.min_elements = min_elements
+        self.enabled = enabled
+        self._buckets: Dict[Tuple[str, int], List[array]] = {}
+        self._pooled_bytes = 0
+        # Buffers handed out and not yet returned, tracked weakly so buffers
+        # that are simply dropped still leave the outstanding count
+        self._outstanding: Dict[int, Tuple[weakref.ref, int]] = {}
+        self._outstanding_bytes = 0
+        self.reset_stats()
+    
+    def reset_stats(self) -> None:
+        """Zero the counters (pooled buffers are kept)."""
+        self.allocations = 0
+        self.allocated_bytes = 0
+        self.hits = 0
+        self.releases = 0
+        self.dropped = 0
+        self.peak_bytes = self._outstanding_bytes
+    
+    def acquire(self, typecode: str, size: int, zero: bool = True) -> array:
+        """
+        Get a buffer of `size` elements.
+        
+        Reuses an idle buffer of the same typecode and length when one is
+        pooled. With zero=False a reused buffer keeps its old contents, for
+        callers that overwrite every element. Buffers below `min_elements`
+        bypass the pool.
+        """
+        if not self.enabled or size < self.min_elements:
+            return array(typecode, bytes(size * _itemsize(typecode)))
+        
+        bucket = self._buckets.get((typecode, size))
+        if bucket:
+            buf = bucket.pop()
+            self._pooled_bytes -= len(buf) * buf.itemsize
+            self.hits += 1
+            if zero:
+                memoryview(buf).cast('B')[:] = bytes(len(buf) * buf.itemsize)
+        else:
+            buf = array(typecode, bytes(size * _itemsize(typecode)))
+            self.allocations += 1
+            self.allocated_bytes += len(buf) * buf.itemsize
+        
+        self._track(buf)
+        return buf
+    
+    def release(self, buf: array) -> bool:
+        """
+        Return a buffer nobody else references; True if it was pooled.
+        
+        Buffers below `min_elements` or beyond the `max_bytes` cap are
+        left to the garbage collector.
+        """
+        self._untrack(id(buf))
+        if not self.enabled or len(buf) < self.min_elements:
+            return False
+        
+        nbytes = len(buf) * buf.itemsize
+        if self._pooled_bytes + nbytes > self.max_bytes:
+            self.dropped += 1
+            return False
+        
+        self._buckets.setdefault((buf.typecode, len(buf)), []).append(buf)
+        self._pooled_bytes += nbytes
+        self.releases += 1
+        return True
+    
+    def clear(self) -> None:
+        """Drop every pooled buffer."""
+        self._buckets.clear()
+        self._pooled_bytes = 0
+    
+    def _track(self, buf: array) -> None:
+        key = id(buf)
+        nbytes = len(buf) * buf.itemsize
+        self._outstanding[key] = (weakref.ref(buf, lambda _, key=key: self._untrack(key)), nbytes)
+        self._outstanding_bytes += nbytes
+        if self._outstanding_bytes > self.peak_bytes:
+            self.peak_bytes = self._outstanding_bytes
+    
+    def _untrack(self, key: int) -> None:
+        entry = self._outstanding.pop(key, None)
+        if entry is not None:
+            self._outstanding_bytes -= entry[1]
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Get pool statistics."""
+        return {
+            'allocations': self.allocations,
+            'allocated_bytes': self.allocated_bytes,
+            'hits': self.hits,
+            'releases': self.releases,
+            'dropped': self.dropped,
+            'pooled_buffers': sum(len(bucket) for bucket in self._buckets.values()),
+            'pooled_bytes': self._pooled_bytes,
+            'outstanding_bytes': self._outstanding_bytes,
+            'peak_bytes': self.peak_bytes,
+        }
+
+
+class _Holder:
+    __slots__ = ('item',)
+
+
+def _sole_owner_refcount() -> int:
+    """sys.getrefcount() of an object referenced only by one attribute."""
+    holder = _Holder()
+    holder.item = array('d')
+    return sys.getrefcount(holder.item)
+
+
+# Reference count a tensor's storage reports when that tensor is its only
+# owner (calibrated, since the count includes interpreter temporaries)
+SOLE_OWNER_REFS = _sole_owner_refcount() if hasattr(sys, 'getrefcount') else None
+
+_pool: Optional[BufferPool] = None
+
+
+def get_pool() -> BufferPool:
+    """Process-wide pool, sized from the `compute.pool_max_bytes` setting."""
+    global _pool
+    if _pool is None:
+        from ..config import get_settings
+        settings = get_settings()
+        _pool = BufferPool(max_bytes=settings.get('compute.pool_max_bytes', 64 * 1024 * 1024),
+                           enabled=settings.get('compute.pool_enabled', True))
+    return _pool
@@ -0,0 +1,207 @@
+"""
+THALOS Prime - Sparse Tensor Module
+Compressed sparse row (CSR) matrices for masks and graphs.
+
+A SparseTensor stores only its entries: ``indptr`` marks where each row's
+entries begin in ``indices`` (their columns) and ``values``. Memory and
+the cost of ``matmul`` are O(nnz) instead of O(rows * cols), which suits
+padding and windowed attention masks and sparse connectivity graphs. COO
+triplets are accepted on construction and can be read back with
+``to_coo``.
+"""
+
+from typing import Iterable, List, Optional, Tuple, Union
+from array import array
+from itertools import accumulate, repeat
+
+from .tensor import Tensor, Shape, _TYPECODES, _pack, _result_dtype
+from .backend import get_backend
+
+
+class SparseTensor:
+    """2-D sparse matrix in CSR layout."""
+    
+    def __init__(self, indptr: array, indices: array, values: array,
+                 shape: Tuple[int, int], dtype: str = 'float64'):
+        rows, cols = shape
+        if len(indptr) != rows + 1:
+            raise ValueError(f"indptr needs {rows + 1} entries, got {len(indptr)}")
+        if len(indices) != len(values) or indptr[-1] != len(indices):
+            raise ValueError("indices and values must both hold indptr[-1] entries")
+        self.indptr = indptr if isinstance(indptr, array) and indptr.typecode == 'q' \
+            else array('q', indptr)
+        self.indices = indices if isinstance(indices, array) and indices.typecode == 'q' \
+            else array('q', indices)
+        typecode = _TYPECODES[dtype]
+        self.values = values if isinstance(values, array) and values.typecode == typecode \
+            else _pack(values, typecode)
+        self.shape = Shape((rows, cols))
+        self.dtype = dtype
+    
+    @classmethod
+    def from_coo(cls, rows: Iterable[int], cols: Iterable[int],
+                 values: Optional[Iterable[Union[float, int]]], shape: Tuple[int, int],
+                 dtype: str = 'float64') -> 'SparseTensor':
+        """
+        Build from (row, col, value) triplets.
+        
+        Entries are sorted into row-major order and duplicates are summed.
+        With values=None every entry is 1 (e.g. a bool mask).
+        """
+        rows = list(rows)
+        cols = list(cols)
+        values = [1] * len(rows) if values is None else list(values)
+        if not len(rows) == len(cols) == len(values):
+            raise ValueError("rows, cols and values must have the same length")
+        n_rows, n_cols = shape
+        
+        merged = {}
+        for r, c, v in zip(rows, cols, values):
+            if not (0 <= r < n_rows and 0 <= c < n_cols):
+                raise IndexError(f"Entry ({r}, {c}) out of range for shape {shape}")
+            merged[(r, c)] = merged.get((r, c), 0) + v
+        
+        counts = [0] * n_rows
+        indices = array('q')
+        data = []
+        for (r, c), v in sorted(merged.items()):
+            counts[r] += 1
+            indices.append(c)
+            data.append(v)
+        indptr = array('q', accumulate(counts, initial=0))
+        return cls(indptr, indices, data, (n_rows, n_cols), dtype)
+    
+    @classmethod
+    def from_rows(cls, rows: List[Iterable[int]], n_cols: int,
+                  dtype: str = 'bool') -> 'SparseTensor':
+        """Build a pattern with value 1 at the given (sorted) columns of each row."""
+        indices = array('q')
+        indptr = array('q', (0,))
+        for cols in rows:
+            indices.extend(cols)
+            indptr.append(len(indices))
+        return cls(indptr, indices, _pack(repeat(1, len(indices)), _TYPECODES[dtype]),
+                   (len(rows), n_cols), dtype)
+    
+    @classmethod
+    def from_dense(cls, tensor: Tensor) -> 'SparseTensor':
+        """Keep the nonzero entries of a 2-D tensor."""
+        if tensor.shape.ndim != 2:
+            raise ValueError("SparseTensor requires a 2D tensor")
+        n_rows, n_cols = tensor.shape.dims
+        data = tensor._buffer()
+        indptr = array('q', (0,))
+        indices = array('q')
+        values = array(data.typecode)
+        for r in range(n_rows):
+            base = r * n_cols
+            for c in range(n_cols):
+                v = data[base + c]
+                if v:
+                    indices.append(c)
+                    values.append(v)
+            indptr.append(len(indices))
+        return cls(indptr, indices, values, (n_rows, n_cols), tensor.dtype)
+    
+    @property
+    def nnz(self) -> int:
+        """Number of stored entries."""
+        return len(self.indices)
+    
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the CSR buffers."""
+        return sum(len(buf) * buf.itemsize for buf in (self.indptr, self.indices, self.values))
+    
+    def __repr__(self) -> str:
+        return f"SparseTensor(shape={self.shape}, nnz={self.nnz}, dtype={self.dtype})"
+    
+    def row(self, i: int) -> Tuple[array, array]:
+        """Columns and values stored in row i."""
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return self.indices[start:end], self.values[start:end]
+    
+    def to_coo(self) -> Tuple[array, array, array]:
+        """(rows, cols, values) triplets in row-major order."""
+        rows = array('q')
+        for r in range(self.shape.dims[0]):
+            rows.extend(repeat(r, self.indptr[r + 1] - self.indptr[r]))
+        return rows, self.indices[:], self.values[:]
+    
+    def to_dense(self) -> Tensor:
+        """Expand into a dense tensor."""
+        n_rows, n_cols = self.shape.dims
+        out = array(self.values.typecode, bytes(n_rows * n_cols * self.values.itemsize))
+        for r in range(n_rows):
+            base = r * n_cols
+            for k in range(self.indptr[r], self.indptr[r + 1]):
+                out[base + self.indices[k]] += self.values[k]
+        return Tensor(out, Shape((n_rows, n_cols)), self.dtype)
+    
+    def transpose(self) -> 'SparseTensor':
+        """CSR of the transposed matrix (a counting sort by column)."""
+        n_rows, n_cols = self.shape.dims
+        counts = [0] * n_cols
+        for c in self.indices:
+            counts[c] += 1
+        indptr = array('q', accumulate(counts, initial=0))
+        
+        cursor = list(indptr[:-1])
+        indices = array('q', bytes(8 * self.nnz))
+        values = array(self.values.typecode, bytes(self.values.itemsize * self.nnz))
+        for r in range(n_rows):
+            for k in range(self.indptr[r], self.indptr[r + 1]):
+                c = self.indices[k]
+                dst = cursor[c]
+                indices[dst] = r
+                values[dst] = self.values[k]
+                cursor[c] = dst + 1
+        return SparseTensor(indptr, indices, values, (n_cols, n_rows), self.dtype)
+    
+    @property
+    def T(self) -> 'SparseTensor':
+        """Transpose."""
+        return self.transpose()
+    
+    def matmul(self, other: Tensor) -> Tensor:
+        """Sparse (m, k) @ dense (k, n) or (k,) in O(nnz * n)."""
+        vec = other.shape.ndim == 1
+        if other.shape.ndim not in (1, 2) or other.shape.dims[0] != self.shape.dims[1]:
+            raise ValueError(f"Incompatible shapes for matmul: {self.shape} @ {other.shape}")
+        n = 1 if vec else other.shape.dims[1]
+        dtype = _result_dtype(self.dtype, other.dtype, 'mul')
+        data = get_backend().spmm(self.indptr, self.indices, self.values, other._buffer(),
+                                  self.shape.dims[0], n, _TYPECODES[dtype])
+        m = self.shape.dims[0]
+        return Tensor(data, Shape((m,) if vec else (m, n)), dtype)
+    
+    def __matmul__(self, other: Tensor) -> Tensor:
+        return self.matmul(other)
+    
+    def apply_mask(self, scores: Tensor, fill: float = -1e9) -> Tensor:
+        """
+        Use the sparsity pattern as an attention mask.
+        
+        Returns a copy of `scores` (..., rows, cols) where every position
+        this tensor does not store (or stores as zero) is set to `fill`.
+        Leading dimensions of `scores` share the mask. Only the kept
+        positions are touched after the fill, so the work beyond the
+        output allocation is O(nnz) per matrix.
+        """
+        n_rows, n_cols = self.shape.dims
+        if scores.shape.dims[-2:] != (n_rows, n_cols):
+            raise ValueError(f"Mask of shape {self.shape} does not match scores {scores.shape}")
+        dtype = _result_dtype(scores.dtype, fill, 'add')
+        src = scores._buffer()
+        if src.typecode != _TYPECODES[dtype]:
+            src = _pack(src, _TYPECODES[dtype])
+        out = _pack((fill,), src.typecode) * len(src)
+        
+        block = n_rows * n_cols
+        kept = [r * n_cols + self.indices[k]
+                for r in range(n_rows) for k in range(self.indptr[r], self.indptr[r + 1])
+                if self.values[k]]
+        for base in range(0, len(src), block):
+            for i in kept:
+                out[base + i] = src[base + i]
+        return Tensor(out, Shape(scores.shape.dims), dtype)
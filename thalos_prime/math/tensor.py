@@ -4,8 +4,87 @@ N-dimensional tensor operations with full broadcasting support.
 """
 
 from typing import List, Tuple, Union, Optional
+from array import array
+import heapq
 import math
 import random
+from sys import getrefcount
+from .backend import get_backend, _broadcast_plan
+from . import memory as _memory
+from .memory import get_pool
+
+
+# array typecodes backing each supported dtype
+_TYPECODES = {
+    'float64': 'd',
+    'float32': 'f',
+    'int64': 'q',
+    'int32': 'i',
+    'bool': 'B',
+}
+
+_DTYPES = {code: dtype for dtype, code in _TYPECODES.items()}
+
+# Shared empty buffers standing in for the storage of meta tensors
+_META_STORAGE = {code: array(code) for code in _TYPECODES.values()}
+
+# Promotion order: mixing two dtypes yields the later one
+_DTYPE_ORDER = ('bool', 'int32', 'int64', 'float32', 'float64')
+
+_FLOAT_DTYPES = ('float32', 'float64')
+
+_COMPARE_OPS = ('eq', 'ne', 'lt', 'le', 'gt', 'ge')
+
+# Unary ops whose result is fractional even for integer inputs
+_FLOAT_UNARY_OPS = ('sqrt', 'exp', 'log', 'sigmoid', 'tanh', 'gelu', 'swish')
+
+
+def _pack(values, typecode: str) -> array:
+    """Pack a sequence into a buffer of `typecode`, truncating floats for integer storage."""
+    if typecode == 'B':
+        if isinstance(values, array) and values.typecode == 'B':
+            return array('B', values)
+        return array('B', map(bool, values))
+    if typecode in 'df' or (isinstance(values, array) and values.typecode not in 'df'):
+        return array(typecode, values)
+    return array(typecode, map(int, values))
+
+
+def _promote(dtype_a: str, dtype_b: str) -> str:
+    """Common dtype of two tensors."""
+    if dtype_a == dtype_b:
+        return dtype_a
+    return max(dtype_a, dtype_b, key=_DTYPE_ORDER.index)
+
+
+def _result_dtype(dtype: str, other: Union[str, float, int, bool], op: str) -> str:
+    """
+    Dtype of op(tensor, other), where `other` is a dtype or a Python scalar.
+    
+    Scalars adopt the tensor's dtype unless a float meets integer storage.
+    Comparisons yield bool, true division of integers yields float64 and
+    arithmetic on bools counts in int64.
+    """
+    if op in _COMPARE_OPS:
+        return 'bool'
+    if isinstance(other, str):
+        dtype = _promote(dtype, other)
+    elif isinstance(other, float) and dtype not in _FLOAT_DTYPES:
+        dtype = 'float64'
+    if dtype in _FLOAT_DTYPES:
+        return dtype
+    if op == 'div' or (op == 'pow' and not (isinstance(other, int) and other >= 0)):
+        return 'float64'
+    return 'int64' if dtype == 'bool' else dtype
+
+
+def _unary_dtype(dtype: str, op: str) -> str:
+    """Dtype of an element-wise function applied to `dtype`."""
+    if dtype in _FLOAT_DTYPES:
+        return dtype
+    if op in _FLOAT_UNARY_OPS:
+        return 'float64'
+    return 'int64' if dtype == 'bool' else dtype
 
 
 class Shape:
@@ -66,36 +145,84 @@ class Shape:
         return Shape(tuple(result))
 
 
+def _contiguous_strides(dims: Tuple[int, ...]) -> Tuple[int, ...]:
+    """Row-major strides (in elements) for the given dimensions."""
+    strides = []
+    stride = 1
+    for d in reversed(dims):
+        strides.append(stride)
+        stride *= d
+    return tuple(reversed(strides))
+
+
 class Tensor:
-    """N-dimensional tensor with full operation support."""
+    """N-dimensional tensor with full operation support.
+    
+    Elements live in a packed ``array`` buffer whose typecode follows the
+    dtype: 'float64' (the default for Python data), 'float32', 'int64',
+    'int32' or 'bool'. Tensors produced by
+    ``reshape``, ``transpose``, ``narrow`` and integer/slice indexing are
+    views that share that buffer through an offset and per-dimension
+    strides. ``data`` always returns a flat row-major buffer: the storage
+    itself for a contiguous tensor, or a gathered copy for a strided view.
+    The view stays attached to its base, but writes to that copy do not
+    reach the view; use indexing or the in-place ops instead.
+    """
     
-    def __init__(self, data: Union[List, float, int], shape: Optional[Shape] = None):
+    def __init__(self, data: Union[List, array, float, int], shape: Optional[Shape] = None,
+                 dtype: Optional[str] = None):
+        if dtype is None:
+            if isinstance(data, Tensor):
+                dtype = data.dtype
+            elif isinstance(data, array):
+                dtype = _DTYPES.get(data.typecode, 'float64')
+            else:
+                dtype = 'float64'
+        if dtype not in _TYPECODES:
+            raise ValueError(f"Unsupported dtype: {dtype}")
+        self.dtype = dtype
+        typecode = _TYPECODES[dtype]
+        
         if isinstance(data, (int, float)):
-            self.data = [float(data)]
+            self.data = _pack((data,), typecode)
             self.shape = Shape((1,))
-        elif isinstance(data, list):
-            self.data = self._flatten(data)
+        elif isinstance(data, array):
+            # Adopt buffers of the right type instead of copying them
+            self.data = data if data.typecode == typecode else _pack(data, typecode)
+            self.shape = shape if shape is not None else Shape((len(data),))
+        elif isinstance(data, (list, tuple)):
+            self.data = self._flatten(data, typecode)
             if shape is not None:
                 self.shape = shape
             else:
                 self.shape = Shape(self._infer_shape(data))
         elif isinstance(data, Tensor):
-            self.data = data.data.copy()
+            src = data._gather()
+            self.data = src if src.typecode == typecode else _pack(src, typecode)
             self.shape = data.shape
         else:
             raise TypeError(f"Cannot create Tensor from {type(data)}")
     
-    def _flatten(self, data: Union[List, float, int]) -> List[float]:
-        """Flatten nested list to 1D."""
-        if isinstance(data, (int, float)):
-            return [float(data)]
-        result = []
-        for item in data:
-            if isinstance(item, (list, tuple)):
-                result.extend(self._flatten(item))
-            else:
-                result.append(float(item))
-        return result
+    def __del__(self):
+        # Hand storage no other tensor or caller references back to the pool
+        try:
+            pool = _memory._pool
+            if pool is not None and getrefcount(self._storage) == _memory.SOLE_OWNER_REFS:
+                pool.release(self._storage)
+        except Exception:
+            pass
+    
+    def _flatten(self, data: Union[List, float, int], typecode: str = 'd') -> array:
+        """Flatten nested list into a packed buffer."""
+        if data and isinstance(data[0], (list, tuple)):
+            result = array(typecode)
+            for item in data:
+                if isinstance(item, (list, tuple)):
+                    result.extend(self._flatten(item, typecode))
+                else:
+                    result.extend(_pack((item,), typecode))
+            return result
+        return _pack(data, typecode)
     
     def _infer_shape(self, data: Union[List, float, int]) -> Tuple[int, ...]:
         """Infer shape from nested list."""
@@ -109,116 +236,427 @@ class Tensor:
             shape.extend(inner_shape)
         return tuple(shape)
     
+    # ------------------------------------------------------------------
+    # Storage and views
+    # ------------------------------------------------------------------
+    
+    @property
+    def data(self) -> array:
+        """
+        Flat row-major buffer of the tensor's elements.
+        
+        For a contiguous tensor this is its storage. For a strided view it
+        is a gathered copy, so the view stays attached to its base: write
+        through indexing or the in-place ops rather than into the copy.
+        """
+        return self._buffer()
+    
+    @data.setter
+    def data(self, value: array) -> None:
+        self._storage = value
+        self._offset = 0
+        self._strides = None
+        self._version = [self._version[0] + 1] if hasattr(self, '_version') else [0]
+    
+    @property
+    def is_meta(self) -> bool:
+        """True for a tensor that records only shape and dtype (see `meta`)."""
+        return self._storage is _META_STORAGE[self._storage.typecode]
+    
+    @property
+    def version(self) -> int:
+        """Counter of in-place modifications, shared with views of the same storage."""
+        return self._version[0]
+    
+    def bump_version(self) -> None:
+        """Record an in-place modification made through `data`.
+        
+        Layers that cache derived layouts of a tensor (such as a transposed
+        weight) rebuild them when the version changes.
+        """
+        self._version[0] += 1
+    
+    @property
+    def strides(self) -> Tuple[int, ...]:
+        """Element strides for each dimension."""
+        if self._strides is None:
+            return _contiguous_strides(self.shape.dims)
+        return self._strides
+    
+    def _view(self, dims: Tuple[int, ...], strides: Tuple[int, ...], offset: int) -> 'Tensor':
+        """Create a tensor sharing this tensor's storage."""
+        view = Tensor.__new__(Tensor)
+        view.dtype = self.dtype
+        view.shape = Shape(dims)
+        view._storage = self._storage
+        view._version = self._version
+        view._offset = offset
+        if (offset == 0 and strides == _contiguous_strides(dims)
+                and len(self._storage) == view.shape.numel):
+            view._strides = None
+        else:
+            view._strides = strides
+        return view
+    
+    def is_contiguous(self) -> bool:
+        """Whether elements are laid out densely in row-major order."""
+        if self._strides is None:
+            return True
+        for d, s, expected in zip(self.shape.dims, self._strides,
+                                  _contiguous_strides(self.shape.dims)):
+            if d != 1 and s != expected:
+                return False
+        return True
+    
+    def shares_storage(self, other: 'Tensor') -> bool:
+        """Whether both tensors are backed by the same buffer."""
+        return self._storage is other._storage
+    
+    def _row_starts(self) -> List[int]:
+        """Storage offsets of every row along the last dimension."""
+        starts = [self._offset]
+        for size, stride in zip(self.shape.dims[:-1], self.strides[:-1]):
+            starts = [s + i * stride for s in starts for i in range(size)]
+        return starts
+    
+    def _gather(self) -> array:
+        """Copy the addressed elements into a new row-major buffer."""
+        storage = self._storage
+        if self._strides is None:
+            return storage[:]
+        numel = self.shape.numel
+        if self.is_contiguous():
+            return storage[self._offset:self._offset + numel]
+        
+        n = self.shape.dims[-1]
+        step = self._strides[-1]
+        out = array(storage.typecode)
+        if step > 0:
+            for s in self._row_starts():
+                out += storage[s:s + n * step:step]
+        else:
+            for s in self._row_starts():
+                out.extend([storage[s + i * step] for i in range(n)])
+        return out
+    
+    def contiguous(self) -> 'Tensor':
+        """Return a tensor with its own dense storage (self if already dense)."""
+        if self._strides is None:
+            return self
+        return Tensor(self._gather(), Shape(self.shape.dims), self.dtype)
+    
+    def copy_(self, src: Union['Tensor', float, int]) -> 'Tensor':
+        """Copy values from src into the elements this tensor addresses."""
+        storage = self._storage
+        numel = self.shape.numel
+        if isinstance(src, (int, float)):
+            src_data = _pack((src,), storage.typecode) * numel
+        else:
+            if src.shape.numel != numel:
+                raise ValueError(f"Cannot copy {src.shape} into {self.shape}")
+            src_data = src._storage if src._strides is None else src._gather()
+            if src_data.typecode != storage.typecode:
+                src_data = _pack(src_data, storage.typecode)
+        
+        self._version[0] += 1
+        if self.is_contiguous():
+            storage[self._offset:self._offset + numel] = src_data
+            return self
+        
+        n = self.shape.dims[-1]
+        step = self._strides[-1]
+        for r, s in enumerate(self._row_starts()):
+            chunk = src_data[r * n:(r + 1) * n]
+            if step > 0:
+                storage[s:s + n * step:step] = chunk
+            else:
+                for i in range(n):
+                    storage[s + i * step] = chunk[i]
+        return self
+    
+    def expand(self, *dims) -> 'Tensor':
+        """Broadcast view to `dims`; size-1 dimensions repeat with stride 0."""
+        if len(dims) == 1 and isinstance(dims[0], (list, tuple)):
+            dims = tuple(dims[0])
+        lead = len(dims) - self.shape.ndim
+        if lead < 0:
+            raise ValueError(f"Cannot expand {self.shape} to {dims}")
+        src_dims = (1,) * lead + self.shape.dims
+        src_strides = (0,) * lead + self.strides
+        
+        new_dims = []
+        new_strides = []
+        for d, src, stride in zip(dims, src_dims, src_strides):
+            if d == -1 or d == src:
+                new_dims.append(src)
+                new_strides.append(stride)
+            elif src == 1:
+                new_dims.append(d)
+                new_strides.append(0)
+            else:
+                raise ValueError(f"Cannot expand {self.shape} to {dims}")
+        return self._view(tuple(new_dims), tuple(new_strides), self._offset)
+    
+    def narrow(self, dim: int, start: int, length: int) -> 'Tensor':
+        """View of `length` entries along `dim`, beginning at `start`."""
+        if dim < 0:
+            dim += self.shape.ndim
+        if start < 0 or start + length > self.shape.dims[dim]:
+            raise ValueError(f"narrow({dim}, {start}, {length}) out of range for {self.shape}")
+        strides = self.strides
+        dims = list(self.shape.dims)
+        dims[dim] = length
+        return self._view(tuple(dims), strides, self._offset + start * strides[dim])
+    
     def __repr__(self) -> str:
+        if self.dtype != 'float64':
+            return f"Tensor(shape={self.shape}, dtype={self.dtype})"
         return f"Tensor(shape={self.shape})"
     
     def __len__(self) -> int:
         return self.shape.dims[0] if self.shape.ndim > 0 else 1
     
     def __getitem__(self, idx):
+        dims = self.shape.dims
         if isinstance(idx, int):
-            if self.shape.ndim == 1:
-                return self.data[idx]
-            else:
-                stride = self.shape.numel // self.shape.dims[0]
-                start = idx * stride
-                end = start + stride
-                new_shape = Shape(self.shape.dims[1:])
-                return Tensor(self.data[start:end], new_shape)
+            if idx < 0:
+                idx += dims[0]
+            if not 0 <= idx < dims[0]:
+                raise IndexError("Tensor index out of range")
+            strides = self.strides
+            offset = self._offset + idx * strides[0]
+            if len(dims) == 1:
+                return self._storage[offset]
+            return self._view(dims[1:], strides[1:], offset)
+        if isinstance(idx, slice):
+            start, stop, step = idx.indices(dims[0])
+            strides = self.strides
+            length = len(range(start, stop, step))
+            return self._view((length,) + dims[1:], (strides[0] * step,) + strides[1:],
+                              self._offset + start * strides[0])
         return self.data[idx]
     
     def __setitem__(self, idx, value):
         if isinstance(idx, int):
-            if isinstance(value, (int, float)):
-                self.data[idx] = float(value)
-            elif isinstance(value, Tensor):
-                stride = self.shape.numel // self.shape.dims[0]
-                start = idx * stride
-                for i, v in enumerate(value.data):
-                    self.data[start + i] = v
-    
-    def _broadcast_op(self, other: 'Tensor', op) -> 'Tensor':
-        """Perform element-wise operation with broadcasting."""
-        if not isinstance(other, Tensor):
-            other = Tensor(other)
-        
-        new_shape = self.shape.broadcast_with(other.shape)
-        new_data = []
-        
-        for i in range(new_shape.numel):
-            idx1 = self._broadcast_index(i, self.shape, new_shape)
-            idx2 = self._broadcast_index(i, other.shape, new_shape)
-            new_data.append(op(self.data[idx1], other.data[idx2]))
+            if self.shape.ndim == 1:
+                if idx < 0:
+                    idx += self.shape.dims[0]
+                if not 0 <= idx < self.shape.dims[0]:
+                    raise IndexError("Tensor index out of range")
+                if self.dtype not in _FLOAT_DTYPES:
+                    value = bool(value) if self.dtype == 'bool' else int(value)
+                self._storage[self._offset + idx * self.strides[0]] = value
+                self._version[0] += 1
+            else:
+                self[idx].copy_(value)
+    
+    def _buffer(self) -> array:
+        """Row-major buffer of this tensor's elements, without detaching a view."""
+        return self._storage if self._strides is None else self._gather()
+    
+    @staticmethod
+    def _check_out(out: 'Tensor', dims: Tuple[int, ...]) -> Optional[array]:
+        """
+        Validate an output tensor for a result of shape `dims`.
         
-        return Tensor(new_data, new_shape)
-    
-    def _broadcast_index(self, flat_idx: int, src_shape: Shape, dst_shape: Shape) -> int:
-        """Compute source index for broadcasting."""
-        # Convert flat index to multi-dimensional index in dst shape
-        indices = []
-        remaining = flat_idx
-        for dim in reversed(dst_shape.dims):
-            indices.append(remaining % dim)
-            remaining //= dim
-        indices = list(reversed(indices))
+        Returns its storage when kernels can write into it directly, or None
+        when the result must be copied into a strided view afterwards.
+        """
+        if out.shape.dims != tuple(dims):
+            raise ValueError(f"Output shape {out.shape} does not match result shape {Shape(dims)}")
+        return out._storage if out._strides is None else None
+    
+    @staticmethod
+    def _finish_out(out: 'Tensor', buf: Optional[array], data: array) -> 'Tensor':
+        """Publish a result computed for `out` (see _check_out)."""
+        if buf is None:
+            return out.copy_(Tensor(data, Shape(out.shape.dims), out.dtype))
+        if data is not buf:
+            buf[:] = data
+        out.bump_version()
+        return out
+    
+    def _broadcast_op(self, other: Union['Tensor', float, int], op: str,
+                      reflected: bool = False, out: Optional['Tensor'] = None) -> 'Tensor':
+        """Perform element-wise operation with broadcasting.
         
-        # Adjust for broadcasting
-        src_indices = []
-        offset = len(dst_shape.dims) - len(src_shape.dims)
-        for i, dim in enumerate(src_shape.dims):
-            dst_idx = indices[i + offset]
-            src_indices.append(0 if dim == 1 else dst_idx)
+        Computes op(self, other), or op(other, self) when `reflected`,
+        on the active compute backend. The result dtype follows
+        _result_dtype. With `out`, the result is written into that tensor
+        (which must have the broadcast shape) and it is returned instead of
+        a new tensor; a fractional result cannot be written into integer
+        storage.
+        """
+        if isinstance(other, (int, float)):
+            b, dims_b = other, None
+            dtype = _result_dtype(self.dtype, other, op)
+        else:
+            if isinstance(other, _lazy.LazyTensor):
+                # Let the lazy operand's reflected operator extend its graph
+                return NotImplemented
+            if not isinstance(other, Tensor):
+                other = Tensor(other)
+            b, dims_b = other._buffer(), other.shape.dims
+            dtype = _result_dtype(self.dtype, other.dtype, op)
         
-        # Convert back to flat index
-        flat = 0
-        stride = 1
-        for i in reversed(range(len(src_shape.dims))):
-            flat += src_indices[i] * stride
-            stride *= src_shape.dims[i]
+        if out is None:
+            data, dims = get_backend().binary(op, self._buffer(), self.shape.dims, b, dims_b,
+                                              reflected, _TYPECODES[dtype])
+            return Tensor(data, Shape(dims), dtype)
         
-        return flat
+        if dtype in _FLOAT_DTYPES and out.dtype not in _FLOAT_DTYPES:
+            raise TypeError(f"Cannot write a {dtype} result into a {out.dtype} tensor")
+        dims = self.shape.dims if dims_b is None else _broadcast_plan(self.shape.dims, dims_b)[0]
+        buf = self._check_out(out, dims)
+        data, _ = get_backend().binary(op, self._buffer(), self.shape.dims, b, dims_b, reflected,
+                                       _TYPECODES[out.dtype], buf)
+        return self._finish_out(out, buf, data)
+    
+    def lazy(self) -> 'LazyTensor':
+        """Start a deferred elementwise expression (see thalos_prime.math.lazy)."""
+        return _lazy.LazyTensor.leaf(self)
+    
+    def _unary_op(self, op: str) -> 'Tensor':
+        """Apply an element-wise function on the active compute backend."""
+        dtype = _unary_dtype(self.dtype, op)
+        return Tensor(get_backend().unary(op, self._buffer(), _TYPECODES[dtype]),
+                      Shape(self.shape.dims), dtype)
+    
+    def eq(self, other) -> 'Tensor':
+        """Element-wise self == other as a bool tensor."""
+        return self._broadcast_op(other, 'eq')
+    
+    def ne(self, other) -> 'Tensor':
+        """Element-wise self != other as a bool tensor."""
+        return self._broadcast_op(other, 'ne')
+    
+    def lt(self, other) -> 'Tensor':
+        """Element-wise self < other as a bool tensor."""
+        return self._broadcast_op(other, 'lt')
+    
+    def le(self, other) -> 'Tensor':
+        """Element-wise self <= other as a bool tensor."""
+        return self._broadcast_op(other, 'le')
+    
+    def gt(self, other) -> 'Tensor':
+        """Element-wise self > other as a bool tensor."""
+        return self._broadcast_op(other, 'gt')
+    
+    def ge(self, other) -> 'Tensor':
+        """Element-wise self >= other as a bool tensor."""
+        return self._broadcast_op(other, 'ge')
+    
+    def __lt__(self, other) -> 'Tensor':
+        return self.lt(other)
+    
+    def __le__(self, other) -> 'Tensor':
+        return self.le(other)
+    
+    def __gt__(self, other) -> 'Tensor':
+        return self.gt(other)
+    
+    def __ge__(self, other) -> 'Tensor':
+        return self.ge(other)
+    
+    def masked_fill(self, mask: 'Tensor', value: Union[float, int]) -> 'Tensor':
+        """Copy of self with `value` wherever the (broadcast) mask is nonzero."""
+        dtype = _result_dtype(self.dtype, value, 'add')
+        data = get_backend().masked_fill(self._buffer(), self.shape.dims, mask._buffer(),
+                                         mask.shape.dims, value, _TYPECODES[dtype])
+        return Tensor(data, Shape(self.shape.dims), dtype)
+    
+    def add(self, other, out: Optional['Tensor'] = None) -> 'Tensor':
+        """self + other, optionally written into `out`."""
+        return self._broadcast_op(other, 'add', out=out)
+    
+    def sub(self, other, out: Optional['Tensor'] = None) -> 'Tensor':
+        """self - other, optionally written into `out`."""
+        return self._broadcast_op(other, 'sub', out=out)
+    
+    def mul(self, other, out: Optional['Tensor'] = None) -> 'Tensor':
+        """self * other, optionally written into `out`."""
+        return self._broadcast_op(other, 'mul', out=out)
+    
+    def div(self, other, out: Optional['Tensor'] = None) -> 'Tensor':
+        """self / other, optionally written into `out`."""
+        return self._broadcast_op(other, 'div', out=out)
+    
+    def add_(self, other) -> 'Tensor':
+        """In-place self += other; other must broadcast to self's shape."""
+        return self._broadcast_op(other, 'add', out=self)
+    
+    def sub_(self, other) -> 'Tensor':
+        """In-place self -= other."""
+        return self._broadcast_op(other, 'sub', out=self)
+    
+    def mul_(self, other) -> 'Tensor':
+        """In-place self *= other."""
+        return self._broadcast_op(other, 'mul', out=self)
+    
+    def div_(self, other) -> 'Tensor':
+        """In-place self /= other."""
+        return self._broadcast_op(other, 'div', out=self)
+    
+    def __iadd__(self, other) -> 'Tensor':
+        return self.add_(other)
+    
+    def __isub__(self, other) -> 'Tensor':
+        return self.sub_(other)
+    
+    def __imul__(self, other) -> 'Tensor':
+        return self.mul_(other)
+    
+    def __itruediv__(self, other) -> 'Tensor':
+        return self.div_(other)
     
     def __add__(self, other) -> 'Tensor':
-        return self._broadcast_op(other if isinstance(other, Tensor) else Tensor(other), 
-                                  lambda a, b: a + b)
+        return self._broadcast_op(other, 'add')
     
     def __radd__(self, other) -> 'Tensor':
-        return self.__add__(other)
+        return self._broadcast_op(other, 'add', reflected=True)
     
     def __sub__(self, other) -> 'Tensor':
-        return self._broadcast_op(other if isinstance(other, Tensor) else Tensor(other), 
-                                  lambda a, b: a - b)
+        return self._broadcast_op(other, 'sub')
     
     def __rsub__(self, other) -> 'Tensor':
-        return Tensor(other).__sub__(self)
+        return self._broadcast_op(other, 'sub', reflected=True)
     
     def __mul__(self, other) -> 'Tensor':
-        return self._broadcast_op(other if isinstance(other, Tensor) else Tensor(other), 
-                                  lambda a, b: a * b)
+        return self._broadcast_op(other, 'mul')
     
     def __rmul__(self, other) -> 'Tensor':
-        return self.__mul__(other)
+        return self._broadcast_op(other, 'mul', reflected=True)
     
     def __truediv__(self, other) -> 'Tensor':
-        return self._broadcast_op(other if isinstance(other, Tensor) else Tensor(other), 
-                                  lambda a, b: a / b if b != 0 else 0.0)
+        return self._broadcast_op(other, 'div')
     
     def __rtruediv__(self, other) -> 'Tensor':
-        return Tensor(other).__truediv__(self)
+        return self._broadcast_op(other, 'div', reflected=True)
     
     def __neg__(self) -> 'Tensor':
-        return Tensor([-x for x in self.data], self.shape)
+        return self._unary_op('neg')
     
     def __pow__(self, exponent) -> 'Tensor':
-        if isinstance(exponent, (int, float)):
-            return Tensor([x ** exponent for x in self.data], self.shape)
-        return self._broadcast_op(exponent, lambda a, b: a ** b)
+        return self._broadcast_op(exponent, 'pow')
+    
+    def __matmul__(self, other: 'Tensor') -> 'Tensor':
+        return matmul(self, other)
+    
+    def __rmatmul__(self, other: 'Tensor') -> 'Tensor':
+        return matmul(Tensor(other), self)
     
     def reshape(self, *new_shape) -> 'Tensor':
-        """Reshape tensor to new dimensions."""
+        """Reshape tensor to new dimensions (a view when the layout allows)."""
         if len(new_shape) == 1 and isinstance(new_shape[0], (list, tuple)):
             new_shape = tuple(new_shape[0])
         
+        if -1 in new_shape:
+            known = 1
+            for d in new_shape:
+                if d != -1:
+                    known *= d
+            new_shape = tuple(self.shape.numel // known if d == -1 else d for d in new_shape)
+        
         new_numel = 1
         for d in new_shape:
             new_numel *= d
@@ -226,45 +664,39 @@ class Tensor:
         if new_numel != self.shape.numel:
             raise ValueError(f"Cannot reshape {self.shape} to {new_shape}")
         
-        return Tensor(self.data.copy(), Shape(new_shape))
+        source = self if self.is_contiguous() else self.contiguous()
+        return source._view(tuple(new_shape), _contiguous_strides(tuple(new_shape)),
+                            source._offset)
     
     def flatten(self) -> 'Tensor':
         """Flatten tensor to 1D."""
-        return Tensor(self.data.copy(), Shape((len(self.data),)))
+        return self.reshape(self.shape.numel)
     
     def transpose(self, dim0: int = 0, dim1: int = 1) -> 'Tensor':
-        """Transpose two dimensions."""
-        if self.shape.ndim < 2:
-            return Tensor(self.data.copy(), self.shape)
+        """Transpose two dimensions (returns a view)."""
+        ndim = self.shape.ndim
+        if ndim < 2:
+            return self._view(self.shape.dims, self.strides, self._offset)
         
+        dim0 %= ndim
+        dim1 %= ndim
         new_dims = list(self.shape.dims)
+        new_strides = list(self.strides)
         new_dims[dim0], new_dims[dim1] = new_dims[dim1], new_dims[dim0]
-        new_shape = Shape(tuple(new_dims))
-        
-        new_data = [0.0] * len(self.data)
-        
-        for i in range(len(self.data)):
-            # Convert to multi-dimensional index
-            indices = []
-            remaining = i
-            for dim in reversed(self.shape.dims):
-                indices.append(remaining % dim)
-                remaining //= dim
-            indices = list(reversed(indices))
-            
-            # Swap dimensions
-            indices[dim0], indices[dim1] = indices[dim1], indices[dim0]
-            
-            # Convert back to flat index with new shape
-            new_idx = 0
-            stride = 1
-            for j in reversed(range(len(new_dims))):
-                new_idx += indices[j] * stride
-                stride *= new_dims[j]
-            
-            new_data[new_idx] = self.data[i]
-        
-        return Tensor(new_data, new_shape)
+        new_strides[dim0], new_strides[dim1] = new_strides[dim1], new_strides[dim0]
+        return self._view(tuple(new_dims), tuple(new_strides), self._offset)
+    
+    def permute(self, *dims) -> 'Tensor':
+        """Reorder dimensions (returns a view)."""
+        if len(dims) == 1 and isinstance(dims[0], (list, tuple)):
+            dims = tuple(dims[0])
+        ndim = self.shape.ndim
+        order = [d % ndim for d in dims]
+        if sorted(order) != list(range(ndim)):
+            raise ValueError(f"Invalid permutation {dims} for {ndim}D tensor")
+        strides = self.strides
+        return self._view(tuple(self.shape.dims[d] for d in order),
+                          tuple(strides[d] for d in order), self._offset)
     
     @property
     def T(self) -> 'Tensor':
@@ -272,51 +704,29 @@ class Tensor:
         return self.transpose(0, 1)
     
     def sum(self, dim: Optional[int] = None, keepdim: bool = False) -> 'Tensor':
-        """Sum along dimension or all elements."""
+        """Sum along dimension or all elements (bools are counted in int64)."""
+        if self.dtype == 'bool':
+            return self.astype('int64').sum(dim, keepdim)
         if dim is None:
-            return Tensor(sum(self.data))
+            return Tensor(sum(self._buffer()), dtype=self.dtype)
         
         if dim < 0:
             dim = self.shape.ndim + dim
         
         new_dims = list(self.shape.dims)
-        reduce_size = new_dims[dim]
-        
-        # Compute strides
-        stride = 1
-        for i in range(dim + 1, self.shape.ndim):
-            stride *= self.shape.dims[i]
-        
-        outer_size = 1
-        for i in range(dim):
-            outer_size *= self.shape.dims[i]
-        
         if keepdim:
             new_dims[dim] = 1
         else:
             new_dims.pop(dim)
         
-        new_numel = 1
-        for d in new_dims:
-            new_numel *= d
-        
-        new_data = [0.0] * new_numel
-        
-        for outer in range(outer_size):
-            for inner in range(stride):
-                total = 0.0
-                for r in range(reduce_size):
-                    idx = outer * reduce_size * stride + r * stride + inner
-                    total += self.data[idx]
-                out_idx = outer * stride + inner
-                new_data[out_idx] = total
+        new_data = get_backend().reduce_sum(self._buffer(), self.shape.dims, dim)
         
-        return Tensor(new_data, Shape(tuple(new_dims)) if new_dims else Shape((1,)))
+        return Tensor(new_data, Shape(tuple(new_dims)) if new_dims else Shape((1,)), self.dtype)
     
     def mean(self, dim: Optional[int] = None, keepdim: bool = False) -> 'Tensor':
         """Mean along dimension or all elements."""
         if dim is None:
-            return Tensor(sum(self.data) / len(self.data))
+            return Tensor(sum(self._buffer()) / self.shape.numel)
         
         s = self.sum(dim=dim, keepdim=keepdim)
         count = self.shape.dims[dim if dim >= 0 else self.shape.ndim + dim]
@@ -326,72 +736,251 @@ class Tensor:
         """Standard deviation."""
         mean_val = self.mean(dim=dim, keepdim=True)
         if dim is None:
-            variance = sum((x - mean_val.data[0]) ** 2 for x in self.data) / len(self.data)
+            data = self._buffer()
+            variance = sum((x - mean_val.data[0]) ** 2 for x in data) / len(data)
             return Tensor(math.sqrt(variance))
         
         diff = self - mean_val
         squared = diff * diff
         return squared.mean(dim=dim, keepdim=keepdim) ** 0.5
     
-    def min(self, dim: Optional[int] = None) -> 'Tensor':
-        """Minimum value."""
+    def _lanes(self, dim: int) -> Tuple[int, Tuple[int, ...], List[List[float]]]:
+        """
+        Split the tensor into 1-D lanes along `dim`.
+        
+        Returns the normalized dim, the shape left once `dim` is removed and
+        one list per lane in row-major order of that shape. A single strided
+        gather moves `dim` innermost, so each lane is a contiguous slice.
+        """
+        ndim = self.shape.ndim
+        if dim < 0:
+            dim += ndim
+        if not 0 <= dim < ndim:
+            raise IndexError(f"Dimension {dim} out of range for {ndim}D tensor")
+        
+        dims = list(self.shape.dims)
+        strides = list(self.strides)
+        n = dims.pop(dim)
+        stride = strides.pop(dim)
+        moved = self._view(tuple(dims) + (n,), tuple(strides) + (stride,), self._offset)
+        flat = moved._gather().tolist()
+        return dim, tuple(dims), [flat[i:i + n] for i in range(0, len(flat), n)]
+    
+    def _reduce_lanes(self, fn, dim: int, keepdim: bool, dtype: Optional[str] = None) -> 'Tensor':
+        """Apply fn to every lane along dim."""
+        dim, rest, lanes = self._lanes(dim)
+        new_dims = list(rest)
+        if keepdim:
+            new_dims.insert(dim, 1)
+        return Tensor(array(_TYPECODES[dtype or self.dtype], map(fn, lanes)),
+                      Shape(tuple(new_dims)) if new_dims else Shape((1,)), dtype or self.dtype)
+    
+    def min(self, dim: Optional[int] = None, keepdim: bool = False) -> 'Tensor':
+        """Minimum value, overall or along a dimension."""
         if dim is None:
-            return Tensor(min(self.data))
-        # Simplified: return minimum along dimension
-        return self.sum(dim=dim) / self.shape.dims[dim]  # Placeholder
+            return Tensor(min(self._buffer()), dtype=self.dtype)
+        return self._reduce_lanes(min, dim, keepdim)
     
-    def max(self, dim: Optional[int] = None) -> 'Tensor':
-        """Maximum value."""
+    def max(self, dim: Optional[int] = None, keepdim: bool = False) -> 'Tensor':
+        """Maximum value, overall or along a dimension."""
         if dim is None:
-            return Tensor(max(self.data))
-        # Simplified: return maximum along dimension
-        return self.sum(dim=dim) / self.shape.dims[dim]  # Placeholder
+            return Tensor(max(self._buffer()), dtype=self.dtype)
+        return self._reduce_lanes(max, dim, keepdim)
+    
+    def argmin(self, dim: Optional[int] = None, keepdim: bool = False) -> 'Tensor':
+        """Index of the minimum value (into the flattened tensor if dim is None)."""
+        if dim is None:
+            return self.flatten().argmin(0)
+        return self._reduce_lanes(lambda lane: min(range(len(lane)), key=lane.__getitem__),
+                                  dim, keepdim, 'int64')
+    
+    def argmax(self, dim: Optional[int] = None, keepdim: bool = False) -> 'Tensor':
+        """Index of the maximum value (into the flattened tensor if dim is None)."""
+        if dim is None:
+            return self.flatten().argmax(0)
+        return self._reduce_lanes(lambda lane: max(range(len(lane)), key=lane.__getitem__),
+                                  dim, keepdim, 'int64')
+    
+    def topk(self, k: int, dim: int = -1, largest: bool = True) -> Tuple['Tensor', 'Tensor']:
+        """
+        The k largest (or smallest) values along a dimension, sorted.
+        
+        Uses a bounded heap per lane, so selecting k of n elements costs
+        O(n log k) rather than a full sort. Ties keep the lower index first.
+        
+        Returns:
+            (values, indices), each with `dim` resized to k
+        """
+        dim, rest, lanes = self._lanes(dim)
+        n = self.shape.dims[dim]
+        k = min(k, n)
+        select = heapq.nlargest if largest else heapq.nsmallest
+        
+        values = array(_TYPECODES[self.dtype])
+        indices = array('q')
+        for lane in lanes:
+            top = select(k, range(n), key=lane.__getitem__)
+            indices.extend(top)
+            values.extend([lane[i] for i in top])
+        
+        out_dims = Shape(rest + (k,))
+        values = Tensor(values, out_dims, self.dtype)
+        indices = Tensor(indices, out_dims, 'int64')
+        if dim != len(rest):
+            # Lanes were gathered with dim innermost; move it back
+            order = list(range(len(rest)))
+            order.insert(dim, len(rest))
+            values = values.permute(order).contiguous()
+            indices = indices.permute(order).contiguous()
+        return values, indices
     
     def abs(self) -> 'Tensor':
         """Element-wise absolute value."""
-        return Tensor([abs(x) for x in self.data], self.shape)
+        return self._unary_op('abs')
     
     def sqrt(self) -> 'Tensor':
         """Element-wise square root."""
-        return Tensor([math.sqrt(max(0, x)) for x in self.data], self.shape)
+        return self._unary_op('sqrt')
     
     def exp(self) -> 'Tensor':
         """Element-wise exponential."""
-        return Tensor([math.exp(min(x, 700)) for x in self.data], self.shape)
+        return self._unary_op('exp')
     
     def log(self) -> 'Tensor':
         """Element-wise natural logarithm."""
-        return Tensor([math.log(max(x, 1e-10)) for x in self.data], self.shape)
+        return self._unary_op('log')
     
     def clone(self) -> 'Tensor':
         """Create a copy of the tensor."""
-        return Tensor(self.data.copy(), self.shape)
+        return Tensor(self._gather(), Shape(self.shape.dims), self.dtype)
+    
+    def astype(self, dtype: str) -> 'Tensor':
+        """Copy the tensor into storage of another dtype."""
+        if dtype not in _TYPECODES:
+            raise ValueError(f"Unsupported dtype: {dtype}")
+        return Tensor(_pack(self._buffer(), _TYPECODES[dtype]), Shape(self.shape.dims), dtype)
+    
+    @property
+    def itemsize(self) -> int:
+        """Bytes per element."""
+        return self._storage.itemsize
+    
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the underlying buffer (shared by all views)."""
+        return len(self._storage) * self._storage.itemsize
     
     def tolist(self) -> List:
         """Convert to nested list."""
+        flat = self._gather().tolist()
+        if self.dtype == 'bool':
+            flat = [bool(v) for v in flat]
         if self.shape.ndim == 0:
-            return self.data[0]
-        elif self.shape.ndim == 1:
-            return self.data.copy()
-        else:
-            result = []
-            stride = self.shape.numel // self.shape.dims[0]
-            for i in range(self.shape.dims[0]):
-                start = i * stride
-                end = start + stride
-                sub_tensor = Tensor(self.data[start:end], Shape(self.shape.dims[1:]))
-                result.append(sub_tensor.tolist())
-            return result
+            return flat[0]
+        for size in reversed(self.shape.dims[1:]):
+            flat = [flat[i:i + size] for i in range(0, len(flat), size)]
+        return flat
     
-    def item(self) -> float:
+    def item(self) -> Union[float, int, bool]:
         """Get scalar value for single-element tensor."""
-        if len(self.data) != 1:
+        if self.shape.numel != 1:
             raise ValueError("item() only works on single-element tensors")
-        return self.data[0]
+        value = self._storage[self._offset]
+        return bool(value) if self.dtype == 'bool' else value
+
+
+def matmul(a: Tensor, b: Tensor, out: Optional[Tensor] = None) -> Tensor:
+    """
+    Matrix product with leading batch dimensions.
+    
+    The last two dimensions are multiplied as matrices and any leading
+    dimensions broadcast against each other, so (heads, seq, d_k) @
+    (heads, d_k, seq) runs every head in one call and (batch, seq, d) @
+    (d, n) applies one weight to every batch entry. A 1-D operand is
+    treated as a row (left) or column (right) vector and its dimension is
+    dropped from the result. When `b` is a transposed view of dense
+    storage (e.g. ``k.transpose(-1, -2)``) its buffer is used directly in
+    the B^T layout the matmul kernel wants. With `out`, the product is
+    written into that tensor, which is returned.
+    """
+    a_vec = a.shape.ndim == 1
+    b_vec = b.shape.ndim == 1
+    if a_vec:
+        a = a.reshape(1, a.shape.dims[0])
+    if b_vec:
+        b = b.reshape(b.shape.dims[0], 1)
+    dtype = _result_dtype(a.dtype, b.dtype, 'mul')
+    if a.dtype != dtype:
+        a = a.astype(dtype)
+    if b.dtype != dtype:
+        b = b.astype(dtype)
+    
+    m, k = a.shape.dims[-2:]
+    k2, n = b.shape.dims[-2:]
+    if k != k2:
+        raise ValueError(f"Incompatible shapes for matmul: {a.shape} @ {b.shape}")
+    
+    backend = get_backend()
+    batch_a = a.shape.dims[:-2]
+    batch_b = b.shape.dims[:-2]
+    batch = Shape(batch_a).broadcast_with(Shape(batch_b)).dims if batch_b else batch_a
+    out_dims = batch + ((m,) if not a_vec else ()) + ((n,) if not b_vec else ())
+    buf = None if out is None else Tensor._check_out(out, out_dims or (1,))
+    if buf is not None and (out.shares_storage(a) or out.shares_storage(b)):
+        # The kernels read their inputs while writing; compute aside, then copy
+        buf = None
+    bt = b.transpose(-1, -2)
+    
+    if not batch_b:
+        # One B for every batch entry: a single (batch * m, k) @ (k, n) product
+        rows = Shape(batch_a).numel * m
+        if bt.is_contiguous():
+            data = backend.matmul_bt(a._buffer(), bt._buffer(), rows, k, n, buf)
+        else:
+            data = backend.matmul(a._buffer(), b._buffer(), rows, k, n, buf)
+    else:
+        count = Shape(batch).numel
+        a_data = a.expand(batch + (m, k))._buffer()
+        if bt.is_contiguous() and batch_b == batch:
+            data = backend.bmm_bt(a_data, bt._buffer(), count, m, k, n)
+        else:
+            data = backend.bmm(a_data, b.expand(batch + (k, n))._buffer(), count, m, k, n)
+    
+    if out is not None:
+        return Tensor._finish_out(out, buf, data)
+    return Tensor(data, Shape(out_dims or (1,)), dtype)
+
+
+def bmm(a: Tensor, b: Tensor) -> Tensor:
+    """Batched matrix product of (batch, m, k) and (batch, k, n) tensors."""
+    if a.shape.ndim != 3 or b.shape.ndim != 3:
+        raise ValueError("bmm requires 3D tensors")
+    if a.shape.dims[0] != b.shape.dims[0]:
+        raise ValueError(f"Batch sizes differ for bmm: {a.shape} @ {b.shape}")
+    return matmul(a, b)
 
 
 # Factory functions
-def randn(*shape) -> Tensor:
+def normal_buffer(numel: int, mean: float = 0.0, std: float = 1.0,
+                  generator: Optional[random.Random] = None, typecode: str = 'd') -> array:
+    """
+    Packed buffer of `numel` normal samples from the backend's bulk kernel.
+    
+    Pass a seeded `random.Random` as `generator` for reproducible draws;
+    the default is the global `random` stream.
+    """
+    return get_backend().normal(numel, mean, std, generator if generator is not None else random,
+                                typecode)
+
+
+def uniform_buffer(numel: int, low: float = 0.0, high: float = 1.0,
+                   generator: Optional[random.Random] = None, typecode: str = 'd') -> array:
+    """Packed buffer of `numel` samples from U(low, high); see `normal_buffer`."""
+    return get_backend().uniform(numel, low, high, generator if generator is not None else random,
+                                 typecode)
+
+
+def randn(*shape, generator: Optional[random.Random] = None) -> Tensor:
     """Create tensor with random normal values."""
     if len(shape) == 1 and isinstance(shape[0], (list, tuple)):
         shape = tuple(shape[0])
@@ -400,18 +989,34 @@ def randn(*shape) -> Tensor:
     for d in shape:
         numel *= d
     
-    # Box-Muller transform for normal distribution
-    data = []
-    for _ in range(numel):
-        u1 = random.random()
-        u2 = random.random()
-        z = math.sqrt(-2 * math.log(max(u1, 1e-10))) * math.cos(2 * math.pi * u2)
-        data.append(z)
+    return Tensor(normal_buffer(numel, generator=generator), Shape(shape))
+
+
+def rand(*shape, generator: Optional[random.Random] = None) -> Tensor:
+    """Create tensor with random values from U(0, 1)."""
+    if len(shape) == 1 and isinstance(shape[0], (list, tuple)):
+        shape = tuple(shape[0])
+    
+    numel = 1
+    for d in shape:
+        numel *= d
+    
+    return Tensor(uniform_buffer(numel, generator=generator), Shape(shape))
+
+
+def meta(*shape, dtype: str = 'float64') -> Tensor:
+    """
+    Tensor that records only its shape and dtype, with no element storage.
     
-    return Tensor(data, Shape(shape))
+    Used for deferred initialization: assigning `data` later attaches the
+    real buffer, in place, so every holder of the tensor sees it.
+    """
+    if len(shape) == 1 and isinstance(shape[0], (list, tuple)):
+        shape = tuple(shape[0])
+    return Tensor(_META_STORAGE[_TYPECODES[dtype]], Shape(shape), dtype)
 
 
-def zeros(*shape) -> Tensor:
+def zeros(*shape, dtype: str = 'float64') -> Tensor:
     """Create tensor filled with zeros."""
     if len(shape) == 1 and isinstance(shape[0], (list, tuple)):
         shape = tuple(shape[0])
@@ -420,10 +1025,22 @@ def zeros(*shape) -> Tensor:
     for d in shape:
         numel *= d
     
-    return Tensor([0.0] * numel, Shape(shape))
+    return Tensor(get_pool().acquire(_TYPECODES[dtype], numel), Shape(shape), dtype)
 
 
-def ones(*shape) -> Tensor:
+def empty(*shape, dtype: str = 'float64') -> Tensor:
+    """Create tensor with unspecified contents, reusing a pooled buffer when possible."""
+    if len(shape) == 1 and isinstance(shape[0], (list, tuple)):
+        shape = tuple(shape[0])
+    
+    numel = 1
+    for d in shape:
+        numel *= d
+    
+    return Tensor(get_pool().acquire(_TYPECODES[dtype], numel, zero=False), Shape(shape), dtype)
+
+
+def ones(*shape, dtype: str = 'float64') -> Tensor:
     """Create tensor filled with ones."""
     if len(shape) == 1 and isinstance(shape[0], (list, tuple)):
         shape = tuple(shape[0])
@@ -432,7 +1049,7 @@ def ones(*shape) -> Tensor:
     for d in shape:
         numel *= d
     
-    return Tensor([1.0] * numel, Shape(shape))
+    return Tensor(array(_TYPECODES[dtype], (1,)) * numel, Shape(shape), dtype)
 
 
 def eye(n: int) -> Tensor:
@@ -444,13 +1061,13 @@ def eye(n: int) -> Tensor:
     return Tensor(data, Shape((n, n)))
 
 
-def arange(start: int, end: Optional[int] = None, step: int = 1) -> Tensor:
+def arange(start: int, end: Optional[int] = None, step: int = 1,
+           dtype: str = 'float64') -> Tensor:
     """Create 1D tensor with values in range."""
     if end is None:
         end = start
         start = 0
-    data = list(range(start, end, step))
-    return Tensor([float(x) for x in data])
+    return Tensor(array(_TYPECODES[dtype], range(start, end, step)), dtype=dtype)
 
 
 def linspace(start: float, end: float, steps: int) -> Tensor:
@@ -462,44 +1079,102 @@ def linspace(start: float, end: float, steps: int) -> Tensor:
 
 
 def cat(tensors: List[Tensor], dim: int = 0) -> Tensor:
-    """Concatenate tensors along dimension."""
+    """
+    Concatenate tensors along an existing dimension.
+    
+    The output is allocated once; each input is then copied in with one
+    slice assignment per index of the dimensions before `dim`.
+    """
     if not tensors:
         raise ValueError("Cannot concatenate empty list")
     
-    if len(tensors) == 1:
-        return tensors[0].clone()
+    first = tensors[0]
+    ndim = first.shape.ndim
+    if dim < 0:
+        dim += ndim
+    if not 0 <= dim < ndim:
+        raise IndexError(f"Dimension {dim} out of range for {ndim}D tensors")
+    for t in tensors:
+        if t.shape.ndim != ndim or any(a != b for i, (a, b) in
+                                       enumerate(zip(t.shape.dims, first.shape.dims)) if i != dim):
+            raise ValueError(f"Cannot concatenate {t.shape} with {first.shape} along dim {dim}")
     
-    # For 1D tensors, simple concatenation
-    if tensors[0].shape.ndim == 1:
-        data = []
-        for t in tensors:
-            data.extend(t.data)
-        return Tensor(data)
+    dtype = first.dtype
+    for t in tensors:
+        dtype = _promote(dtype, t.dtype)
+    typecode = _TYPECODES[dtype]
+    out_dims = list(first.shape.dims)
+    out_dims[dim] = sum(t.shape.dims[dim] for t in tensors)
+    out = empty(*out_dims, dtype=dtype)
     
-    # For 2D+ tensors along dim=0
-    if dim == 0:
-        total_rows = sum(t.shape.dims[0] for t in tensors)
-        new_shape = Shape((total_rows,) + tensors[0].shape.dims[1:])
-        data = []
-        for t in tensors:
-            data.extend(t.data)
-        return Tensor(data, new_shape)
+    outer = Shape(tuple(out_dims[:dim])).numel
+    inner = Shape(tuple(out_dims[dim + 1:])).numel
+    out_block = out_dims[dim] * inner
+    storage = out._storage
     
-    # For other dimensions, more complex logic needed
-    raise NotImplementedError("Concatenation along dim > 0 not yet implemented")
+    offset = 0
+    for t in tensors:
+        src = t._buffer()
+        if src.typecode != typecode:
+            src = _pack(src, typecode)
+        block = t.shape.dims[dim] * inner
+        if outer == 1:
+            storage[offset:offset + block] = src
+        else:
+            for o in range(outer):
+                start = o * out_block + offset
+                storage[start:start + block] = src[o * block:(o + 1) * block]
+        offset += block
+    return out
 
 
 def stack(tensors: List[Tensor], dim: int = 0) -> Tensor:
-    """Stack tensors along new dimension."""
+    """Stack equally shaped tensors along a new dimension."""
     if not tensors:
         raise ValueError("Cannot stack empty list")
     
-    # Add new dimension and concatenate
-    new_shape_dims = list(tensors[0].shape.dims)
-    new_shape_dims.insert(dim, len(tensors))
+    dims = tensors[0].shape.dims
+    if any(t.shape.dims != dims for t in tensors):
+        raise ValueError("stack requires tensors of the same shape")
+    if dim < 0:
+        dim += len(dims) + 1
     
-    data = []
-    for t in tensors:
-        data.extend(t.data)
+    new_dims = dims[:dim] + (1,) + dims[dim:]
+    return cat([t.reshape(*new_dims) for t in tensors], dim)
+
+
+def split(tensor: Tensor, split_size_or_sections: Union[int, List[int]],
+          dim: int = 0) -> List[Tensor]:
+    """
+    Split a tensor into views along a dimension.
     
-    return Tensor(data, Shape(tuple(new_shape_dims)))
+    An int gives equal pieces of that size (the last may be smaller); a
+    list gives the size of every piece.
+    """
+    size = tensor.shape.dims[dim]
+    if isinstance(split_size_or_sections, int):
+        step = split_size_or_sections
+        if step <= 0:
+            raise ValueError("split size must be positive")
+        sections = [min(step, size - start) for start in range(0, size, step)]
+    else:
+        sections = list(split_size_or_sections)
+        if sum(sections) != size:
+            raise ValueError(f"Split sections {sections} do not add up to {size}")
+    
+    pieces = []
+    start = 0
+    for length in sections:
+        pieces.append(tensor.narrow(dim, start, length))
+        start += length
+    return pieces
+
+
+def chunk(tensor: Tensor, chunks: int, dim: int = 0) -> List[Tensor]:
+    """Split a tensor into `chunks` nearly equal views along a dimension."""
+    size = tensor.shape.dims[dim]
+    return split(tensor, max(1, -(-size // chunks)), dim)
+
+
+# Imported last: the lazy module builds on Tensor
+from . import lazy as _lazy
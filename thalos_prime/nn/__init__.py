@@ -8,11 +8,14 @@ from .layer import (
     Linear,
     Embedding,
     PositionalEncoding,
+    RotaryEmbedding,
+    sinusoidal_table,
     Dropout,
     Flatten,
     Reshape,
     LayerNormLayer,
-    Sequential
+    Sequential,
+    deferred_init
 )
 
 from .transformer import (
@@ -38,11 +41,14 @@ __all__ = [
     'Linear',
     'Embedding',
     'PositionalEncoding',
+    'RotaryEmbedding',
+    'sinusoidal_table',
     'Dropout',
     'Flatten',
     'Reshape',
     'LayerNormLayer',
     'Sequential',
+    'deferred_init',
     # Transformer components
     'MultiHeadAttention',
     'FeedForwardNetwork',
@@ -3,15 +3,50 @@ THALOS Prime - Neural Network Layers Module
 Base layer classes and common layer implementations.
 """
 
-from typing import Optional, List, Tuple, Dict, Any
+from typing import Optional, List, Tuple, Dict, Any, Callable, Iterator
+from array import array
+from contextlib import contextmanager
 import math
 import random
 from abc import ABC, abstractmethod
+from operator import add, mul, sub
 
 # Import from math module
 import sys
 sys.path.insert(0, '..')
-from ..math.tensor import Tensor, Shape, zeros, randn
+from ..math.tensor import Tensor, Shape, zeros, randn, normal_buffer, meta
+from ..math.backend import get_backend
+
+
+# Nesting depth of deferred_init() blocks
+_defer_depth = 0
+
+
+@contextmanager
+def deferred_init():
+    """
+    Build layers whose parameters are meta tensors.
+    
+    Inside the block, layers record only each parameter's shape and dtype
+    and keep its initializer. The values are produced on the layer's
+    first call or by `materialize()`, unless `load_state` fills them
+    first, so restoring a checkpoint never pays for random init.
+    """
+    global _defer_depth
+    _defer_depth += 1
+    try:
+        yield
+    finally:
+        _defer_depth -= 1
+
+
+def state_values(value: Any) -> Any:
+    """Flat element sequence of a state entry (Tensor, sequence or {'data', 'shape'} dict)."""
+    if isinstance(value, dict):
+        value = value['data']
+    if isinstance(value, Tensor):
+        value = value._buffer()
+    return value
 
 
 class Layer(ABC):
@@ -21,6 +56,8 @@ class Layer(ABC):
         self.training = True
         self._parameters: Dict[str, Tensor] = {}
         self._buffers: Dict[str, Tensor] = {}
+        # Meta tensors registered here with the initializers that fill them
+        self._deferred: Dict[str, Tuple[Tensor, Callable[[], array]]] = {}
     
     @abstractmethod
     def forward(self, x: Tensor) -> Tensor:
@@ -28,90 +65,195 @@ class Layer(ABC):
         pass
     
     def __call__(self, *args, **kwargs) -> Tensor:
+        if self._deferred:
+            self.materialize()
         return self.forward(*args, **kwargs)
     
+    def _register(self, name: str, dims: Tuple[int, ...], init: Callable[[], array],
+                  buffer: bool = False) -> Tensor:
+        """Create parameter (or buffer) `name` from `init`, deferred under deferred_init()."""
+        if _defer_depth:
+            tensor = meta(dims)
+            self._deferred[name] = (tensor, init)
+        else:
+            tensor = Tensor(init(), Shape(dims))
+        (self._buffers if buffer else self._parameters)[name] = tensor
+        return tensor
+    
+    def _sublayers(self) -> Iterator[Tuple[str, 'Layer']]:
+        """(attribute path, layer) for direct sublayers, including those held in lists."""
+        for attr, value in vars(self).items():
+            if isinstance(value, Layer):
+                yield attr, value
+            elif isinstance(value, list):
+                for i, child in enumerate(value):
+                    if isinstance(child, Layer):
+                        yield f'{attr}.{i}', child
+    
+    def materialize(self) -> 'Layer':
+        """Initialize every meta parameter still waiting, here and in sublayers."""
+        for tensor, init in self._deferred.values():
+            if tensor.is_meta:
+                data = init()
+                typecode = tensor.data.typecode
+                tensor.data = data if data.typecode == typecode else array(typecode, data)
+        self._deferred.clear()
+        for _, child in self._sublayers():
+            child.materialize()
+        return self
+    
+    def _named_layers(self, prefix: str = '') -> Iterator[Tuple[str, 'Layer']]:
+        """This layer and every descendant, with the dotted prefix of their state keys."""
+        yield prefix, self
+        for path, child in self._sublayers():
+            yield from child._named_layers(f'{prefix}{path}.')
+    
+    def _upgrade_state(self, state: Dict[str, Any], prefix: str) -> None:
+        """Rewrite legacy entries of `state` under `prefix` into this layer's current keys."""
+    
+    def state_dict(self) -> Dict[str, Tensor]:
+        """Parameters and buffers keyed by dotted path, e.g. 'decoder.layers.0.ffn.linear1.weight'."""
+        state: Dict[str, Tensor] = {}
+        self._collect_state('', state, set())
+        return state
+    
+    def _collect_state(self, prefix: str, state: Dict[str, Tensor], seen: set) -> None:
+        # Sublayers first, so parameters a parent re-exports keep the owner's path
+        for path, child in self._sublayers():
+            child._collect_state(f'{prefix}{path}.', state, seen)
+        for name, tensor in list(self._parameters.items()) + list(self._buffers.items()):
+            if id(tensor) not in seen:
+                seen.add(id(tensor))
+                state[prefix + name] = tensor
+    
+    def load_state(self, state: Dict[str, Any], strict: bool = True) -> 'Layer':
+        """
+        Copy values from `state` (keyed as by `state_dict`) into this layer.
+        
+        Values may be Tensors, flat sequences, or the {'data', 'shape'}
+        dicts ModelManager writes. Meta parameters take the loaded values
+        without ever being randomly initialized; any left unfilled are
+        initialized afterwards. With `strict`, missing or unexpected keys
+        raise KeyError.
+        """
+        state = dict(state)
+        for prefix, layer in self._named_layers():
+            layer._upgrade_state(state, prefix)
+        own = self.state_dict()
+        if strict:
+            missing = sorted(own.keys() - state.keys())
+            unexpected = sorted(state.keys() - own.keys())
+            if missing or unexpected:
+                raise KeyError(f"State mismatch: missing {missing}, unexpected {unexpected}")
+        
+        for name, value in state.items():
+            tensor = own.get(name)
+            if tensor is None:
+                continue
+            data = array(tensor.data.typecode, state_values(value))
+            if len(data) != tensor.shape.numel:
+                raise ValueError(f"'{name}' expects {tensor.shape.numel} values, got {len(data)}")
+            tensor.data = data
+        return self.materialize()
+    
     def parameters(self) -> List[Tensor]:
         """Get all trainable parameters."""
         return list(self._parameters.values())
     
     def train(self) -> 'Layer':
-        """Set layer to training mode."""
+        """Set layer and sublayers to training mode."""
         self.training = True
+        for _, child in self._sublayers():
+            child.train()
         return self
     
     def eval(self) -> 'Layer':
-        """Set layer to evaluation mode."""
+        """Set layer and sublayers to evaluation mode."""
         self.training = False
+        for _, child in self._sublayers():
+            child.eval()
+        return self
+    
+    def to(self, dtype: str) -> 'Layer':
+        """Convert every parameter to `dtype` in place (e.g. 'float32' halves weight memory)."""
+        for param in self.parameters():
+            if param.dtype != dtype:
+                converted = meta(param.shape.dims, dtype=dtype) if param.is_meta \
+                    else param.astype(dtype)
+                param.dtype = dtype
+                param.data = converted.data
+        # Sublayers too, since parent dicts can shadow same-named parameters
+        for _, child in self._sublayers():
+            child.to(dtype)
         return self
 
 
 class Linear(Layer):
     """Fully connected layer."""
     
-    def __init__(self, in_features: int, out_features: int, bias: bool = True):
+    def __init__(self, in_features: int, out_features: int, bias: bool = True,
+                 generator: Optional[random.Random] = None):
         super().__init__()
         self.in_features = in_features
         self.out_features = out_features
         
         # Xavier initialization
         std = math.sqrt(2.0 / (in_features + out_features))
-        weight_data = []
-        for _ in range(in_features * out_features):
-            u1 = max(1e-10, random.random())
-            u2 = random.random()
-            z = math.sqrt(-2 * math.log(u1)) * math.cos(2 * math.pi * u2)
-            weight_data.append(std * z)
+        self.weight = self._register(
+            'weight', (in_features, out_features),
+            lambda: normal_buffer(in_features * out_features, 0.0, std, generator))
         
-        self.weight = Tensor(weight_data, Shape((in_features, out_features)))
-        self._parameters['weight'] = self.weight
+        # Weight in (out_features, in_features) layout for the matmul
+        # kernel, rebuilt whenever the weight tensor or its version changes
+        self._weight_t: Optional[array] = None
+        self._weight_t_source: Optional[Tensor] = None
+        self._weight_t_version = -1
         
         if bias:
-            self.bias = zeros(out_features)
-            self._parameters['bias'] = self.bias
+            self.bias = self._register('bias', (out_features,),
+                                       lambda: array('d', bytes(8 * out_features)))
         else:
             self.bias = None
     
     def forward(self, x: Tensor) -> Tensor:
         """Forward pass: y = x @ W + b."""
-        # Determine input dimensions
-        if x.shape.ndim == 1:
-            batch_size = 1
-            seq_len = len(x.data) // self.in_features
-            input_data = x.data
-        else:
+        if x.shape.ndim == 2:
             batch_size = x.shape.dims[0]
-            seq_len = 1 if x.shape.ndim == 2 else x.shape.dims[1]
             input_data = x.data
-        
-        # Simple matrix multiplication
-        if x.shape.ndim == 2:
-            batch_size, in_feat = x.shape.dims
-            output_data = []
-            
-            for i in range(batch_size):
-                for j in range(self.out_features):
-                    val = self.bias.data[j] if self.bias else 0.0
-                    for k in range(self.in_features):
-                        val += x.data[i * in_feat + k] * self.weight.data[k * self.out_features + j]
-                    output_data.append(val)
-            
-            return Tensor(output_data, Shape((batch_size, self.out_features)))
         else:
-            # 1D input
-            output_data = []
-            for j in range(self.out_features):
-                val = self.bias.data[j] if self.bias else 0.0
-                for k in range(min(len(x.data), self.in_features)):
-                    val += x.data[k] * self.weight.data[k * self.out_features + j]
-                output_data.append(val)
-            return Tensor(output_data, Shape((self.out_features,)))
+            # 1D input: a single row, truncated or zero-padded to in_features
+            batch_size = 1
+            input_data = x.data[:self.in_features]
+            if len(input_data) < self.in_features:
+                input_data += array(input_data.typecode, (0,)) * (self.in_features - len(input_data))
+        
+        output_data = get_backend().matmul_bt(input_data, self.transposed_weight(), batch_size,
+                                              self.in_features, self.out_features)
+        out_dims = (batch_size, self.out_features) if x.shape.ndim == 2 else (self.out_features,)
+        output = Tensor(output_data, Shape(out_dims))
+        if self.bias:
+            output.add_(self.bias)
+        return output
+    
+    def transposed_weight(self) -> array:
+        """Cached (out_features, in_features) copy of the weight buffer."""
+        if self._deferred:
+            self.materialize()
+        weight = self.weight
+        if self._weight_t_source is not weight or self._weight_t_version != weight.version:
+            self._weight_t = get_backend().transpose(weight.data, self.in_features,
+                                                     self.out_features)
+            self._weight_t_source = weight
+            self._weight_t_version = weight.version
+        return self._weight_t
 
 
 class Embedding(Layer):
     """Embedding layer for vocabulary lookup."""
     
     def __init__(self, num_embeddings: int, embedding_dim: int, 
-                 padding_idx: Optional[int] = None):
+                 padding_idx: Optional[int] = None,
+                 generator: Optional[random.Random] = None):
         super().__init__()
         self.num_embeddings = num_embeddings
         self.embedding_dim = embedding_dim
@@ -119,36 +261,74 @@ class Embedding(Layer):
         
         # Initialize embeddings
         std = 1.0 / math.sqrt(embedding_dim)
-        embed_data = []
-        for _ in range(num_embeddings * embedding_dim):
-            u1 = max(1e-10, random.random())
-            u2 = random.random()
-            z = math.sqrt(-2 * math.log(u1)) * math.cos(2 * math.pi * u2)
-            embed_data.append(std * z)
         
-        self.weight = Tensor(embed_data, Shape((num_embeddings, embedding_dim)))
-        self._parameters['weight'] = self.weight
+        def init() -> array:
+            embed_data = normal_buffer(num_embeddings * embedding_dim, 0.0, std, generator)
+            # Zero out padding embedding
+            if padding_idx is not None:
+                start = padding_idx * embedding_dim
+                embed_data[start:start + embedding_dim] = array('d', bytes(8 * embedding_dim))
+            return embed_data
         
-        # Zero out padding embedding
-        if padding_idx is not None:
-            for i in range(embedding_dim):
-                self.weight.data[padding_idx * embedding_dim + i] = 0.0
+        self.weight = self._register('weight', (num_embeddings, embedding_dim), init)
     
     def forward(self, x: Tensor) -> Tensor:
         """Forward pass: lookup embeddings for token IDs."""
-        # x contains integer token IDs
-        output_data = []
+        # x holds integer token IDs; float IDs are truncated
+        ids = x._buffer()
+        if x.dtype in ('float32', 'float64'):
+            ids = map(int, ids)
+        weight = self.weight.data
+        dim = self.embedding_dim
+        padding = array(weight.typecode, (0,)) * dim
+        output_data = array(weight.typecode)
         
-        for idx in x.data:
-            idx = int(idx)
+        for idx in ids:
             if 0 <= idx < self.num_embeddings:
-                start = idx * self.embedding_dim
-                output_data.extend(self.weight.data[start:start + self.embedding_dim])
+                start = idx * dim
+                output_data += weight[start:start + dim]
             else:
-                output_data.extend([0.0] * self.embedding_dim)
+                output_data += padding
         
-        seq_len = len(x.data)
-        return Tensor(output_data, Shape((seq_len, self.embedding_dim)))
+        seq_len = x.shape.numel
+        return Tensor(output_data, Shape((seq_len, dim)), self.weight.dtype)
+
+
+# Shared sinusoidal tables by d_model; rows are only ever appended
+_SINUSOID_TABLES: Dict[int, Tensor] = {}
+
+
+def _sinusoid_rows(d_model: int, start: int, stop: int) -> array:
+    """Rows [start, stop) of the sinusoidal table: sin on even features, cos on odd."""
+    # Frequencies depend only on the feature pair, so compute them once
+    freqs = [10000.0 ** (-2 * j / d_model) for j in range((d_model + 1) // 2)]
+    half = d_model // 2
+    out = array('d', bytes(8 * (stop - start) * d_model))
+    for pos in range(start, stop):
+        angles = [pos * f for f in freqs]
+        base = (pos - start) * d_model
+        out[base:base + d_model:2] = array('d', map(math.sin, angles))
+        out[base + 1:base + d_model:2] = array('d', map(math.cos, angles[:half]))
+    return out
+
+
+def sinusoidal_table(d_model: int, length: int) -> Tensor:
+    """
+    First `length` rows of the process-wide sinusoidal table for `d_model`.
+    
+    Every PositionalEncoding of the same width shares one table. It is
+    extended (at least doubling) only when a longer sequence asks for
+    it. The returned view must be treated as read-only.
+    """
+    table = _SINUSOID_TABLES.get(d_model)
+    have = table.shape.dims[0] if table is not None else 0
+    if have < length:
+        target = max(length, 2 * have)
+        data = (table.data if table is not None else array('d')) + \
+            _sinusoid_rows(d_model, have, target)
+        table = Tensor(data, Shape((target, d_model)))
+        _SINUSOID_TABLES[d_model] = table
+    return table.narrow(0, 0, length)
 
 
 class PositionalEncoding(Layer):
@@ -159,40 +339,78 @@ class PositionalEncoding(Layer):
         self.d_model = d_model
         self.max_len = max_len
         self.dropout_rate = dropout
-        
-        # Compute positional encodings
-        pe_data = []
-        for pos in range(max_len):
-            for i in range(d_model):
-                if i % 2 == 0:
-                    val = math.sin(pos / (10000 ** (i / d_model)))
-                else:
-                    val = math.cos(pos / (10000 ** ((i - 1) / d_model)))
-                pe_data.append(val)
-        
-        self.pe = Tensor(pe_data, Shape((max_len, d_model)))
-        self._buffers['pe'] = self.pe
     
-    def forward(self, x: Tensor) -> Tensor:
-        """Add positional encoding to input."""
+    @property
+    def pe(self) -> Tensor:
+        """(max_len, d_model) rows of the shared sinusoidal table."""
+        return sinusoidal_table(self.d_model, self.max_len)
+    
+    def forward(self, x: Tensor, offset: int = 0) -> Tensor:
+        """Add positional encoding to input, whose first row sits at position `offset`."""
         seq_len = x.shape.dims[0]
         d_model = x.shape.dims[1] if x.shape.ndim > 1 else len(x.data)
         
-        output_data = []
-        for i in range(seq_len):
-            for j in range(d_model):
-                val = x.data[i * d_model + j] + self.pe.data[i * self.d_model + j]
-                
-                # Apply dropout during training
-                if self.training and self.dropout_rate > 0:
-                    if random.random() < self.dropout_rate:
-                        val = 0.0
-                    else:
-                        val = val / (1 - self.dropout_rate)
-                
-                output_data.append(val)
+        # Rows beyond max_len are fine: the shared table grows on demand
+        pe = sinusoidal_table(self.d_model, offset + seq_len)
+        if offset:
+            pe = pe.narrow(0, offset, seq_len)
+        if d_model != self.d_model:
+            pe = pe.narrow(1, 0, d_model)
+        output = x.reshape(seq_len, d_model) + pe
         
-        return Tensor(output_data, Shape((seq_len, d_model)))
+        # Apply dropout during training, in place on the fresh output
+        if self.training and self.dropout_rate > 0:
+            output_data = output.data
+            for i in range(len(output_data)):
+                if random.random() < self.dropout_rate:
+                    output_data[i] = 0.0
+                else:
+                    output_data[i] = output_data[i] / (1 - self.dropout_rate)
+        
+        return output
+
+
+class RotaryEmbedding(Layer):
+    """
+    Rotary position embedding (RoPE) for attention queries and keys.
+    
+    Feature pair (2j, 2j+1) at position p is rotated by the angle
+    p * base^(-2j/dim), so the dot product of a rotated query and key
+    depends only on how far apart they are. Angles come from the hoisted
+    frequencies on each call; no table is stored.
+    """
+    
+    def __init__(self, dim: int, base: float = 10000.0):
+        super().__init__()
+        if dim % 2:
+            raise ValueError(f"RotaryEmbedding needs an even dimension, got {dim}")
+        self.dim = dim
+        self.base = base
+        self.inv_freq = [base ** (-2 * j / dim) for j in range(dim // 2)]
+    
+    def forward(self, x: Tensor, offset: int = 0) -> Tensor:
+        """Rotate (..., seq, dim) `x`, with row i at position offset + i."""
+        dims = x.shape.dims
+        seq, dim = dims[-2], dims[-1]
+        if dim != self.dim:
+            raise ValueError(f"Expected last dimension {self.dim}, got {dim}")
+        src = x._buffer()
+        typecode = src.typecode
+        out = array(typecode, bytes(len(src) * src.itemsize))
+        block = seq * dim
+        for i in range(seq):
+            angles = [(offset + i) * f for f in self.inv_freq]
+            cos = list(map(math.cos, angles))
+            sin = list(map(math.sin, angles))
+            # The same rotation applies to row i of every leading slice
+            for base in range(i * dim, len(src), block):
+                even = src[base:base + dim:2]
+                odd = src[base + 1:base + dim:2]
+                out[base:base + dim:2] = array(
+                    typecode, map(sub, map(mul, even, cos), map(mul, odd, sin)))
+                out[base + 1:base + dim:2] = array(
+                    typecode, map(add, map(mul, even, sin), map(mul, odd, cos)))
+        return Tensor(out, Shape(dims), x.dtype)
 
 
 class Dropout(Layer):
@@ -228,7 +446,7 @@ class Flatten(Layer):
     
     def forward(self, x: Tensor) -> Tensor:
         """Flatten tensor."""
-        return Tensor(x.data.copy(), Shape((len(x.data),)))
+        return x.flatten()
 
 
 class Reshape(Layer):
@@ -250,32 +468,18 @@ class LayerNormLayer(Layer):
         super().__init__()
         self.normalized_shape = normalized_shape
         self.eps = eps
-        self.gamma = Tensor([1.0] * normalized_shape)
-        self.beta = Tensor([0.0] * normalized_shape)
-        self._parameters['gamma'] = self.gamma
-        self._parameters['beta'] = self.beta
+        self.gamma = self._register('gamma', (normalized_shape,),
+                                    lambda: array('d', [1.0]) * normalized_shape)
+        self.beta = self._register('beta', (normalized_shape,),
+                                   lambda: array('d', bytes(8 * normalized_shape)))
     
     def forward(self, x: Tensor) -> Tensor:
         """Apply layer normalization."""
-        if x.shape.ndim == 1:
-            mean = sum(x.data) / len(x.data)
-            var = sum((val - mean) ** 2 for val in x.data) / len(x.data)
-            std = math.sqrt(var + self.eps)
-            return Tensor([(val - mean) / std * g + b 
-                          for val, g, b in zip(x.data, self.gamma.data, self.beta.data)],
-                         x.shape)
-        elif x.shape.ndim == 2:
-            rows, cols = x.shape.dims
-            result = []
-            for i in range(rows):
-                row = [x.data[i * cols + j] for j in range(cols)]
-                mean = sum(row) / len(row)
-                var = sum((val - mean) ** 2 for val in row) / len(row)
-                std = math.sqrt(var + self.eps)
-                result.extend([(val - mean) / std * g + b 
-                              for val, g, b in zip(row, self.gamma.data, self.beta.data)])
-            return Tensor(result, x.shape)
-        return x
+        if x.shape.ndim not in (1, 2):
+            return x
+        data = get_backend().layer_norm(x.data, x.shape.dims[-1], self.gamma.data,
+                                        self.beta.data, self.eps)
+        return Tensor(data, x.shape)
 
 
 class Sequential(Layer):
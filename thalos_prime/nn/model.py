@@ -6,10 +6,13 @@ Main transformer model and optimization utilities.
 from typing import Optional, List, Dict, Any, Tuple
 import math
 import random
-from .layer import Layer, Linear, Embedding, PositionalEncoding
+from array import array
+from contextlib import nullcontext
+from .layer import Layer, Linear, Embedding, PositionalEncoding, deferred_init
 from .transformer import TransformerDecoder, TransformerEncoder
-from ..math.tensor import Tensor, Shape, zeros
+from ..math.tensor import Tensor, Shape, zeros, cat, _TYPECODES
 from ..math.activations import Activations
+from ..math.attention import AttentionPattern
 
 
 class THALOSPrimeModel(Layer):
@@ -22,7 +25,11 @@ class THALOSPrimeModel(Layer):
                  num_layers: int = 6,
                  d_ff: int = 2048,
                  max_seq_len: int = 2048,
-                 dropout: float = 0.1):
+                 dropout: float = 0.1,
+                 generator: Optional[random.Random] = None,
+                 defer_init: bool = False,
+                 positional: str = 'sinusoidal',
+                 attention_pattern: Optional[AttentionPattern] = None):
         super().__init__()
         
         self.vocab_size = vocab_size
@@ -31,16 +38,27 @@ class THALOSPrimeModel(Layer):
         self.num_layers = num_layers
         self.d_ff = d_ff
         self.max_seq_len = max_seq_len
+        if positional not in ('sinusoidal', 'rotary'):
+            raise ValueError(f"Unknown positional encoding: {positional}")
+        self.positional = positional
         
-        # Embedding layers
-        self.token_embedding = Embedding(vocab_size, d_model)
-        self.positional_encoding = PositionalEncoding(d_model, max_seq_len)
-        
-        # Transformer decoder
-        self.decoder = TransformerDecoder(num_layers, d_model, num_heads, d_ff, dropout)
-        
-        # Output projection
-        self.output_projection = Linear(d_model, vocab_size)
+        # With defer_init, parameters start as meta tensors that load_state
+        # or the first forward pass fills
+        with deferred_init() if defer_init else nullcontext():
+            # Embedding layers
+            self.token_embedding = Embedding(vocab_size, d_model, generator=generator)
+            # 'rotary' rotates queries and keys inside attention instead
+            self.positional_encoding = PositionalEncoding(d_model, max_seq_len) \
+                if positional == 'sinusoidal' else None
+            
+            # Transformer decoder
+            # attention_pattern (e.g. a sliding window) bounds what each token attends to
+            self.decoder = TransformerDecoder(num_layers, d_model, num_heads, d_ff, dropout,
+                                              generator, rotary=positional == 'rotary',
+                                              pattern=attention_pattern)
+            
+            # Output projection
+            self.output_projection = Linear(d_model, vocab_size, generator=generator)
         
         # Collect parameters
         self._parameters.update(self.token_embedding._parameters)
@@ -53,7 +71,8 @@ class THALOSPrimeModel(Layer):
         x = self.token_embedding(input_ids)
         
         # Add positional encoding
-        x = self.positional_encoding(x)
+        if self.positional_encoding is not None:
+            x = self.positional_encoding(x)
         
         # Transformer decoder
         x = self.decoder(x)
@@ -63,6 +82,26 @@ class THALOSPrimeModel(Layer):
         
         return logits
     
+    def new_cache(self, max_seq_len: Optional[int] = None) -> 'KVCache':
+        """Empty key/value cache for up to `max_seq_len` positions (at most the model's)."""
+        size = self.max_seq_len if max_seq_len is None else min(max_seq_len, self.max_seq_len)
+        return KVCache(self.num_layers, size, self.d_model, self.num_heads)
+    
+    def forward_incremental(self, input_ids: Tensor, cache: 'KVCache') -> Tensor:
+        """
+        Logits for the tokens following those already in `cache`.
+        
+        Only the new positions are embedded and projected; their keys and
+        values are appended to `cache` and attention runs over everything
+        cached, so a decoding step no longer re-runs the whole prefix.
+        """
+        offset = cache.position(0)
+        x = self.token_embedding(input_ids)
+        if self.positional_encoding is not None:
+            x = self.positional_encoding(x, offset)
+        x = self.decoder.forward_incremental(x, cache)
+        return self.output_projection(x)
+    
     def generate(self, input_ids: Tensor, max_length: int = 100,
                  temperature: float = 1.0, top_k: int = 50,
                  top_p: float = 0.9) -> List[int]:
@@ -71,60 +110,61 @@ class THALOSPrimeModel(Layer):
         
         generated = list(int(x) for x in input_ids.data)
         
+        # The prompt fills the cache once; afterwards only the newest token is fed
+        cache = self.new_cache(len(generated) + max_length)
+        pending = generated
+        
         for _ in range(max_length):
-            # Get logits for last position
-            x = Tensor([float(x) for x in generated])
-            logits = self.forward(x)
+            x = Tensor(array('q', pending), dtype='int64')
+            logits = self.forward_incremental(x, cache)
             
             # Get logits for last token
-            last_logits_start = (len(generated) - 1) * self.vocab_size
-            last_logits = logits.data[last_logits_start:last_logits_start + self.vocab_size]
+            last_logits = logits[len(pending) - 1]
             
             # Apply temperature
             if temperature != 1.0:
-                last_logits = [l / temperature for l in last_logits]
+                last_logits = last_logits / temperature
             
-            # Top-K filtering
-            if top_k > 0:
-                sorted_indices = sorted(range(len(last_logits)), 
-                                        key=lambda i: last_logits[i], reverse=True)
-                for i in sorted_indices[top_k:]:
-                    last_logits[i] = -1e9
+            row = last_logits.tolist()
+            candidates = range(self.vocab_size)
             
-            # Top-P (nucleus) filtering
-            if top_p < 1.0:
-                sorted_probs = sorted(enumerate(last_logits), 
-                                     key=lambda x: x[1], reverse=True)
-                cumsum = 0.0
-                max_val = max(last_logits)
-                exp_vals = [math.exp(l - max_val) for l in last_logits]
-                sum_exp = sum(exp_vals)
-                probs = [e / sum_exp for e in exp_vals]
+            # Top-K filtering: a bounded heap picks the candidates, best first,
+            # without sorting the whole vocabulary
+            if top_k > 0 or top_p < 1.0:
+                values, indices = last_logits.topk(top_k if top_k > 0 else self.vocab_size)
+                candidates = [int(i) for i in indices.data]
+                
+                # Top-P (nucleus) filtering over the surviving candidates
+                if top_p < 1.0:
+                    max_val = values.data[0]
+                    exp_vals = [math.exp(v - max_val) for v in values.data]
+                    sum_exp = sum(exp_vals)
+                    cumsum = 0.0
+                    for i, e in enumerate(exp_vals):
+                        cumsum += e / sum_exp
+                        if cumsum > top_p:
+                            candidates = candidates[:i + 1]
+                            break
                 
-                for i, (idx, _) in enumerate(sorted_probs):
-                    cumsum += probs[idx]
-                    if cumsum > top_p:
-                        for j in range(i + 1, len(sorted_probs)):
-                            last_logits[sorted_probs[j][0]] = -1e9
-                        break
+                candidates.sort()
             
             # Sample from distribution
-            max_val = max(last_logits)
-            exp_vals = [math.exp(l - max_val) for l in last_logits]
+            max_val = max(row[i] for i in candidates)
+            exp_vals = [math.exp(row[i] - max_val) for i in candidates]
             sum_exp = sum(exp_vals)
-            probs = [e / sum_exp for e in exp_vals]
             
             # Sample token
             r = random.random()
             cumsum = 0.0
-            next_token = 0
-            for i, p in enumerate(probs):
-                cumsum += p
+            next_token = candidates[-1]
+            for i, e in zip(candidates, exp_vals):
+                cumsum += e / sum_exp
                 if r <= cumsum:
                     next_token = i
                     break
             
             generated.append(next_token)
+            pending = [next_token]
             
             # Check for end token (typically 3 for <EOS>)
             if next_token == 3:
@@ -136,7 +176,7 @@ class THALOSPrimeModel(Layer):
         """Get total number of parameters."""
         total = 0
         for param in self.parameters():
-            total += len(param.data)
+            total += param.shape.numel
         return total
 
 
@@ -165,23 +205,20 @@ class ModelOptimizer:
             if grad is None:
                 continue
             
-            # Update momentum
-            for j in range(len(param.data)):
-                self.m[i].data[j] = self.beta1 * self.m[i].data[j] + (1 - self.beta1) * grad.data[j]
-                self.v[i].data[j] = self.beta2 * self.v[i].data[j] + (1 - self.beta2) * grad.data[j] ** 2
+            m, v = self.m[i], self.v[i]
+            
+            # Update biased moment estimates, each in one fused pass
+            m.copy_((m.lazy() * self.beta1 + grad.lazy() * (1 - self.beta1)).materialize())
+            v.copy_((v.lazy() * self.beta2 + grad.lazy() * grad * (1 - self.beta2)).materialize())
             
             # Bias correction
-            m_hat = [m / (1 - self.beta1 ** self.t) for m in self.m[i].data]
-            v_hat = [v / (1 - self.beta2 ** self.t) for v in self.v[i].data]
+            m_hat = m.lazy() / (1 - self.beta1 ** self.t)
+            v_hat = v.lazy() / (1 - self.beta2 ** self.t)
             
-            # Update parameters
-            for j in range(len(param.data)):
-                # Weight decay
-                if self.weight_decay > 0:
-                    param.data[j] -= self.lr * self.weight_decay * param.data[j]
-                
-                # Adam update
-                param.data[j] -= self.lr * m_hat[j] / (math.sqrt(v_hat[j]) + self.eps)
+            # Weight decay and Adam update, fused
+            decay = 1 - self.lr * self.weight_decay
+            param.copy_((param.lazy() * decay -
+                         m_hat / (v_hat.sqrt() + self.eps) * self.lr).materialize())
     
     def zero_grad(self) -> None:
         """Reset gradients (placeholder - gradients handled externally)."""
@@ -195,19 +232,21 @@ class LossFunction:
     def cross_entropy(logits: Tensor, targets: Tensor, 
                       ignore_index: int = -100) -> Tensor:
         """Compute cross-entropy loss."""
-        seq_len = len(targets.data)
-        vocab_size = len(logits.data) // seq_len
+        target_data = targets._buffer()
+        logit_data = logits._buffer()
+        seq_len = len(target_data)
+        vocab_size = len(logit_data) // seq_len
         
         total_loss = 0.0
         count = 0
         
         for i in range(seq_len):
-            target = int(targets.data[i])
+            target = int(target_data[i])
             if target == ignore_index:
                 continue
             
             # Get logits for this position
-            pos_logits = logits.data[i * vocab_size:(i + 1) * vocab_size]
+            pos_logits = logit_data[i * vocab_size:(i + 1) * vocab_size]
             
             # Log-softmax
             max_logit = max(pos_logits)
@@ -254,43 +293,138 @@ class LearningRateScheduler:
 
 
 class KVCache:
-    """Key-value cache for efficient generation."""
+    """
+    Key-value cache for efficient generation.
+    
+    Keys and values live in two preallocated (num_layers, num_heads,
+    max_seq_len, d_k) buffers used as ring buffers: position p of a layer
+    is stored in slot p % max_seq_len. Appending a position costs one
+    O(d_k) slice write per head, and once a layer is full its oldest
+    positions are overwritten, i.e. a sliding window of the last
+    max_seq_len positions is kept.
+    """
     
-    def __init__(self, num_layers: int, max_seq_len: int, d_model: int, num_heads: int):
+    def __init__(self, num_layers: int, max_seq_len: int, d_model: int, num_heads: int,
+                 dtype: str = 'float64'):
         self.num_layers = num_layers
         self.max_seq_len = max_seq_len
         self.d_model = d_model
         self.num_heads = num_heads
         self.d_k = d_model // num_heads
+        self.dtype = dtype
         
-        self.keys: List[Optional[Tensor]] = [None] * num_layers
-        self.values: List[Optional[Tensor]] = [None] * num_layers
+        self.keys = zeros(num_layers, num_heads, max_seq_len, self.d_k, dtype=dtype)
+        self.values = zeros(num_layers, num_heads, max_seq_len, self.d_k, dtype=dtype)
+        # Positions ever appended per layer, evicted ones included
+        self._positions = [0] * num_layers
         self.seq_len = 0
     
+    @staticmethod
+    def bytes_required(num_layers: int, max_seq_len: int, d_model: int,
+                       dtype: str = 'float64') -> int:
+        """Bytes a cache of this size allocates, for budgeting before creating one."""
+        return 2 * num_layers * max_seq_len * d_model * array(_TYPECODES[dtype]).itemsize
+    
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the key and value buffers."""
+        return self.keys.nbytes + self.values.nbytes
+    
+    def memory_footprint(self) -> Dict[str, int]:
+        """Allocated bytes, bytes holding cached positions, and the cost of one position."""
+        per_position = 2 * self.num_heads * self.d_k * self.keys.itemsize
+        return {
+            'allocated_bytes': self.nbytes,
+            'used_bytes': sum(self.cached_length(i) for i in range(self.num_layers)) *
+                          per_position,
+            'bytes_per_position': self.num_layers * per_position,
+            'max_seq_len': self.max_seq_len,
+        }
+    
+    def position(self, layer_idx: int) -> int:
+        """Absolute position of the next token for a layer (evicted positions count)."""
+        return self._positions[layer_idx]
+    
+    def cached_length(self, layer_idx: int) -> int:
+        """Number of positions currently held for a layer."""
+        return min(self._positions[layer_idx], self.max_seq_len)
+    
+    def _split_heads(self, x: Tensor) -> Tensor:
+        """(num_heads, seq, d_k) form of a (seq, d_model) or (num_heads, seq, d_k) input."""
+        if x.shape.ndim == 2:
+            x = x.reshape(x.shape.dims[0], self.num_heads, self.d_k).permute(1, 0, 2)
+        if x.shape.ndim != 3 or x.shape.dims[0] != self.num_heads or \
+                x.shape.dims[2] != self.d_k:
+            raise ValueError(f"Expected (num_heads={self.num_heads}, seq, d_k={self.d_k}) "
+                             f"entries, got {x.shape}")
+        return x if x.dtype == self.dtype else x.astype(self.dtype)
+    
+    def _write(self, layer_idx: int, key: Tensor, value: Tensor) -> None:
+        """Store the (at most max_seq_len) newest positions of key/value in the ring."""
+        size, d_k = self.max_seq_len, self.d_k
+        first = self._positions[layer_idx]
+        new = key.shape.dims[1]
+        for cache, entries in ((self.keys, key), (self.values, value)):
+            src = entries._buffer()
+            dst = cache.data
+            for h in range(self.num_heads):
+                base = (layer_idx * self.num_heads + h) * size * d_k
+                t = max(new - size, 0)
+                # At most two runs: up to the end of the ring, then from its start
+                while t < new:
+                    slot = (first + t) % size
+                    run = min(new - t, size - slot)
+                    dst[base + slot * d_k:base + (slot + run) * d_k] = \
+                        src[(h * new + t) * d_k:(h * new + t + run) * d_k]
+                    t += run
+            cache.bump_version()
+    
+    def get(self, layer_idx: int) -> Tuple[Tensor, Tensor]:
+        """Cached (num_heads, cached, d_k) keys and values of a layer, oldest first."""
+        stored = self.cached_length(layer_idx)
+        start = self._positions[layer_idx] % self.max_seq_len
+        result = []
+        for cache in (self.keys, self.values):
+            layer = cache[layer_idx]
+            if stored < self.max_seq_len or start == 0:
+                result.append(layer.narrow(1, 0, stored))
+            else:
+                result.append(cat([layer.narrow(1, start, self.max_seq_len - start),
+                                   layer.narrow(1, 0, start)], dim=1))
+        return result[0], result[1]
+    
     def update(self, layer_idx: int, new_key: Tensor, new_value: Tensor) -> Tuple[Tensor, Tensor]:
-        """Update cache and return combined keys/values."""
-        if self.keys[layer_idx] is None:
-            self.keys[layer_idx] = new_key
-            self.values[layer_idx] = new_value
+        """
+        Append keys/values for a layer and return everything to attend over.
+        
+        Entries are (num_heads, new, d_k), or (new, d_model) split into
+        heads. The result is the positions cached before the call followed
+        by the new ones, so eviction only happens between calls. Without
+        wrap-around it views the cache buffers: read it before the next update.
+        """
+        new_key = self._split_heads(new_key)
+        new_value = self._split_heads(new_value)
+        new = new_key.shape.dims[1]
+        if new_value.shape.dims[1] != new:
+            raise ValueError(f"Got {new} keys but {new_value.shape.dims[1]} values")
+        
+        total = self._positions[layer_idx] + new
+        if total <= self.max_seq_len:
+            self._write(layer_idx, new_key, new_value)
+            self._positions[layer_idx] = total
+            keys, values = self.get(layer_idx)
         else:
-            # Concatenate new keys/values
-            old_k = self.keys[layer_idx]
-            old_v = self.values[layer_idx]
-            
-            new_k_data = old_k.data + new_key.data
-            new_v_data = old_v.data + new_value.data
-            
-            old_seq = old_k.shape.dims[0]
-            new_seq = old_seq + new_key.shape.dims[0]
-            
-            self.keys[layer_idx] = Tensor(new_k_data, Shape((new_seq, self.d_model)))
-            self.values[layer_idx] = Tensor(new_v_data, Shape((new_seq, self.d_model)))
+            # Full: keep the old window for this call, then overwrite its oldest slots
+            old_keys, old_values = self.get(layer_idx)
+            keys = cat([old_keys, new_key], dim=1)
+            values = cat([old_values, new_value], dim=1)
+            self._write(layer_idx, new_key, new_value)
+            self._positions[layer_idx] = total
         
-        self.seq_len = self.keys[layer_idx].shape.dims[0]
-        return self.keys[layer_idx], self.values[layer_idx]
+        self.seq_len = self.cached_length(layer_idx)
+        return keys, values
     
     def clear(self) -> None:
-        """Clear the cache."""
-        self.keys = [None] * self.num_layers
-        self.values = [None] * self.num_layers
+        """Clear the cache (the buffers stay allocated for reuse)."""
+        self._positions = [0] * self.num_layers
         self.seq_len = 0
@@ -3,18 +3,24 @@ THALOS Prime - Transformer Architecture Module
 Multi-head attention, feed-forward networks, and transformer blocks.
 """
 
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
+from array import array
 import math
 import random
-from .layer import Layer, Linear, Dropout, LayerNormLayer
-from ..math.tensor import Tensor, Shape, zeros
+from .layer import Layer, Linear, Dropout, LayerNormLayer, RotaryEmbedding, state_values
+from ..math.tensor import Tensor, Shape, zeros, matmul
+from ..math.sparse import SparseTensor
+from ..math.backend import get_backend
 from ..math.activations import Activations
+from ..math.attention import AttentionMechanisms, AttentionPattern
 
 
 class MultiHeadAttention(Layer):
     """Multi-head attention mechanism."""
     
-    def __init__(self, d_model: int, num_heads: int, dropout: float = 0.0):
+    def __init__(self, d_model: int, num_heads: int, dropout: float = 0.0,
+                 generator: Optional[random.Random] = None, rotary: bool = False,
+                 pattern: Optional[AttentionPattern] = None):
         super().__init__()
         assert d_model % num_heads == 0, "d_model must be divisible by num_heads"
         
@@ -23,127 +29,154 @@ class MultiHeadAttention(Layer):
         self.d_k = d_model // num_heads
         self.dropout = dropout
         
-        # Projection layers
-        self.w_q = Linear(d_model, d_model, bias=False)
-        self.w_k = Linear(d_model, d_model, bias=False)
-        self.w_v = Linear(d_model, d_model, bias=False)
-        self.w_o = Linear(d_model, d_model, bias=False)
+        # Projection layers; Q, K and V share one fused (d_model, 3 * d_model) weight
+        self.w_qkv = Linear(d_model, 3 * d_model, bias=False, generator=generator)
+        self.w_o = Linear(d_model, d_model, bias=False, generator=generator)
         
-        self._parameters.update(self.w_q._parameters)
-        self._parameters.update(self.w_k._parameters)
-        self._parameters.update(self.w_v._parameters)
+        # Optional RoPE on queries and keys in place of additive positions
+        self.rotary = RotaryEmbedding(self.d_k) if rotary else None
+        
+        # Optional sliding-window/dilated/global-token sparsity; excluded key
+        # blocks are never scored
+        self.pattern = pattern
+        
+        self._parameters.update(self.w_qkv._parameters)
         self._parameters.update(self.w_o._parameters)
     
+    def _upgrade_state(self, state: Dict[str, Any], prefix: str) -> None:
+        # Checkpoints from before the fused projection hold separate w_q/w_k/w_v
+        names = [f'{prefix}w_{part}.weight' for part in 'qkv']
+        if f'{prefix}w_qkv.weight' in state or not all(name in state for name in names):
+            return
+        parts = [state_values(state.pop(name)) for name in names]
+        d = self.d_model
+        fused = array('d')
+        for i in range(d):
+            for part in parts:
+                fused.extend(part[i * d:(i + 1) * d])
+        state[f'{prefix}w_qkv.weight'] = fused
+    
+    def _project(self, x: Tensor, first: int, last: int) -> Tensor:
+        """Project `x` through blocks [first, last) of w_qkv (0 = Q, 1 = K, 2 = V)."""
+        d = self.d_model
+        weight_t = self.w_qkv.transposed_weight()[first * d * d:last * d * d]
+        data = get_backend().matmul_bt(x.data, weight_t, x.shape.dims[0], d, (last - first) * d)
+        return Tensor(data, Shape((x.shape.dims[0], (last - first) * d)))
+    
+    def _split_heads(self, x: Tensor, parts: int) -> List[Tensor]:
+        """Views (num_heads, seq, d_k) of a packed (seq, parts, num_heads, d_k) projection."""
+        packed = x.reshape(x.shape.dims[0], parts, self.num_heads, self.d_k).permute(1, 2, 0, 3)
+        return [packed[i] for i in range(parts)]
+    
+    @staticmethod
+    def _causal_mask(seq_q: int, seq_k: int) -> Tensor:
+        """Bool mask letting query i see keys up to i + seq_k - seq_q (the newest queries last)."""
+        shift = seq_k - seq_q
+        mask_data = array('B')
+        for i in range(seq_q):
+            visible = min(max(i + shift + 1, 0), seq_k)
+            mask_data += array('B', (1,)) * visible + array('B', (0,)) * (seq_k - visible)
+        return Tensor(mask_data, Shape((seq_q, seq_k)), 'bool')
+    
     def _scaled_dot_product_attention(self, q: Tensor, k: Tensor, v: Tensor,
-                                       mask: Optional[Tensor] = None) -> Tensor:
-        """Scaled dot-product attention."""
-        seq_q = q.shape.dims[0]
-        seq_k = k.shape.dims[0]
-        d_k = q.shape.dims[1]
-        d_v = v.shape.dims[1]
+                                       mask: Optional[Tensor] = None,
+                                       causal: bool = False) -> Tensor:
+        """Scaled dot-product attention over (..., seq, d_k) tensors."""
+        if not (self.training and self.dropout > 0):
+            # Tiled kernel with online softmax; the score matrix is never built
+            return AttentionMechanisms.flash_attention(q, k, v, mask, causal,
+                                                       pattern=self.pattern)
+        
+        # Dropout acts on the attention weights, so materialize them
+        seq_q, seq_k = q.shape.dims[-2], k.shape.dims[-2]
+        if self.pattern is not None:
+            structure = self.pattern.to_mask(seq_q, seq_k, causal).to_dense()
+        else:
+            structure = self._causal_mask(seq_q, seq_k) if causal else None
+        if structure is not None:
+            if isinstance(mask, SparseTensor):
+                mask = mask.to_dense()
+            mask = structure if mask is None else structure * mask
         
+        d_k = q.shape.dims[-1]
         scale = 1.0 / math.sqrt(d_k)
         
-        # Compute attention scores
-        scores_data = []
-        for i in range(seq_q):
-            for j in range(seq_k):
-                score = 0.0
-                for k_idx in range(d_k):
-                    score += q.data[i * d_k + k_idx] * k.data[j * d_k + k_idx]
-                scores_data.append(score * scale)
+        # Attention scores for every head at once: Q @ K^T
+        scores = matmul(q, k.transpose(-1, -2)) * scale
         
-        # Apply mask
-        if mask is not None:
-            for i in range(seq_q):
-                for j in range(seq_k):
-                    if mask.data[i * seq_k + j] == 0:
-                        scores_data[i * seq_k + j] = -1e9
+        # Apply mask (seq_q, seq_k), shared by all heads
+        if isinstance(mask, SparseTensor):
+            scores = mask.apply_mask(scores, -1e9)
+        elif mask is not None:
+            scores = scores.masked_fill(mask.eq(0), -1e9)
         
         # Softmax over keys
-        attention_data = []
-        for i in range(seq_q):
-            row = scores_data[i * seq_k:(i + 1) * seq_k]
-            max_val = max(row)
-            exp_vals = [math.exp(s - max_val) for s in row]
-            sum_exp = sum(exp_vals)
-            attention_data.extend([e / sum_exp for e in exp_vals])
+        attention = Activations.softmax(scores, dim=-1)
         
         # Apply dropout
         if self.training and self.dropout > 0:
+            attention_data = attention.data
             for i in range(len(attention_data)):
                 if random.random() < self.dropout:
                     attention_data[i] = 0.0
         
-        # Compute output
-        output_data = []
-        for i in range(seq_q):
-            for k_idx in range(d_v):
-                val = 0.0
-                for j in range(seq_k):
-                    val += attention_data[i * seq_k + j] * v.data[j * d_v + k_idx]
-                output_data.append(val)
-        
-        return Tensor(output_data, Shape((seq_q, d_v)))
+        return matmul(attention, v)
     
     def forward(self, query: Tensor, key: Tensor, value: Tensor,
-                mask: Optional[Tensor] = None) -> Tensor:
-        """Multi-head attention forward pass."""
+                mask: Optional[Tensor] = None, causal: bool = False) -> Tensor:
+        """Multi-head attention forward pass (`causal` masks future keys without a mask tensor)."""
         seq_q = query.shape.dims[0]
         seq_k = key.shape.dims[0]
         
-        # Project Q, K, V
-        q = self.w_q(query)
-        k = self.w_k(key)
-        v = self.w_v(value)
+        # Project Q, K, V and split into (num_heads, seq, d_k) views of the packed output
+        if query is key and key is value:
+            # Self-attention: one fused projection in (seq, 3, heads, d_k) layout
+            q, k, v = self._split_heads(self.w_qkv(query), 3)
+        else:
+            q, = self._split_heads(self._project(query, 0, 1), 1)
+            if key is value:
+                k, v = self._split_heads(self._project(key, 1, 3), 2)
+            else:
+                k, = self._split_heads(self._project(key, 1, 2), 1)
+                v, = self._split_heads(self._project(value, 2, 3), 1)
+        if self.rotary is not None:
+            q = self.rotary(q)
+            k = self.rotary(k)
         
-        # Split into heads and compute attention
-        head_outputs = []
-        for h in range(self.num_heads):
-            start = h * self.d_k
-            end = start + self.d_k
-            
-            # Extract head slice
-            q_h_data = []
-            k_h_data = []
-            v_h_data = []
-            
-            for i in range(seq_q):
-                for j in range(start, end):
-                    q_h_data.append(q.data[i * self.d_model + j])
-            
-            for i in range(seq_k):
-                for j in range(start, end):
-                    k_h_data.append(k.data[i * self.d_model + j])
-                    v_h_data.append(v.data[i * self.d_model + j])
-            
-            q_h = Tensor(q_h_data, Shape((seq_q, self.d_k)))
-            k_h = Tensor(k_h_data, Shape((seq_k, self.d_k)))
-            v_h = Tensor(v_h_data, Shape((seq_k, self.d_k)))
-            
-            attn_out = self._scaled_dot_product_attention(q_h, k_h, v_h, mask)
-            head_outputs.append(attn_out)
+        attn_out = self._scaled_dot_product_attention(q, k, v, mask, causal)
         
-        # Concatenate heads
-        concat_data = []
-        for i in range(seq_q):
-            for h in range(self.num_heads):
-                for j in range(self.d_k):
-                    concat_data.append(head_outputs[h].data[i * self.d_k + j])
+        # Merge heads back to (seq_q, d_model) and project
+        concat = attn_out.transpose(0, 1).reshape(seq_q, self.d_model)
+        return self.w_o(concat)
+    
+    def forward_incremental(self, x: Tensor, cache: Any, layer_idx: int) -> Tensor:
+        """
+        Causal self-attention for new positions `x` (new, d_model) after those in `cache`.
         
-        concat = Tensor(concat_data, Shape((seq_q, self.d_model)))
+        Only `x` is projected. Its (num_heads, new, d_k) keys and values
+        (rotated, with RoPE) are appended to layer `layer_idx` of the
+        KVCache and the queries attend over everything cached.
+        """
+        past = cache.position(layer_idx)
+        q, k, v = self._split_heads(self.w_qkv(x), 3)
+        if self.rotary is not None:
+            q = self.rotary(q, past)
+            k = self.rotary(k, past)
+        k, v = cache.update(layer_idx, k, v)
         
-        # Final projection
+        attn_out = self._scaled_dot_product_attention(q, k, v, causal=True)
+        concat = attn_out.transpose(0, 1).reshape(x.shape.dims[0], self.d_model)
         return self.w_o(concat)
 
 
 class FeedForwardNetwork(Layer):
     """Position-wise feed-forward network."""
     
-    def __init__(self, d_model: int, d_ff: int, dropout: float = 0.0):
+    def __init__(self, d_model: int, d_ff: int, dropout: float = 0.0,
+                 generator: Optional[random.Random] = None):
         super().__init__()
-        self.linear1 = Linear(d_model, d_ff)
-        self.linear2 = Linear(d_ff, d_model)
+        self.linear1 = Linear(d_model, d_ff, generator=generator)
+        self.linear2 = Linear(d_ff, d_model, generator=generator)
         self.dropout_layer = Dropout(dropout)
         
         self._parameters.update(self.linear1._parameters)
@@ -161,10 +194,13 @@ class FeedForwardNetwork(Layer):
 class TransformerBlock(Layer):
     """Single transformer block with attention and FFN."""
     
-    def __init__(self, d_model: int, num_heads: int, d_ff: int, dropout: float = 0.1):
+    def __init__(self, d_model: int, num_heads: int, d_ff: int, dropout: float = 0.1,
+                 generator: Optional[random.Random] = None, rotary: bool = False,
+                 pattern: Optional[AttentionPattern] = None):
         super().__init__()
-        self.attention = MultiHeadAttention(d_model, num_heads, dropout)
-        self.ffn = FeedForwardNetwork(d_model, d_ff, dropout)
+        self.attention = MultiHeadAttention(d_model, num_heads, dropout, generator, rotary,
+                                            pattern)
+        self.ffn = FeedForwardNetwork(d_model, d_ff, dropout, generator)
         self.norm1 = LayerNormLayer(d_model)
         self.norm2 = LayerNormLayer(d_model)
         self.dropout1 = Dropout(dropout)
@@ -175,34 +211,47 @@ class TransformerBlock(Layer):
         self._parameters.update(self.norm1._parameters)
         self._parameters.update(self.norm2._parameters)
     
-    def forward(self, x: Tensor, mask: Optional[Tensor] = None) -> Tensor:
+    def forward(self, x: Tensor, mask: Optional[Tensor] = None, causal: bool = False) -> Tensor:
         """Transformer block forward pass with residual connections."""
         # Self-attention with residual
-        attn_out = self.attention(x, x, x, mask)
+        attn_out = self.attention(x, x, x, mask, causal)
         attn_out = self.dropout1(attn_out)
         
-        # Add residual and normalize
-        residual1_data = [x.data[i] + attn_out.data[i] for i in range(len(x.data))]
-        x = self.norm1(Tensor(residual1_data, x.shape))
+        # Add residual (into the freshly computed attention output) and normalize
+        attn_out += x
+        x = self.norm1(attn_out)
         
         # FFN with residual
         ffn_out = self.ffn(x)
         ffn_out = self.dropout2(ffn_out)
         
         # Add residual and normalize
-        residual2_data = [x.data[i] + ffn_out.data[i] for i in range(len(x.data))]
-        x = self.norm2(Tensor(residual2_data, x.shape))
+        ffn_out += x
+        x = self.norm2(ffn_out)
         
         return x
+    
+    def forward_incremental(self, x: Tensor, cache: Any, layer_idx: int) -> Tensor:
+        """Causal block forward for new positions, attending over the cached ones."""
+        attn_out = self.dropout1(self.attention.forward_incremental(x, cache, layer_idx))
+        attn_out += x
+        x = self.norm1(attn_out)
+        
+        ffn_out = self.dropout2(self.ffn(x))
+        ffn_out += x
+        return self.norm2(ffn_out)
 
 
 class TransformerEncoder(Layer):
     """Stack of transformer encoder blocks."""
     
     def __init__(self, num_layers: int, d_model: int, num_heads: int, 
-                 d_ff: int, dropout: float = 0.1):
+                 d_ff: int, dropout: float = 0.1,
+                 generator: Optional[random.Random] = None, rotary: bool = False,
+                 pattern: Optional[AttentionPattern] = None):
         super().__init__()
-        self.layers = [TransformerBlock(d_model, num_heads, d_ff, dropout) 
+        self.layers = [TransformerBlock(d_model, num_heads, d_ff, dropout, generator, rotary,
+                                        pattern)
                        for _ in range(num_layers)]
         
         for i, layer in enumerate(self.layers):
@@ -220,40 +269,40 @@ class TransformerDecoder(Layer):
     """Stack of transformer decoder blocks with causal masking."""
     
     def __init__(self, num_layers: int, d_model: int, num_heads: int, 
-                 d_ff: int, dropout: float = 0.1):
+                 d_ff: int, dropout: float = 0.1,
+                 generator: Optional[random.Random] = None, rotary: bool = False,
+                 pattern: Optional[AttentionPattern] = None):
         super().__init__()
-        self.layers = [TransformerBlock(d_model, num_heads, d_ff, dropout) 
+        self.layers = [TransformerBlock(d_model, num_heads, d_ff, dropout, generator, rotary,
+                                        pattern)
                        for _ in range(num_layers)]
         
         for i, layer in enumerate(self.layers):
             for name, param in layer._parameters.items():
                 self._parameters[f'layer{i}_{name}'] = param
     
-    def _create_causal_mask(self, seq_len: int) -> Tensor:
-        """Create causal attention mask."""
-        mask_data = []
-        for i in range(seq_len):
-            for j in range(seq_len):
-                mask_data.append(1.0 if j <= i else 0.0)
-        return Tensor(mask_data, Shape((seq_len, seq_len)))
-    
     def forward(self, x: Tensor, encoder_output: Optional[Tensor] = None) -> Tensor:
         """Forward through all decoder layers with causal masking."""
-        seq_len = x.shape.dims[0]
-        causal_mask = self._create_causal_mask(seq_len)
-        
+        # Causal attention skips future key blocks instead of masking a full matrix
         for layer in self.layers:
-            x = layer(x, causal_mask)
+            x = layer(x, causal=True)
         
         return x
+    
+    def forward_incremental(self, x: Tensor, cache: Any) -> Tensor:
+        """Decode new positions `x`; layer i reads and extends slot i of the KVCache."""
+        for i, layer in enumerate(self.layers):
+            x = layer.forward_incremental(x, cache, i)
+        return x
 
 
 class CrossAttentionBlock(Layer):
     """Cross-attention block for encoder-decoder architectures."""
     
-    def __init__(self, d_model: int, num_heads: int, dropout: float = 0.1):
+    def __init__(self, d_model: int, num_heads: int, dropout: float = 0.1,
+                 generator: Optional[random.Random] = None):
         super().__init__()
-        self.cross_attention = MultiHeadAttention(d_model, num_heads, dropout)
+        self.cross_attention = MultiHeadAttention(d_model, num_heads, dropout, generator)
         self.norm = LayerNormLayer(d_model)
         self.dropout_layer = Dropout(dropout)
         
@@ -266,5 +315,5 @@ class CrossAttentionBlock(Layer):
         attn_out = self.dropout_layer(attn_out)
         
         # Residual connection
-        residual_data = [query.data[i] + attn_out.data[i] for i in range(len(query.data))]
-        return self.norm(Tensor(residual_data, query.shape))
+        attn_out += query
+        return self.norm(attn_out)
@@ -67,7 +67,7 @@ class ModelManager:
     def _make_serializable(self, obj: Any) -> Any:
         """Convert object to JSON-serializable format."""
         if hasattr(obj, 'data'):  # Tensor-like
-            return {'_type': 'tensor', 'data': obj.data, 'shape': obj.shape.dims}
+            return {'_type': 'tensor', 'data': list(obj.data), 'shape': obj.shape.dims}
         elif isinstance(obj, dict):
             return {k: self._make_serializable(v) for k, v in obj.items()}
         elif isinstance(obj, list):
@@ -6,6 +6,8 @@ Biological-inspired computing and neural interface simulations.
 from typing import Dict, Any, Optional, List, Callable
 import math
 import random
+from ..math.tensor import Tensor
+from ..math.sparse import SparseTensor
 
 
 class NeuralPattern:
@@ -15,6 +17,7 @@ class NeuralPattern:
         self.size = size
         self.activations = [0.0] * size
         self.connections: Dict[int, List[tuple]] = {}  # neuron -> [(target, weight)]
+        self._incoming: Optional[SparseTensor] = None  # (target, source) weights, built lazily
     
     def activate(self, neuron_id: int, strength: float = 1.0) -> None:
         """Activate a neuron."""
@@ -23,22 +26,32 @@ class NeuralPattern:
     
     def propagate(self) -> None:
         """Propagate activations through connections."""
-        new_activations = self.activations.copy()
-        
-        for source, targets in self.connections.items():
-            if self.activations[source] > 0.1:  # Threshold
-                for target, weight in targets:
-                    if 0 <= target < self.size:
-                        new_activations[target] += self.activations[source] * weight
+        # Only neurons above the threshold fire; one sparse product gathers their input
+        firing = Tensor([a if a > 0.1 else 0.0 for a in self.activations])
+        incoming = self.incoming_weights().matmul(firing)._buffer()
         
         # Apply activation function (tanh) and decay
-        self.activations = [math.tanh(a) * 0.9 for a in new_activations]
+        self.activations = [math.tanh(a + x) * 0.9 for a, x in zip(self.activations, incoming)]
+    
+    def incoming_weights(self) -> SparseTensor:
+        """Connection weights as a sparse (target, source) matrix."""
+        if self._incoming is None:
+            rows, cols, weights = [], [], []
+            for source, targets in self.connections.items():
+                for target, weight in targets:
+                    if 0 <= target < self.size and 0 <= source < self.size:
+                        rows.append(target)
+                        cols.append(source)
+                        weights.append(weight)
+            self._incoming = SparseTensor.from_coo(rows, cols, weights, (self.size, self.size))
+        return self._incoming
     
     def add_connection(self, source: int, target: int, weight: float = 0.5) -> None:
         """Add a connection between neurons."""
         if source not in self.connections:
             self.connections[source] = []
         self.connections[source].append((target, weight))
+        self._incoming = None
     
     def get_active_neurons(self, threshold: float = 0.5) -> List[int]:
         """Get list of active neurons above threshold."""
@@ -122,6 +135,7 @@ class SynapticNetwork:
     def __init__(self, num_neurons: int = 1000):
         self.num_neurons = num_neurons
         self.synapses: Dict[tuple, float] = {}  # (pre, post) -> weight
+        self._outgoing: Optional[SparseTensor] = None  # (pre, post) CSR, built lazily
         self.neurotransmitters = {
             'dopamine': 0.5,
             'serotonin': 0.5,
@@ -132,32 +146,45 @@ class SynapticNetwork:
     def create_synapse(self, pre: int, post: int, weight: float = 0.5) -> None:
         """Create a synapse between neurons."""
         self.synapses[(pre, post)] = weight
+        self._outgoing = None
+    
+    def outgoing_weights(self) -> SparseTensor:
+        """Synapse weights as a sparse (pre, post) matrix."""
+        if self._outgoing is None:
+            size = max([self.num_neurons] + [max(key) + 1 for key in self.synapses])
+            pres = [pre for pre, _ in self.synapses]
+            posts = [post for _, post in self.synapses]
+            self._outgoing = SparseTensor.from_coo(pres, posts, self.synapses.values(),
+                                                   (size, size))
+        return self._outgoing
     
     def fire(self, neuron: int, strength: float = 1.0) -> Dict[int, float]:
         """Fire a neuron and return downstream activations."""
-        activations = {}
-        
-        for (pre, post), weight in self.synapses.items():
-            if pre == neuron:
-                # Modulate by neurotransmitters
-                modulation = (
-                    self.neurotransmitters['dopamine'] * 0.3 +
-                    self.neurotransmitters['acetylcholine'] * 0.3 +
-                    (1 - self.neurotransmitters['gaba']) * 0.4
-                )
-                activations[post] = strength * weight * modulation
+        weights = self.outgoing_weights()
+        if not 0 <= neuron < weights.shape[0]:
+            return {}
         
-        return activations
+        # Modulate by neurotransmitters
+        modulation = (
+            self.neurotransmitters['dopamine'] * 0.3 +
+            self.neurotransmitters['acetylcholine'] * 0.3 +
+            (1 - self.neurotransmitters['gaba']) * 0.4
+        )
+        # Only this neuron's CSR row is visited, not every synapse
+        posts, values = weights.row(neuron)
+        return {post: strength * weight * modulation for post, weight in zip(posts, values)}
     
     def long_term_potentiation(self, pre: int, post: int, amount: float = 0.1) -> None:
         """Strengthen a synapse (learning)."""
         if (pre, post) in self.synapses:
             self.synapses[(pre, post)] = min(1.0, self.synapses[(pre, post)] + amount)
+            self._outgoing = None
     
     def long_term_depression(self, pre: int, post: int, amount: float = 0.1) -> None:
         """Weaken a synapse (forgetting)."""
         if (pre, post) in self.synapses:
             self.synapses[(pre, post)] = max(0.0, self.synapses[(pre, post)] - amount)
+            self._outgoing = None
     
     def release_neurotransmitter(self, nt: str, amount: float) -> None:
         """Release a neurotransmitter."""